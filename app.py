@@ -1,18 +1,29 @@
 import os
 import sys
-import smtplib
-from datetime import datetime, timedelta
-from flask import Flask, render_template_string, request, jsonify, session, redirect, url_for, flash
+import json
+import hmac
+import atexit
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, flash
 from flask_socketio import SocketIO
-from flask_apscheduler import APScheduler
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from gold_club_bot import GoldClubBot
+from browser_watchdog import BrowserWatchdog
+from session_store import SessionStore
+from run_scheduler import RunScheduler, QueueFullError
+from run_log import RunLogHub
+from executor import run_blocking, run_with_relay
+from history_cache import HistoryCache
+from notifications import MailSender
+from static_assets import StaticAssets, compress_response
+from leader_lease import LeaderLease, make_node_id
+from metrics import DB_COMMIT_DURATION, LINK_LIVENESS, LINK_PROBE_DURATION, observe, record_run, render_latest
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import desc
+from sqlalchemy import bindparam, desc, inspect, or_, text
+from sqlalchemy.exc import IntegrityError
 
 # --- Flask ve Veritabanı Kurulumu ---
-app = Flask(__name__)
+# Statik dosyalar Flask'ın varsayılan rotası yerine StaticAssets tarafından (parmak izli ve sıkıştırılmış) sunulur.
+app = Flask(__name__, static_folder=None)
 database_uri = os.environ.get('DATABASE_URL', 'sqlite:///local_dev.db')
 if database_uri.startswith("postgres://"):
     database_uri = database_uri.replace("postgres://", "postgresql://", 1)
@@ -21,24 +32,142 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default-super-secret-key-for-local-dev')
 
 db = SQLAlchemy(app)
+static_assets = StaticAssets(app)
+app.after_request(compress_response)
 socketio = SocketIO(app, async_mode='eventlet')
-scheduler = APScheduler()
+scheduler = None
+scheduler_lease = None
+NODE_ID = make_node_id()
+driver_pool = None
+browser_watchdog = None
+session_store = None
+run_scheduler = None
+run_logs = None
+mail_sender = None
+link_prober = None
+channel_index = None
+playlist_cache = None
 
 # --- Veritabanı Modeli ---
 class GeneratedLink(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     m3u_url = db.Column(db.Text, nullable=False)
-    expiry_date = db.Column(db.String, nullable=False)
+    # Sitenin gösterdiği ham metin; yalnızca tarihe çevrilemeyen kayıtlarda ekranda gösterilir.
+    expiry_raw = db.Column('expiry_date', db.String, nullable=False)
+    expires_on = db.Column(db.Date, index=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # True: hazır stokta bekliyor, henüz kimseye verilmedi (geçmişte gösterilmez).
+    reserved = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # Son canlılık denetiminin sonucu (alive, dead, error); hiç denetlenmediyse NULL.
+    probe_status = db.Column(db.String(16))
+    probe_http_status = db.Column(db.Integer)
+    probe_latency_ms = db.Column(db.Integer)
+    probe_checked_at = db.Column(db.DateTime)
+    # Kanal dizini (PlaylistChannel) bir kez oluşturulduğunda doldurulur; NULL ise liste henüz ayrıştırılmadı.
+    channel_count = db.Column(db.Integer)
+    channels_indexed_at = db.Column(db.DateTime)
+    # Kanal satırlarının sahibi olan link: liste önceki linkle aynıysa onun satırları paylaşılır.
+    channel_source_id = db.Column(db.Integer)
+    # Dizinlemeyi yürüten işçinin kimliği ve sahipliğin son yenilenme zamanı (bkz. ChannelIndex); NULL ise dizinleyen yok.
+    indexing_owner = db.Column(db.String(32))
+    indexing_claimed_at = db.Column(db.DateTime)
+
+    @classmethod
+    def valid_on(cls, day):
+        """Son kullanma günü başladığında (gece yarısı) link geçersizdir; `day` günü hâlâ geçerli olanlar.
+        Stok, canlılık denetimi, geçmiş filtresi ve temizlik aynı kuralı buradan kullanır."""
+        return cls.expires_on > day
 
     def to_dict(self):
         return {
             'id': self.id,
             'm3u_url': self.m3u_url,
-            'expiry_date': self.expiry_date,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'expiry_date': self.expires_on.strftime("%d.%m.%Y") if self.expires_on else self.expiry_raw,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'playlist_url': playlist_path(self.id),
+            'liveness': {
+                'status': self.probe_status, 'http_status': self.probe_http_status, 'latency_ms': self.probe_latency_ms,
+                'checked_at': self.probe_checked_at.isoformat() if self.probe_checked_at else None
+            } if self.probe_checked_at else None
+        }
+
+class PlaylistChannel(db.Model):
+    # Filtreler her zaman tek bir kaynağın kanalları üzerinde çalışır; indeksler link_id (kaynak link) ile başlar.
+    __table_args__ = (
+        db.Index('ix_playlist_channel_group', 'link_id', 'group_title'),
+        db.Index('ix_playlist_channel_tvg', 'link_id', 'tvg_id'),
+        db.Index('ix_playlist_channel_name', 'link_id', 'name'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    link_id = db.Column(db.Integer, nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # Kaynak listedeki sıra
+    group_title = db.Column(db.String, nullable=False, default='')
+    name = db.Column(db.String, nullable=False, default='')
+    tvg_id = db.Column(db.String, nullable=False, default='')
+    extinf = db.Column(db.Text, nullable=False)  # Olduğu gibi korunan #EXTINF satırı
+    url = db.Column(db.Text, nullable=False)  # Hesap bilgileri {username}/{password} yer tutucularıyla
+    fingerprint = db.Column(db.String(16))  # #EXTINF ve adres şablonunun özeti
+
+class OutboundEmail(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='pending', index=True)  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    sent_at = db.Column(db.DateTime)
+
+class BotSession(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    account = db.Column(db.String, unique=True, nullable=False)
+    cookies = db.Column(db.Text, nullable=False)  # Fernet ile şifrelenmiş çerez listesi
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+class BotRun(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    trigger = db.Column(db.String(16), nullable=False)  # generate, replenish
+    status = db.Column(db.String(16), nullable=False, default='queued', index=True)  # queued, running, success, error
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+    link_id = db.Column(db.Integer)
+    log = db.Column(db.Text)  # Çalıştırma bittiğinde log kanalındaki satırların JSON listesi
+
+class CacheVersion(db.Model):
+    # Süreçler arası paylaşılan önbellek sürümleri (ör. 'history'); ETag'ler bu sayaçtan türetilir.
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class SchedulerLease(db.Model):
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class ScheduledFire(db.Model):
+    # (job_id, slot) benzersizdir: aynı tetiklemeyi iki düğüm birden alamaz.
+    __table_args__ = (db.UniqueConstraint('job_id', 'slot', name='uq_scheduled_fire_slot'),)
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(64), nullable=False)
+    slot = db.Column(db.DateTime, nullable=False)
+    trigger = db.Column(db.String(16), nullable=False)  # cron, manual
+    node = db.Column(db.String(128), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='running')  # running, success, error
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'job_id': self.job_id, 'slot': self.slot.isoformat(), 'trigger': self.trigger, 'node': self.node, 'status': self.status, 'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None, 'finished_at': self.finished_at.isoformat() if self.finished_at else None
         }
 
+# Geçmiş yanıtları için süreç içi önbellek; sürümü tüm işçilerin paylaştığı CacheVersion satırından okunur.
+history_cache = HistoryCache(db, CacheVersion)
+
 # --- Yapılandırma ---
 config = {}
 def load_config():
@@ -53,308 +182,393 @@ def load_config():
     if not config['email'] or not config['password']:
         print("KRİTİK HATA: 'GCB_EMAIL' ve 'GCB_PASSWORD' ortam değişkenleri ayarlanmamış.")
         sys.exit(1)
-    config['scheduler'] = {"enabled": os.environ.get('SCHEDULER_ENABLED', 'false').lower() == 'true', "hour": int(os.environ.get('SCHEDULER_HOUR', 4)), "minute": int(os.environ.get('SCHEDULER_MINUTE', 0))}
-    config['notification'] = {"enabled": os.environ.get('NOTIF_ENABLED', 'false').lower() == 'true', "smtp_server": os.environ.get('SMTP_SERVER'), "smtp_port": int(os.environ.get('SMTP_PORT', 587)), "sender_email": os.environ.get('SENDER_EMAIL'), "sender_password": os.environ.get('SENDER_PASSWORD'), "receiver_email": os.environ.get('RECEIVER_EMAIL')}
+    config['scheduler'] = {"enabled": os.environ.get('SCHEDULER_ENABLED', 'false').lower() == 'true', "hour": int(os.environ.get('SCHEDULER_HOUR', 4)), "minute": int(os.environ.get('SCHEDULER_MINUTE', 0)), "misfire_grace": int(os.environ.get('SCHEDULER_MISFIRE_GRACE', 3600)), "lease_ttl": int(os.environ.get('SCHEDULER_LEASE_TTL', 60))}
+    config['bot'] = {"engine": os.environ.get('BOT_ENGINE', 'http').lower(), "fallback": os.environ.get('BOT_ENGINE_FALLBACK', 'true').lower() == 'true', "run_timeout": int(os.environ.get('BOT_RUN_TIMEOUT', 120)), "retry_policies": json.loads(os.environ.get('BOT_RETRY_POLICIES') or '{}'), "base_url": os.environ.get('GCB_BASE_URL') or None}
+    config['runs'] = {"max_concurrent": int(os.environ.get('RUN_MAX_CONCURRENT', 1)), "max_queue": int(os.environ.get('RUN_MAX_QUEUE', 10)), "log_flush_ms": int(os.environ.get('RUN_LOG_FLUSH_MS', 250)), "log_capacity": int(os.environ.get('RUN_LOG_CAPACITY', 500))}
+    config['inventory'] = {"target": int(os.environ.get('INVENTORY_TARGET', 0)), "min_ttl_hours": int(os.environ.get('INVENTORY_MIN_TTL_HOURS', 6)), "check_seconds": int(os.environ.get('INVENTORY_CHECK_SECONDS', 300)), "max_runs": int(os.environ.get('INVENTORY_MAX_RUNS', 3))}
+    config['db_auto_migrate'] = os.environ.get('DB_AUTO_MIGRATE', 'true').lower() == 'true'
+    config['prober'] = {"enabled": os.environ.get('LINK_PROBE_ENABLED', 'true').lower() == 'true', "interval": int(os.environ.get('LINK_PROBE_INTERVAL', 900)), "concurrency": int(os.environ.get('LINK_PROBE_CONCURRENCY', 50)), "per_host": int(os.environ.get('LINK_PROBE_PER_HOST', 10)), "host_rate": float(os.environ.get('LINK_PROBE_HOST_RATE', 50)), "timeout": int(os.environ.get('LINK_PROBE_TIMEOUT', 10))}
+    config['session_reuse'] = os.environ.get('SESSION_REUSE_ENABLED', 'true').lower() == 'true'
+    # Grup belirtilmeden istenen listeler bu gruba göre filtrelenir (ör. TURKISH); boşsa tüm kanallar verilir.
+    config['playlist'] = {"enabled": os.environ.get('PLAYLIST_INDEX_ENABLED', 'true').lower() == 'true', "default_group": os.environ.get('SCHEDULER_TARGET_GROUP') or None, "fetch_timeout": int(os.environ.get('PLAYLIST_FETCH_TIMEOUT', 60)),
+                          "cache_dir": os.environ.get('PLAYLIST_CACHE_DIR') or os.path.join(app.instance_path, 'playlist_cache'), "cache_max_mb": int(os.environ.get('PLAYLIST_CACHE_MAX_MB', 256))}
+    block_types = os.environ.get('BROWSER_BLOCK_TYPES')
+    block_domains = os.environ.get('BROWSER_BLOCK_DOMAINS')
+    # Profil, bot modülü ilk kez yüklendiğinde build_browser_profile(**config['browser']) ile oluşturulur.
+    config['browser'] = dict(
+        lean=os.environ.get('BROWSER_LEAN', 'true').lower() == 'true',
+        block_types=[t.strip() for t in block_types.split(',') if t.strip()] if block_types is not None else None,
+        block_domains=[d.strip() for d in block_domains.split(',') if d.strip()] if block_domains is not None else None,
+        window_size=os.environ.get('BROWSER_WINDOW_SIZE', '1024,768'),
+        renderer_memory_mb=int(os.environ.get('BROWSER_RENDERER_MEMORY_MB', 256)))
+    config['watchdog'] = {"enabled": os.environ.get('BROWSER_WATCHDOG_ENABLED', 'true').lower() == 'true', "max_run_seconds": int(os.environ.get('BROWSER_MAX_RUN_SECONDS', config['bot']['run_timeout'] + 60)), "max_rss_mb": int(os.environ.get('BROWSER_MAX_RSS_MB', 700)), "reap_interval": int(os.environ.get('BROWSER_REAP_INTERVAL', 60))}
+    config['driver_pool'] = {"enabled": os.environ.get('DRIVER_POOL_ENABLED', 'true').lower() == 'true', "size": int(os.environ.get('DRIVER_POOL_SIZE', 1)), "max_uses": int(os.environ.get('DRIVER_POOL_MAX_USES', 20)), "max_rss_mb": int(os.environ.get('DRIVER_POOL_MAX_RSS_MB', 600))}
+    config['notification'] = {"enabled": os.environ.get('NOTIF_ENABLED', 'false').lower() == 'true', "smtp_server": os.environ.get('SMTP_SERVER'), "smtp_port": int(os.environ.get('SMTP_PORT', 587)), "sender_email": os.environ.get('SENDER_EMAIL'), "sender_password": os.environ.get('SENDER_PASSWORD'), "receiver_email": os.environ.get('RECEIVER_EMAIL'), "starttls": os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true', "max_attempts": int(os.environ.get('NOTIF_MAX_ATTEMPTS', 6)), "digest_seconds": int(os.environ.get('NOTIF_DIGEST_SECONDS', 0)), "digest_max": int(os.environ.get('NOTIF_DIGEST_MAX', 10))}
     print("Yapılandırma başarıyla yüklendi.")
 
 # --- E-posta Fonksiyonu ---
 def send_email_notification(subject, body):
-    notif_config = config.get('notification', {})
-    if not notif_config.get('enabled') or not notif_config.get('sender_email'): return
+    """İletiyi kalıcı kuyruğa yazar ve hemen döner; gönderimi arka plandaki MailSender yapar."""
+    if not mail_sender: return
     try:
-        msg = MIMEMultipart(); msg['From'] = notif_config['sender_email']; msg['To'] = notif_config['receiver_email']; msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'html'))
-        server = smtplib.SMTP(notif_config['smtp_server'], notif_config['smtp_port']); server.starttls(); server.login(notif_config['sender_email'], notif_config['sender_password']); server.send_message(msg); server.quit()
-        print(f"Bildirim e-postası başarıyla gönderildi: '{subject}'")
-    except Exception as e: print(f"E-posta gönderilemedi: {e}")
+        mail_sender.enqueue(subject, body)
+    except Exception as e: print(f"E-posta kuyruğa eklenemedi: {e}")
 
 # --- BOT İŞLEMCİ FONKSİYONU (GÜNCELLENDİ) ---
-def process_bot_run(sid=None):
-    result_data = GoldClubBot(email=config['email'], password=config['password'], socketio=socketio, sid=sid).run_full_process()
+BOT_ENGINES = ('http', 'selenium')
+
+def run_bot(emitter, sid=None, engine=None, log_sink=None):
+    """
+    Seçilen motorla botu çalıştırır; HTTP motoru başarısız olursa Selenium yedek olarak denenir.
+    Native iş parçacığında çalışır, bu yüzden socketio yerine hub'a aktaran emitter kullanılır.
+    Bot modülleri (ve Selenium) açılışı yavaşlatmasın diye ilk çalıştırmada içe aktarılır.
+    """
+    from gold_club_bot import GoldClubBot, build_browser_profile
+    from http_engine import GoldClubHttpBot
+    bot_config = config.get('bot', {})
+    engine = engine if engine in BOT_ENGINES else bot_config.get('engine', 'http')
+    use_fallback = engine == 'http' and bot_config.get('fallback', True)
+    bot_options = {"run_timeout": bot_config.get('run_timeout', 120), "retry_policies": bot_config.get('retry_policies'), "base_url": bot_config.get('base_url'), "log_sink": log_sink}
+    if engine == 'http':
+        result_data = GoldClubHttpBot(email=config['email'], password=config['password'], socketio=emitter, sid=sid, notify_errors=not use_fallback, session_store=session_store, **bot_options).run_full_process()
+        if "error" not in result_data or not use_fallback:
+            return result_data
+        print(f"SID {sid or 'Scheduler'}: HTTP motoru başarısız oldu, Selenium ile tekrar deneniyor...")
+        if log_sink:
+            log_sink("-> HTTP motoru başarısız oldu, Selenium ile tekrar deneniyor...", 'warning')
+        fallback_data = GoldClubBot(email=config['email'], password=config['password'], socketio=emitter, sid=sid, driver_pool=driver_pool, session_store=session_store, browser_profile=build_browser_profile(**config['browser']), watchdog=browser_watchdog, **bot_options).run_full_process()
+        # Başarısız HTTP denemesi de metriklere işlenebilsin diye sonuca eklenir.
+        fallback_data['previous_attempt'] = result_data
+        return fallback_data
+    return GoldClubBot(email=config['email'], password=config['password'], socketio=emitter, sid=sid, driver_pool=driver_pool, session_store=session_store, browser_profile=build_browser_profile(**config['browser']), watchdog=browser_watchdog, **bot_options).run_full_process()
+
+def process_bot_run(sid=None, engine=None, reserve=False, log_sink=None):
+    result_data = run_with_relay(socketio, run_bot, sid, engine, log_sink)
+    for attempt in (result_data.get('previous_attempt'), result_data):
+        if attempt:
+            record_run(attempt)
+    timings = result_data.get('timings')
     if "error" in result_data or not result_data.get('url'):
         error_message = result_data.get('error', 'Bilinmeyen bir hata oluştu veya link alınamadı.')
         send_email_notification("Link Oluşturma Başarısız Oldu", f"Hata: {error_message}")
-        return {"error": error_message}
-
-    # --- YENİ: Tarih Formatlama İşlemi ---
-    try:
-        # Gelen "Weekday, Month Day, Year" formatını datetime nesnesine çevir
-        expiry_dt = datetime.strptime(result_data['expiry'], "%A, %B %d, %Y")
-        # Yeni "dd.mm.YYYY" formatına çevir
-        formatted_expiry_date = expiry_dt.strftime("%d.%m.%Y")
-    except ValueError:
-        # Eğer format anlaşılamazsa, orijinalini kullan
-        formatted_expiry_date = result_data['expiry']
+        return {"error": error_message, "timings": timings}
 
     new_link = GeneratedLink(
         m3u_url=result_data['url'],
-        expiry_date=formatted_expiry_date  # Veritabanına yeni formatta kaydet
+        expiry_raw=result_data['expiry'],
+        expires_on=parse_expiry_date(result_data['expiry']),  # Görüntüleme biçimi yalnızca to_dict() içinde uygulanır
+        reserved=reserve
     )
     db.session.add(new_link)
-    db.session.commit()
+    history_cache.invalidate()
+    with observe(DB_COMMIT_DURATION, operation='insert_link'):
+        db.session.commit()
+    if channel_index:
+        # Liste bir kez, link üretilir üretilmez ayrıştırılır; istemci istekleri hazır dizinden karşılanır.
+        socketio.start_background_task(index_playlist, new_link.id)
     
     new_link_data = new_link.to_dict()
+    formatted_expiry_date = new_link_data['expiry_date']
+    if reserve:
+        # Stok için üretilen link henüz kimseye verilmediğinden e-posta gönderilmez.
+        return {"new_link": new_link_data, "timings": timings}
     subject = "Yeni M3U Linki Oluşturuldu"
     body = f"<p>Yeni bir M3U linki başarıyla oluşturuldu.</p><ul><li><b>Link:</b> {result_data['url']}</li><li><b>Son Kullanma:</b> {formatted_expiry_date}</li></ul>"
     send_email_notification(subject, body)
-    return {"new_link": new_link_data}
+    return {"new_link": new_link_data, "timings": timings}
+
+# --- Hazır Link Stoğu ---
+def is_leader_node():
+    """Tek bir düğümde çalışması gereken arka plan işleri için; zamanlayıcı kapalıysa (kira yoksa) her düğüm liderdir."""
+    return scheduler_lease is None or scheduler_lease.is_leader
+
+def fresh_stock():
+    """Stoktaki, en az INVENTORY_MIN_TTL_HOURS daha geçerli kalacak linkler (en eskisi önce)."""
+    # Eşik anının düştüğü gün hâlâ geçerli olan link, o ana kadar geçerli kalır.
+    threshold = (datetime.now() + timedelta(hours=config['inventory']['min_ttl_hours'])).date()
+    # Canlılık denetiminde ölü çıkan linkler kullanıcıya verilmez.
+    alive = or_(GeneratedLink.probe_status.is_(None), GeneratedLink.probe_status != 'dead')
+    return GeneratedLink.query.filter(GeneratedLink.reserved.is_(True), GeneratedLink.valid_on(threshold), alive).order_by(GeneratedLink.id)
+
+def claim_stocked_link():
+    """Stoktan bir linki atomik olarak alır; stok boşsa None döner."""
+    for candidate in fresh_stock().limit(5).all():
+        # Koşullu UPDATE: iki istek aynı adayı seçse bile yalnızca biri satırı güncelleyebilir.
+        claimed = GeneratedLink.query.filter_by(id=candidate.id, reserved=True).update({'reserved': False}, synchronize_session=False)
+        if claimed:
+            history_cache.invalidate()
+        db.session.commit()
+        if claimed:
+            return db.session.get(GeneratedLink, candidate.id)
+    return None
+
+def stock_deficit():
+    return max(0, config['inventory']['target'] - fresh_stock().count())
+
+# Son envanter kontrolünden beri başlatılan yenileme sayısı ve yenilemenin ilerlemeyi bırakıp
+# bırakmadığı (art arda sınırı doldu veya üretilen link stoğa sayılmadı); kontrol döngüsü sıfırlar.
+replenish_state = {'runs': 0, 'stalled': False}
+
+def replenish_job(job):
+    with app.app_context():
+        result = process_bot_run(job.room, reserve=True, log_sink=begin_run(job))
+        if "error" in result:
+            # Hata durumunda periyodik kontrol beklenir.
+            return result
+        if not fresh_stock().filter(GeneratedLink.id == result['new_link']['id']).count():
+            # Ör. deneme süresi INVENTORY_MIN_TTL_HOURS'tan kısa: yeni sipariş de stoğa sayılmaz, tekrar denemek anlamsız.
+            replenish_state['stalled'] = True
+            print("Üretilen link stok için yeterince taze değil; yenileme bir sonraki kontrole bırakıldı.")
+        elif stock_deficit() > 0:
+            # Stok hâlâ eksikse bir sonraki link hemen sıraya alınır.
+            socketio.start_background_task(replenish_stock, True)
+        return result
+
+def replenish_stock(chained=False):
+    # Birden fazla işçi veya örnek aynı açığı görüp ayrı ayrı deneme siparişi vermesin diye stoğu yalnızca lider yeniler.
+    if not is_leader_node():
+        return
+    if chained and replenish_state['runs'] >= config['inventory']['max_runs']:
+        replenish_state['stalled'] = True
+        print(f"Stok yenileme bu kontrolde {replenish_state['runs']} kez çalıştı; kalan açık bir sonraki kontrole bırakıldı.")
+        return
+    with app.app_context():
+        deficit = stock_deficit()
+    if deficit > 0:
+        print(f"Link stoğu eksik ({deficit} adet), yenisi üretiliyor...")
+        try:
+            run_scheduler.submit('replenish', replenish_job)
+            replenish_state['runs'] += 1
+        except QueueFullError as e:
+            print(f"Stok yenileme ertelendi: {e}")
+
+def inventory_loop():
+    interval = config['inventory']['check_seconds']
+    delay = interval
+    while True:
+        replenish_state.update(runs=0, stalled=False)
+        try:
+            replenish_stock()
+        except Exception as e:
+            print(f"Stok kontrolü sırasında hata oluştu: {e}")
+        socketio.sleep(delay)
+        # Yenileme stoğu dolduramıyorsa kontroller seyreltilir (en fazla 8 kat); aynı açık için sürekli sipariş verilmez.
+        if replenish_state['stalled']:
+            delay = min(delay * 2, interval * 8)
+            print(f"Stok yenileme ilerlemiyor; sonraki kontrol {delay} sn sonra.")
+        else:
+            delay = interval
+
+# --- Link Canlılık Denetimi ---
+def probe_links():
+    """Süresi dolmamış tüm linkleri tek bir eşzamanlı turda denetler ve sonuçları toplu olarak yazar."""
+    with app.app_context():
+        rows = db.session.query(GeneratedLink.id, GeneratedLink.m3u_url).filter(or_(GeneratedLink.expires_on.is_(None), GeneratedLink.valid_on(date.today()))).all()
+    if not rows:
+        return {'links': 0}
+    with observe(LINK_PROBE_DURATION):
+        results = run_blocking(link_prober.sweep, [(row.id, row.m3u_url) for row in rows])
+    with app.app_context():
+        # Birincil anahtarla toplu UPDATE: tek bir executemany, satırlar tek tek yüklenmez. Core UPDATE
+        # kullanılır, çünkü tur sırasında silinen linkler ORM toplu güncellemesinde tüm turu geçersiz kılar.
+        table = GeneratedLink.__table__
+        statement = table.update().where(table.c.id == bindparam('b_id'))
+        db.session.execute(statement, [{'b_id': result['id'], **{key: value for key, value in result.items() if key != 'id'}} for result in results])
+        history_cache.invalidate()
+        db.session.commit()
+    summary = {'links': len(results), 'alive': 0, 'dead': 0, 'error': 0}
+    for result in results:
+        summary[result['probe_status']] += 1
+    for status in ('alive', 'dead', 'error'):
+        LINK_LIVENESS.labels(status=status).set(summary[status])
+    socketio.emit('liveness_updated', summary)
+    print(f"Link canlılık denetimi tamamlandı: {summary['links']} link, {summary['alive']} canlı, {summary['dead']} ölü, {summary['error']} ulaşılamadı.")
+    return summary
+
+def liveness_loop():
+    interval = config['prober']['interval']
+    while True:
+        # Birden fazla düğüm varsa sağlayıcıya aynı linkler için tekrar tekrar gidilmesin diye yalnızca lider denetler.
+        if is_leader_node():
+            try:
+                probe_links()
+            except Exception as e:
+                print(f"Link canlılık denetimi sırasında hata oluştu: {e}")
+        socketio.sleep(interval)
+
+# --- M3U Kanal Dizini ---
+def playlist_token(link_id):
+    """Oturum açamayan oynatıcılar için linke özel, tahmin edilemeyen erişim anahtarı."""
+    return hmac.new(app.config['SECRET_KEY'].encode('utf-8'), f"playlist:{link_id}".encode('utf-8'), 'sha256').hexdigest()[:24]
+
+def playlist_path(link_id):
+    return f"/playlist/{link_id}.m3u?token={playlist_token(link_id)}"
+
+def index_playlist(link_id):
+    try:
+        channel_index.ensure(link_id)
+    except Exception as e:
+        print(f"Link #{link_id} için M3U listesi dizinlenemedi: {e}")
+
+def playlist_access(link_id):
+    """Oturum açmış kullanıcı veya geçerli token; değilse hata yanıtı döner."""
+    if channel_index is None:
+        return jsonify({"error": "Kanal dizini kapalı."}), 404
+    if 'logged_in' not in session and not hmac.compare_digest(request.args.get('token', ''), playlist_token(link_id)):
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        channel_index.ensure(link_id)
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": f"M3U listesi alınamadı: {e}"}), 502
+    return None
+
+def link_not_found(link_id):
+    # playlist_access ile aynı yanıt; link dizinlemeden sonra (temizlik veya stok) silinmiş olabilir.
+    return jsonify({"error": f"Link #{link_id} bulunamadı."}), 404
+
+def split_args(name):
+    return [value.strip() for raw in request.args.getlist(name) for value in raw.split(',') if value.strip()]
 
 # --- ZAMANLANMIŞ GÖREVLER ---
+def generate_link_job(engine=None):
+    """Çalıştırma kuyruğuna verilecek iş: durum mesajları işe bağlı tüm istemcilerin odasına gider."""
+    def task(job):
+        with app.app_context():
+            return process_bot_run(job.room, engine, log_sink=begin_run(job))
+    return task
+
+# --- Çalıştırma Kayıtları ve Log Kanalları ---
+def create_run(key):
+    """Kuyruğa alınan her iş için kalıcı bir BotRun kaydı açar; kayıt kimliği işin kimliği olur."""
+    with app.app_context():
+        run = BotRun(trigger=key, status='queued')
+        db.session.add(run)
+        db.session.commit()
+        return run.id
+
+def begin_run(job):
+    """Çalıştırmayı başlamış olarak işaretler, log kanalını açar ve çalıştırmayı bekleyen istemcilere duyurur."""
+    BotRun.query.filter_by(id=job.id).update({'status': 'running', 'started_at': datetime.utcnow()})
+    db.session.commit()
+    # Yalnızca çalıştırmanın odasına: diğer kullanıcıların panoları başkasının loglarını izlemeye başlamaz.
+    socketio.emit('run_started', {'run_id': job.id, 'trigger': job.key}, to=job.room)
+    return run_logs.open(job.id, job.room).append
+
+def finish_run(job, result):
+    """Log kanalını son kez yayınlayıp kapatır, sonucu ve log satırlarını kayda yazar."""
+    log = run_logs.close(job.id)
+    with app.app_context():
+        run = db.session.get(BotRun, job.id)
+        if run is None:
+            return
+        run.status = 'error' if "error" in result else 'success'
+        run.error = result.get('error')
+        run.link_id = (result.get('new_link') or {}).get('id')
+        run.finished_at = datetime.utcnow()
+        if log is not None:
+            run.log = json.dumps(log.since(0))
+        db.session.commit()
+
+def run_log_entries(run, after=0):
+    """Sıra numarası `after`dan büyük log satırları; önce bellekteki kanal, yoksa kalıcı kayıt okunur."""
+    log = run_logs.get(run.id)
+    if log is not None:
+        return log.since(after)
+    return [entry for entry in json.loads(run.log or '[]') if entry['seq'] > after]
+
+def emit_run_result(job, result):
+    try:
+        finish_run(job, result)
+    except Exception as e:
+        print(f"Çalıştırma #{job.id} kaydı güncellenemedi: {e}")
+    if result.get('timings'): socketio.emit('run_timings', {'run_id': job.id, 'timings': result['timings']}, to=job.room)
+    if "error" in result: socketio.emit('process_error', {'error': result['error']}, to=job.room)
+    else: socketio.emit('process_complete', {'new_link': result['new_link']}, to=job.room)
+
 def scheduled_task():
     print("Zamanlanmış link üretme görevi başlatılıyor...")
-    with app.app_context():
-        process_bot_run()
+    try:
+        # Aynı anda web'den başlatılmış bir çalıştırma varsa ona eklenir, ikinci bir tarayıcı açılmaz.
+        run_scheduler.submit('generate', generate_link_job()).wait()
+    except QueueFullError as e:
+        print(f"Zamanlanmış görev atlandı: {e}")
+        return
     print("Zamanlanmış link üretme görevi tamamlandı.")
 
 def cleanup_expired_links():
     print("Süresi dolmuş linkler için temizlik görevi başlatılıyor...")
     with app.app_context():
         try:
-            now = datetime.now()
-            expired_links = GeneratedLink.query.all()
-            deleted_count = 0
-            for link in expired_links:
-                try:
-                    # Yeni format: dd.mm.YYYY
-                    expiry_dt = datetime.strptime(link.expiry_date, "%d.%m.%Y")
-                    if expiry_dt < now:
-                        db.session.delete(link)
-                        deleted_count += 1
-                except ValueError:
-                    print(f"ID #{link.id} için tarih formatı anlaşılamadı: {link.expiry_date}")
+            # Tek bir indeksli toplu DELETE; satırlar Python'a yüklenmez. Son kullanma günü başladığında link düşer.
+            expired = GeneratedLink.query.filter(~GeneratedLink.valid_on(date.today()))
+            expired_ids = [link_id for link_id, in expired.with_entities(GeneratedLink.id)]
+            deleted_count = expired.delete(synchronize_session=False)
+            # Kanal satırları, kendisini kaynak olarak kullanan hiçbir link kalmadığında silinir. Henüz
+            # dizinlenmekte olan bir linkin (kaynağı atanmamış) parça parça yazılan satırları korunur.
+            sources = db.session.query(db.func.coalesce(GeneratedLink.channel_source_id, GeneratedLink.id))
+            PlaylistChannel.query.filter(PlaylistChannel.link_id.notin_(sources)).delete(synchronize_session=False)
+            BotRun.query.filter(BotRun.created_at < datetime.utcnow() - timedelta(days=30)).delete(synchronize_session=False)
             if deleted_count > 0:
+                history_cache.invalidate()
+            with observe(DB_COMMIT_DURATION, operation='cleanup'):
                 db.session.commit()
+            if deleted_count > 0:
+                if playlist_cache:
+                    playlist_cache.discard(expired_ids)
                 print(f"{deleted_count} adet süresi dolmuş link veritabanından silindi.")
             else:
                 print("Silinecek süresi dolmuş link bulunamadı.")
         except Exception as e:
             print(f"Temizlik görevi sırasında hata oluştu: {e}")
+        ScheduledFire.query.filter(ScheduledFire.started_at < datetime.utcnow() - timedelta(days=30)).delete(synchronize_session=False)
+        db.session.commit()
 
-# --- HTML TEMPLATE'LER ---
-
-LOGIN_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="tr">
-<head>
-    <meta charset="UTF-8"><title>Giriş Yap</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Manrope:wght@400;500;600;700;800&display=swap" rel="stylesheet">
-    <style>
-        :root { --bg-dark: #101014; --bg-card: rgba(30, 30, 35, 0.5); --border-color: rgba(255, 255, 255, 0.1); --text-primary: #f0f0f0; --text-secondary: #a0a0a0; --accent-grad: linear-gradient(90deg, #8A2387, #E94057, #F27121); --error-color: #f44336; }
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body { font-family: 'Manrope', sans-serif; background: var(--bg-dark); color: var(--text-primary); display: flex; align-items: center; justify-content: center; min-height: 100vh; padding: 1rem; }
-        .login-box { background: var(--bg-card); border: 1px solid var(--border-color); border-radius: 16px; padding: 2rem; backdrop-filter: blur(20px); width: 100%; max-width: 400px; }
-        h1 { text-align: center; margin-bottom: 1.5rem; font-weight: 800;}
-        .form-group { margin-bottom: 1.5rem; }
-        label { display: block; margin-bottom: 0.5rem; color: var(--text-secondary); }
-        input[type="password"] { width: 100%; padding: 0.8rem 1rem; background-color: rgba(0,0,0,0.2); border: 1px solid var(--border-color); border-radius: 8px; color: var(--text-primary); font-size: 1rem; }
-        input[type="password"]:focus { border-color: #E94057; outline: none; }
-        .btn { width: 100%; padding: 0.9rem; background: var(--accent-grad); color: white; border: none; border-radius: 8px; font-size: 1.1rem; cursor: pointer; font-weight: 700; }
-        .flash-error { background: rgba(244, 67, 54, 0.2); border: 1px solid var(--error-color); color: var(--error-color); padding: 1rem; border-radius: 8px; margin-bottom: 1.5rem; text-align: center; }
-    </style>
-</head>
-<body>
-    <div class="login-box">
-        <h1>Giriş Yap</h1>
-        {% with messages = get_flashed_messages() %}
-            {% if messages %}
-                <div class="flash-error">{{ messages[0] }}</div>
-            {% endif %}
-        {% endwith %}
-        <form method="post">
-            <div class="form-group">
-                <label for="password">Şifre</label>
-                <input type="password" id="password" name="password" required>
-            </div>
-            <button type="submit" class="btn">Giriş Yap</button>
-        </form>
-    </div>
-</body>
-</html>
-"""
-
-HOME_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="tr">
-<head>
-    <meta charset="UTF-8"><title>M3U Link Üretici</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link rel="stylesheet" type="text/css" href="https://cdn.jsdelivr.net/npm/toastify-js/src/toastify.min.css">
-    <script src="https://cdn.jsdelivr.net/npm/feather-icons/dist/feather.min.js"></script>
-    <link href="https://fonts.googleapis.com/css2?family=Manrope:wght@400;500;600;700;800&display=swap" rel="stylesheet">
-    <style>
-        :root { 
-            --bg-dark: #101014; --bg-card: rgba(30, 30, 35, 0.5); --border-color: rgba(255, 255, 255, 0.1); 
-            --text-primary: #f0f0f0; --text-secondary: #a0a0a0; 
-            --accent-grad: linear-gradient(90deg, #8A2387, #E94057, #F27121); 
-            --success-color: #1ed760; --error-color: #f44336; --warning-color: #f2c94c;
-        }
-        @keyframes spin { 0% { transform: rotate(0deg); } 100% { transform: rotate(360deg); } }
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body { font-family: 'Manrope', sans-serif; background: var(--bg-dark); color: var(--text-primary); font-size: 15px; overflow-x: hidden; }
-        body::before { content: ''; position: fixed; top: 0; left: 0; width: 100%; height: 100%; background: radial-gradient(circle at 15% 25%, #8a238744, transparent 30%), radial-gradient(circle at 85% 75%, #f2712133, transparent 40%); z-index: -1; }
-        .container { max-width: 1400px; margin: 2rem auto; padding: 0 1rem; }
-        .shell { background: var(--bg-card); border: 1px solid var(--border-color); border-radius: 16px; padding: 1.5rem; backdrop-filter: blur(20px); -webkit-backdrop-filter: blur(20px); }
-        h1 { text-align: center; margin-bottom: 2rem; font-weight: 800; }
-        .dashboard { display: grid; grid-template-columns: minmax(300px, 1fr) 2.5fr; gap: 2rem; align-items: flex-start; }
-        .btn { display: inline-flex; align-items: center; justify-content: center; gap: 0.75rem; width: 100%; padding: 0.9rem; background: var(--accent-grad); color: white; border: none; border-radius: 8px; font-size: 1.1rem; cursor: pointer; font-weight: 700; margin-top: 1.5rem; text-decoration: none; }
-        .btn-logout { background: var(--error-color); margin-top: 1rem; }
-        .btn:hover:not(:disabled) { transform: translateY(-3px); box-shadow: 0 4px 20px rgba(233, 64, 87, 0.3); }
-        .btn:disabled { background: #333; cursor: not-allowed; }
-        .btn .spinner { animation: spin 1s linear infinite; }
-        #log-container { margin-top: 1rem; background-color: rgba(0,0,0,0.3); padding: 1rem; border-radius: 8px; height: 350px; overflow-y: auto; font-family: 'Fira Code', monospace; font-size: 0.85rem; }
-        .history-table { width: 100%; border-collapse: collapse; }
-        .history-table th, .history-table td { padding: 1rem 0.75rem; border-bottom: 1px solid var(--border-color); text-align: left; vertical-align: top; }
-        .history-table th { font-weight: 600; color: var(--text-secondary); }
-        .m3u-cell { display: flex; align-items: center; justify-content: space-between; gap: 1rem; }
-        .m3u-link { word-break: break-all; background: rgba(0,0,0,0.2); padding: 0.5rem; border-radius: 4px; font-family: monospace; flex-grow: 1; }
-        .btn-copy { background: none; border: 1px solid var(--border-color); color: var(--text-secondary); padding: 0.4rem 0.8rem; border-radius: 20px; cursor: pointer; flex-shrink: 0; }
-        tr.expiring td:nth-child(2) { color: var(--warning-color); font-weight: 600; }
-        tr.expired td { color: var(--text-secondary); text-decoration: line-through; }
-        tr.expired .m3u-link, tr.expired .btn-copy { opacity: 0.5; pointer-events: none; }
-        .log-line.info { color: var(--text-primary); }
-        .log-line.warning { color: var(--warning-color); }
-        .log-line.error { color: var(--error-color); font-weight: bold; }
-        @media (max-width: 992px) { 
-            .dashboard { grid-template-columns: 1fr; } 
-            .history-table thead { border: none; clip: rect(0 0 0 0); height: 1px; margin: -1px; overflow: hidden; padding: 0; position: absolute; width: 1px; }
-            .history-table tr { display: block; border-bottom: 2px solid var(--accent-grad); margin-bottom: 1.5rem; border-radius: 8px; background: rgba(0,0,0,0.2); }
-            tr.expired { border-bottom-color: var(--border-color); }
-            .history-table td { display: block; text-align: right; border-bottom: 1px dotted rgba(255,255,255,0.1); padding: 0.75rem; }
-            .history-table td:last-child { border-bottom: 0; }
-            .history-table td::before { content: attr(data-label); float: left; font-weight: bold; color: var(--text-secondary); text-transform: uppercase; font-size: 0.85em; }
-            .m3u-cell { flex-direction: column; align-items: flex-start; gap: 0.5rem; }
-            .m3u-link { width: 100%; text-align: left; }
-            .btn-copy { align-self: flex-end; }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>M3U Link Üretici</h1>
-        <div class="dashboard shell">
-            <div>
-                <form id="control-form"><button type="submit" id="start-btn" class="btn"><i data-feather="play-circle"></i><span>Yeni M3U Linki Üret</span></button></form>
-                <a href="/logout" class="btn btn-logout">Çıkış Yap</a>
-                <h3 style="margin-top:2rem;color:var(--text-secondary);">Canlı Loglar</h3>
-                <div id="log-container"></div>
-            </div>
-            <div>
-                <h3 style="margin-bottom:1rem;color:var(--text-secondary);">Geçmiş Linkler</h3>
-                <div style="max-height: 550px; overflow-y: auto;">
-                    <table class="history-table">
-                        <thead><tr><th>Üretim Zamanı</th><th>Son Kullanma</th><th>M3U Linki</th></tr></thead>
-                        <tbody id="history-body"></tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-    </div>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.5/socket.io.min.js"></script>
-    <script type="text/javascript" src="https://cdn.jsdelivr.net/npm/toastify-js"></script>
-    <script>
-        feather.replace();
-        const socket = io({ transports: ['websocket'] });
-        const startBtn = document.getElementById('start-btn');
-        const logContainer = document.getElementById('log-container');
-        const historyBody = document.getElementById('history-body');
-
-        function renderHistoryRow(item) {
-            // *** SAAT DİLİMİ DÜZELTMESİ (Doğrudan +3 Saat Ekleme) ***
-            // Sunucudan gelen UTC tarihini al
-            const creationDateUTC = new Date(item.created_at);
-            // Üzerine 3 saat ekle
-            creationDateUTC.setHours(creationDateUTC.getHours() + 3);
-            // Türkiye formatında göster
-            const localCreationTime = creationDateUTC.toLocaleString('tr-TR', {
-                year: 'numeric', month: '2-digit', day: '2-digit',
-                hour: '2-digit', minute: '2-digit', second: '2-digit'
-            });
-
-            // Son kullanma tarihi için renk stilleri
-            // Not: Artık item.expiry_date "dd.mm.YYYY" formatında gelecek,
-            // bu yüzden karşılaştırma için onu tekrar Date nesnesine çevirmemiz lazım.
-            const expiryParts = item.expiry_date.split('.');
-            const expiryDate = new Date(`${expiryParts[2]}-${expiryParts[1]}-${expiryParts[0]}`);
-            const now = new Date();
-            const oneDay = 24 * 60 * 60 * 1000;
-            let rowClass = '';
-            if (expiryDate < now) { rowClass = 'expired'; } 
-            else if ((expiryDate - now) < oneDay) { rowClass = 'expiring'; }
-
-            const copyButtonHTML = `<button class="btn-copy" onclick="copyLink(this, \`${item.m3u_url}\`)"><i data-feather="copy"></i></button>`;
-            
-            return `<tr id="history-row-${item.id}" class="${rowClass}">
-                <td data-label="Üretim">${localCreationTime}</td>
-                <td data-label="Son Kullanma">${item.expiry_date}</td>
-                <td data-label="M3U Linki" class="m3u-cell">
-                    <div class="m3u-link">${item.m3u_url}</div>
-                    ${copyButtonHTML}
-                </td>
-            </tr>`;
-        }
-
-        async function fetchHistory() { 
-            try { 
-                const res = await fetch('/get_history?t=' + new Date().getTime());
-                const historyData = await res.json();
-                historyBody.innerHTML = ''; 
-                historyData.forEach(item => { historyBody.innerHTML += renderHistoryRow(item); });
-                feather.replace();
-            } catch (e) { console.error(e); } 
-        }
-
-        function copyLink(button, textToCopy) {
-            navigator.clipboard.writeText(textToCopy).then(() => {
-                Toastify({ text: "Link panoya kopyalandı!", duration: 3000, gravity: "bottom", position: "right", style: { background: "var(--success-color)" } }).showToast();
-            });
-        }
+SCHEDULED_JOBS = {'scheduled_bot_task': scheduled_task, 'cleanup_task': cleanup_expired_links}
 
-        document.getElementById('control-form').addEventListener('submit', (e) => {
-            e.preventDefault();
-            startBtn.disabled = true;
-            startBtn.innerHTML = '<i data-feather="loader" class="spinner"></i><span>İşlem Yürütülüyor...</span>';
-            feather.replace();
-            logContainer.innerHTML = '';
-            socket.emit('start_process', {});
-        });
-        
-        socket.on('process_complete', (data) => {
-            startBtn.disabled = false;
-            startBtn.innerHTML = '<i data-feather="play-circle"></i><span>Yeni M3U Linki Üret</span>';
-            if (data.new_link) {
-                historyBody.insertAdjacentHTML('afterbegin', renderHistoryRow(data.new_link));
-            }
-            feather.replace();
-            Toastify({ text: "Yeni link başarıyla üretildi!", duration: 4000, gravity: "bottom", position: "right", style: { background: "var(--accent-grad)" } }).showToast();
-        });
-
-        socket.on('status_update', (data) => {
-            const level = data.level || 'info';
-            logContainer.innerHTML += `<div class="log-line ${level}">${data.message.replace(/</g, "&lt;")}</div>`;
-            logContainer.scrollTop = logContainer.scrollHeight;
-        });
-
-        socket.on('process_error', (data) => {
-            logContainer.innerHTML += `<div class="log-line error">HATA: ${data.error.replace(/</g, "&lt;")}</div>`;
-            startBtn.disabled = false;
-            startBtn.innerHTML = '<i data-feather="alert-triangle"></i><span>Tekrar Dene</span>';
-            feather.replace();
-        });
-        
-        document.addEventListener('DOMContentLoaded', fetchHistory);
-    </script>
-</body>
-</html>
-"""
+def run_scheduled_job(job_id, manual=False):
+    """
+    Zamanlanmış bir görevi tek seferlik tetikleme kaydıyla çalıştırır. Cron tetiklemeleri dakikaya
+    yuvarlanmış zaman dilimiyle kaydedilir; liderlik devri sırasında iki düğüm aynı dilimi
+    çalıştırmaya kalkarsa benzersiz kısıt nedeniyle yalnızca biri başarılı olur.
+    """
+    now = datetime.utcnow()
+    with app.app_context():
+        fire = ScheduledFire(job_id=job_id, slot=now if manual else now.replace(second=0, microsecond=0), trigger='manual' if manual else 'cron', node=NODE_ID, status='running')
+        db.session.add(fire)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            print(f"'{job_id}' bu zaman diliminde başka bir düğümde çalıştı, atlanıyor.")
+            return
+        fire_id = fire.id
+    status, error = 'success', None
+    try:
+        SCHEDULED_JOBS[job_id]()
+    except Exception as e:
+        status, error = 'error', f"{type(e).__name__}: {e}"
+        print(f"Zamanlanmış görev '{job_id}' başarısız oldu: {error}")
+    with app.app_context():
+        ScheduledFire.query.filter_by(id=fire_id).update({'status': status, 'error': error, 'finished_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
 
 # --- Flask Rotaları ---
 
+@app.route('/healthz')
+def healthz():
+    """Sağlık kontrolü: veritabanına ve şablonlara dokunmaz, yalnızca sürecin yanıt verdiğini gösterir."""
+    return Response('ok', mimetype='text/plain', headers={'Cache-Control': 'no-store'})
+
 @app.route('/')
 def index():
     if 'logged_in' not in session:
         return redirect(url_for('login'))
-    return render_template_string(HOME_TEMPLATE)
+    response = Response(render_template('home.html'))
+    # Sayfa her açılışta ETag ile yeniden doğrulanır; değişmediyse gövde gönderilmez (304).
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -366,45 +580,431 @@ def login():
         else:
             flash('Hatalı şifre. Lütfen tekrar deneyin.')
             return redirect(url_for('login'))
-    return render_template_string(LOGIN_TEMPLATE)
+    return render_template('login.html')
 
 @app.route('/logout')
 def logout():
     session.clear()
     return redirect(url_for('login'))
 
+@app.route('/metrics')
+def metrics():
+    payload, content_type = render_latest(browser_watchdog)
+    return Response(payload, content_type=content_type)
+
+@app.route('/browsers')
+def browsers():
+    """Takip edilen tarayıcıların anlık süreç ve bellek durumu."""
+    if 'logged_in' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if browser_watchdog is None:
+        return jsonify({"error": "Tarayıcı denetimi kapalı."}), 404
+    return jsonify(browser_watchdog.snapshot())
+
+@app.route('/jobs')
+def list_jobs():
+    """Zamanlanmış görevler, sıradaki çalışma zamanları, lider düğüm ve son tetiklemeler."""
+    if 'logged_in' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if scheduler is None:
+        return jsonify({"error": "Zamanlayıcı kapalı."}), 404
+    jobs = [{"id": job.id, "trigger": str(job.trigger), "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None} for job in scheduler.get_jobs()]
+    fires = ScheduledFire.query.order_by(desc(ScheduledFire.id)).limit(20).all()
+    return jsonify({"node": NODE_ID, "leader": scheduler_lease.holder(), "is_leader": scheduler_lease.is_leader, "jobs": jobs, "recent_fires": [fire.to_dict() for fire in fires]})
+
+@app.route('/jobs/<job_id>/run', methods=['POST'])
+def trigger_job(job_id):
+    """Görevi bu düğümde hemen çalıştırır; sonuç /jobs altındaki tetikleme kayıtlarında görünür."""
+    if 'logged_in' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if scheduler is None:
+        return jsonify({"error": "Zamanlayıcı kapalı."}), 404
+    if job_id not in SCHEDULED_JOBS:
+        return jsonify({"error": "Görev bulunamadı."}), 404
+    socketio.start_background_task(run_scheduled_job, job_id, True)
+    return jsonify({"job_id": job_id, "node": NODE_ID, "status": "started"}), 202
+
+@app.route('/links/probe', methods=['POST'])
+def trigger_probe():
+    """Canlılık denetimini beklemeden başlatır; sonuç 'liveness_updated' olayıyla duyurulur."""
+    if 'logged_in' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if link_prober is None:
+        return jsonify({"error": "Link denetimi kapalı."}), 404
+    socketio.start_background_task(probe_links)
+    return jsonify({"status": "started"}), 202
+
+@app.route('/playlist/<int:link_id>.m3u')
+def get_playlist(link_id):
+    """
+    Linkin kanal dizininden filtrelenmiş M3U listesi: ?group=TURKISH,SPORTS&tvg_id=...&q=ad.
+    Grup verilmezse SCHEDULER_TARGET_GROUP uygulanır; group=* tüm kanalları verir.
+    """
+    error = playlist_access(link_id)
+    if error:
+        return error
+    groups = split_args('group') or ([config['playlist']['default_group']] if config['playlist']['default_group'] else [])
+    if '*' in groups:
+        groups = []
+    tvg_ids = split_args('tvg_id')
+    search = request.args.get('q', '').strip() or None
+    link = db.session.get(GeneratedLink, link_id)
+    if link is None:
+        return link_not_found(link_id)
+    # Oynatıcılar listeyi sık sık yeniden ister; aynı filtre diskteki kopyadan (304/gzip/Range ile) sunulur.
+    key = json.dumps([sorted(set(groups)), sorted(set(tvg_ids)), search])
+    def render():
+        query = channel_index.query(link, groups=groups, tvg_ids=tvg_ids, search=search)
+        return playlist_cache.store(link_id, link.channels_indexed_at, key, channel_index.render(link, query))
+
+    entry = playlist_cache.get(link_id, link.channels_indexed_at, key) or render()
+    try:
+        return playlist_cache.respond(entry, f"playlist-{link_id}.m3u")
+    except FileNotFoundError:
+        # Dosya bulunduktan sonra eviction veya discard ile silindi; liste yeniden üretilir.
+        return playlist_cache.respond(render(), f"playlist-{link_id}.m3u")
+
+@app.route('/playlist/<int:link_id>/groups')
+def get_playlist_groups(link_id):
+    error = playlist_access(link_id)
+    if error:
+        return error
+    link = db.session.get(GeneratedLink, link_id)
+    if link is None:
+        return link_not_found(link_id)
+    return jsonify({"link_id": link_id, "default_group": config['playlist']['default_group'], "groups": channel_index.groups(link)})
+
+@app.route('/runs/<int:run_id>/log')
+def get_run_log(run_id):
+    if 'logged_in' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    run = db.session.get(BotRun, run_id)
+    if run is None:
+        return jsonify({"error": "Çalıştırma bulunamadı."}), 404
+    entries = run_log_entries(run, request.args.get('after', 0, type=int))
+    return jsonify({"run_id": run.id, "trigger": run.trigger, "status": run.status, "error": run.error, "link_id": run.link_id, "entries": entries})
+
 @app.route('/get_history')
 def get_history():
     if 'logged_in' not in session:
         return jsonify({"error": "Unauthorized"}), 401
-    links = GeneratedLink.query.order_by(desc(GeneratedLink.id)).limit(20).all()
-    return jsonify([link.to_dict() for link in links])
+    try:
+        params = parse_history_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # "Aktif/süresi dolmuş" ayrımı güne bağlı olduğu için bugünün tarihi de anahtara dahildir.
+    cache_key = json.dumps(params, sort_keys=True, default=str) + date.today().isoformat()
+    # Sürüm sorgudan önce okunur; sorgu sırasında sürüm değişirse yanıt eski sürümün altında saklanır.
+    version = history_cache.version()
+    etag = history_cache.etag(cache_key, version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = history_cache.get(cache_key, version)
+        if body is None:
+            body = json.dumps(query_history(**params))
+            history_cache.put(cache_key, version, body)
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+HISTORY_STATUSES = ('all', 'active', 'expired')
+
+def parse_history_args(args):
+    """?limit=&before=&status=&from=&to= parametrelerini doğrular."""
+    try:
+        limit = min(max(int(args.get('limit', 20)), 1), 100)
+        before = int(args['before']) if args.get('before') else None
+        created_from = date.fromisoformat(args['from']) if args.get('from') else None
+        created_to = date.fromisoformat(args['to']) if args.get('to') else None
+    except ValueError:
+        raise ValueError("Geçersiz sayfalama veya tarih parametresi.")
+    status = args.get('status', 'all')
+    if status not in HISTORY_STATUSES:
+        raise ValueError(f"Geçersiz durum filtresi: {status}")
+    return {"limit": limit, "before": before, "status": status, "created_from": created_from, "created_to": created_to}
+
+def query_history(limit, before, status, created_from, created_to):
+    """id üzerinde keyset sayfalama: OFFSET kullanılmaz, her sayfa birincil anahtar indeksinden okunur."""
+    query = GeneratedLink.query.filter(GeneratedLink.reserved.is_(False))
+    if before:
+        query = query.filter(GeneratedLink.id < before)
+    today = date.today()
+    if status == 'active':
+        query = query.filter(GeneratedLink.valid_on(today))
+    elif status == 'expired':
+        query = query.filter(~GeneratedLink.valid_on(today))
+    if created_from:
+        query = query.filter(GeneratedLink.created_at >= datetime.combine(created_from, datetime.min.time()))
+    if created_to:
+        query = query.filter(GeneratedLink.created_at < datetime.combine(created_to + timedelta(days=1), datetime.min.time()))
+    links = query.order_by(desc(GeneratedLink.id)).limit(limit + 1).all()
+    has_more = len(links) > limit
+    links = links[:limit]
+    return {"items": [link.to_dict() for link in links], "next_cursor": links[-1].id if has_more else None}
 
 # --- SocketIO Olayları ---
 @socketio.on('start_process')
 def handle_start_process(data):
     sid = request.sid
-    def background_task_wrapper(sid):
-        with app.app_context():
-            result = process_bot_run(sid)
-        if "error" in result: socketio.emit('process_error', {'error': result['error']}, to=sid)
-        else: socketio.emit('process_complete', {'new_link': result['new_link']}, to=sid)
-    socketio.start_background_task(background_task_wrapper, sid)
+    engine = (data or {}).get('engine')
+    if config['inventory']['target'] > 0 and not engine:
+        link = claim_stocked_link()
+        if link:
+            socketio.emit('status_update', {'message': '-> Hazır stoktan link verildi.', 'level': 'info'}, to=sid)
+            socketio.emit('process_complete', {'new_link': link.to_dict()}, to=sid)
+            socketio.start_background_task(replenish_stock)
+            return
+        socketio.emit('status_update', {'message': '-> Stokta hazır link yok, canlı üretim başlatılıyor...', 'level': 'warning'}, to=sid)
+    try:
+        run_scheduler.submit('generate', generate_link_job(engine), sid=sid)
+    except QueueFullError as e:
+        socketio.emit('process_error', {'error': str(e)}, to=sid)
+    except Exception as e:
+        # Ör. çalıştırma kaydı (create_run) yazılamadı; istemci yanıtsız beklemesin.
+        print(f"Çalıştırma başlatılamadı: {e}")
+        socketio.emit('process_error', {'error': f"Çalıştırma başlatılamadı: {type(e).__name__}"}, to=sid)
 
-# --- Uygulama Başlatma ---
-with app.app_context():
-    load_config()
+@socketio.on('join_run')
+def handle_join_run(data):
+    """Geç bağlanan veya yeniden bağlanan istemciye `after` sıra numarasından sonraki satırları tekrar oynatır."""
+    if 'logged_in' not in session:
+        return
+    sid = request.sid
+    try:
+        run_id = int(data['run_id'])
+        after = int(data.get('after') or 0)
+    except (KeyError, TypeError, ValueError):
+        return
+    run = db.session.get(BotRun, run_id)
+    if run is None:
+        return
+    if run.status in ('queued', 'running'):
+        socketio.server.enter_room(sid, f"run-{run.id}", namespace='/')
+    entries = run_log_entries(run, after)
+    if entries:
+        socketio.emit('log_batch', {'run_id': run.id, 'entries': entries}, to=sid)
+    if run.status == 'success':
+        link = db.session.get(GeneratedLink, run.link_id) if run.link_id else None
+        socketio.emit('process_complete', {'new_link': link.to_dict() if link else None}, to=sid)
+    elif run.status == 'error':
+        socketio.emit('process_error', {'error': run.error or 'Bilinmeyen hata.'}, to=sid)
+
+# --- Çalıştırma Kuyruğu ---
+def init_run_scheduler():
+    global run_scheduler, run_logs
+    runs_config = config.get('runs', {})
+    run_logs = RunLogHub(socketio, flush_interval=runs_config.get('log_flush_ms', 250) / 1000, capacity=runs_config.get('log_capacity', 500))
+    run_scheduler = RunScheduler(socketio, max_concurrent=runs_config.get('max_concurrent', 1), max_queue=runs_config.get('max_queue', 10), on_complete=emit_run_result, id_factory=create_run)
+    socketio.start_background_task(run_logs.flush_loop)
+
+# --- Tarayıcı Denetimi ---
+def init_browser_watchdog():
+    global browser_watchdog
+    watchdog_config = config.get('watchdog', {})
+    if not watchdog_config.get('enabled'):
+        return
+    browser_watchdog = BrowserWatchdog(max_run_seconds=watchdog_config['max_run_seconds'], max_rss_mb=watchdog_config['max_rss_mb'], reap_interval=watchdog_config['reap_interval'])
+    # İlk tur hemen çalışır: önceki (çökmüş) işçiden kalan Chrome süreçleri açılışta temizlenir.
+    browser_watchdog.start()
+
+# --- Tarayıcı Havuzu ---
+def init_driver_pool():
+    pool_config = config.get('driver_pool', {})
+    if not pool_config.get('enabled'):
+        return
+    # Tarayıcıların açılması (ve Selenium'un yüklenmesi) istek karşılamayı geciktirmesin diye havuz arka planda kurulur.
+    # Havuz hazır olana kadar gelen çalıştırmalar tek seferlik bir tarayıcı açar.
+    socketio.start_background_task(start_driver_pool, pool_config)
+
+def start_driver_pool(pool_config):
+    global driver_pool
+    from driver_pool import DriverPool
+    from gold_club_bot import DEFAULT_BASE_URL, build_browser_profile
+    # Çalıştırmalar arasında silinen köken, botun gerçekten kullandığı adresten (GCB_BASE_URL) türetilir.
+    base = urlsplit(config['bot']['base_url'] or DEFAULT_BASE_URL)
+    pool = DriverPool(size=pool_config['size'], max_uses=pool_config['max_uses'], max_rss_mb=pool_config['max_rss_mb'], wipe_origins=[f"{base.scheme}://{base.netloc}"], profile=build_browser_profile(**config['browser']), watchdog=browser_watchdog)
+    atexit.register(pool.shutdown)
+    driver_pool = pool
+    pool.start()
+
+# --- E-posta Kuyruğu ---
+def init_mail_sender():
+    global mail_sender
+    notif_config = config.get('notification', {})
+    if not notif_config.get('enabled') or not notif_config.get('sender_email'):
+        return
+    mail_sender = MailSender(app, db, OutboundEmail, notif_config, socketio, max_attempts=notif_config['max_attempts'], digest_window=notif_config['digest_seconds'], digest_max=notif_config['digest_max'])
+    socketio.start_background_task(mail_sender.run)
+
+# --- Link Canlılık Denetimi ---
+def init_link_prober():
+    prober_config = config.get('prober', {})
+    if not prober_config.get('enabled'):
+        return
+    socketio.start_background_task(start_link_prober, prober_config)
+
+def start_link_prober(prober_config):
+    global link_prober
+    # İlk turdan önce açılışın tamamlanması ve lider seçiminin sonuçlanması beklenir.
+    socketio.sleep(5)
+    from link_prober import LinkProber
+    link_prober = LinkProber(concurrency=prober_config['concurrency'], per_host=prober_config['per_host'], host_rate=prober_config['host_rate'], timeout=prober_config['timeout'])
+    liveness_loop()
+
+# --- M3U Kanal Dizini ---
+def init_channel_index():
+    global channel_index, playlist_cache
+    playlist_config = config.get('playlist', {})
+    if not playlist_config.get('enabled'):
+        return
+    from m3u_playlist import ChannelIndex
+    from playlist_cache import PlaylistCache
+    channel_index = ChannelIndex(app, db, GeneratedLink, PlaylistChannel, fetch_timeout=playlist_config['fetch_timeout'])
+    playlist_cache = PlaylistCache(playlist_config['cache_dir'], playlist_config['cache_max_mb'] * 1024 * 1024)
+
+# --- Oturum Saklama ---
+def init_session_store():
+    global session_store
+    if not config.get('session_reuse'):
+        return
+    secret = os.environ.get('SESSION_ENCRYPTION_KEY') or app.config['SECRET_KEY']
+    session_store = SessionStore(app, db, BotSession, account=config['email'], secret=secret)
+
+# --- Şema Güncelleme ---
+EXPIRY_FORMATS = ("%A, %B %d, %Y", "%d.%m.%Y")
+
+def parse_expiry_date(value):
+    """Sitenin ("Weekday, Month Day, Year") ya da eski kayıtların ("dd.mm.YYYY") tarih metnini date'e çevirir."""
+    for fmt in EXPIRY_FORMATS:
+        try:
+            return datetime.strptime((value or '').strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def backfill_expiry_dates(conn):
+    """expires_on boş olan kayıtları metin sütunundan doldurur. Çevrilemeyenler NULL kalır ve silinmez."""
+    rows = conn.execute(text("SELECT id, expiry_date FROM generated_link WHERE expires_on IS NULL")).all()
+    updates = [{"id": row.id, "expires_on": parse_expiry_date(row.expiry_date)} for row in rows]
+    parsed = [update for update in updates if update["expires_on"]]
+    unparsed = [row for row, update in zip(rows, updates) if not update["expires_on"]]
+    if parsed:
+        conn.execute(text("UPDATE generated_link SET expires_on = :expires_on WHERE id = :id"), parsed)
+        print(f"Şema güncellendi: {len(parsed)} kaydın son kullanma tarihi dolduruldu.")
+    if unparsed:
+        print(f"UYARI: {len(unparsed)} kaydın tarihi anlaşılamadı, otomatik temizlikten muaf tutulacak: " + ", ".join(f"#{row.id} ({row.expiry_date!r})" for row in unparsed[:20]))
+
+def upgrade_schema():
+    """db.create_all() mevcut tablolara sütun eklemez; sonradan eklenen sütunlar burada yerinde eklenir."""
+    columns = {column['name'] for column in inspect(db.engine).get_columns('generated_link')}
+    with db.engine.begin() as conn:
+        if 'reserved' not in columns:
+            conn.execute(text("ALTER TABLE generated_link ADD COLUMN reserved BOOLEAN NOT NULL DEFAULT FALSE"))
+            print("Şema güncellendi: generated_link.reserved eklendi.")
+        if 'expires_on' not in columns:
+            conn.execute(text("ALTER TABLE generated_link ADD COLUMN expires_on DATE"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_generated_link_expires_on ON generated_link (expires_on)"))
+            print("Şema güncellendi: generated_link.expires_on eklendi.")
+        for column, column_type in (('probe_status', 'VARCHAR(16)'), ('probe_http_status', 'INTEGER'), ('probe_latency_ms', 'INTEGER'), ('probe_checked_at', 'TIMESTAMP'),
+                                    ('channel_count', 'INTEGER'), ('channels_indexed_at', 'TIMESTAMP'), ('indexing_owner', 'VARCHAR(32)'), ('indexing_claimed_at', 'TIMESTAMP')):
+            if column not in columns:
+                conn.execute(text(f"ALTER TABLE generated_link ADD COLUMN {column} {column_type}"))
+                print(f"Şema güncellendi: generated_link.{column} eklendi.")
+        if 'channel_source_id' not in columns:
+            conn.execute(text("ALTER TABLE generated_link ADD COLUMN channel_source_id INTEGER"))
+            # Önceden dizinlenmiş linkler kendi kanal satırlarının sahibidir.
+            conn.execute(text("UPDATE generated_link SET channel_source_id = id WHERE channels_indexed_at IS NOT NULL"))
+            print("Şema güncellendi: generated_link.channel_source_id eklendi.")
+        if 'fingerprint' not in {column['name'] for column in inspect(conn).get_columns('playlist_channel')}:
+            conn.execute(text("ALTER TABLE playlist_channel ADD COLUMN fingerprint VARCHAR(16)"))
+            print("Şema güncellendi: playlist_channel.fingerprint eklendi.")
+        backfill_expiry_dates(conn)
+
+def init_db():
     db.create_all()
-    
+    upgrade_schema()
+    history_cache.ensure()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # Sayaç satırını aynı anda başka bir işçi oluşturdu.
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Tabloları oluşturur ve şemayı günceller (dağıtım öncesi bir kez çalıştırılır)."""
+    init_db()
+    print("Veritabanı şeması hazır.")
+
+# --- Uygulama Başlatma ---
+def create_app():
+    """
+    Yapılandırmayı yükler ve arka plan servislerini başlatır; gunicorn 'app:create_app()' ile çağırır.
+    Modülün içe aktarılması artık hiçbir yan etki üretmez (CLI komutları ve /healthz için).
+    """
+    if config:
+        return app
+    with app.app_context():
+        load_config()
+        if config['db_auto_migrate']:
+            init_db()
+        init_browser_watchdog()
+        init_driver_pool()
+        init_session_store()
+        init_run_scheduler()
+        init_mail_sender()
+        init_link_prober()
+        init_channel_index()
+        if config['inventory']['target'] > 0:
+            socketio.start_background_task(inventory_loop)
+        init_scheduler()
+    return app
+
+def init_scheduler():
+    """
+    Görevler veritabanındaki ortak iş deposunda tutulur ve her düğümde zamanlayıcı duraklatılmış
+    başlar; yalnızca lider kirasını tutan düğüm zamanlayıcısını çalıştırır. Böylece birden fazla
+    işçi veya örnek olsa da her görev tek bir düğümde tetiklenir.
+    """
+    global scheduler, scheduler_lease
     scheduler_config = config.get('scheduler', {})
-    if scheduler_config.get('enabled'):
-        scheduler.init_app(app)
-        scheduler.start()
-        if not scheduler.get_job('scheduled_bot_task'):
-            scheduler.add_job(id='scheduled_bot_task', func=scheduled_task, trigger='cron', hour=scheduler_config.get('hour', 4), minute=scheduler_config.get('minute', 0))
-            print(f"Zamanlanmış link üretme görevi kuruldu: Her gün saat {scheduler_config.get('hour', 4):02d}:{scheduler_config.get('minute', 0):02d}")
-        
-        if not scheduler.get_job('cleanup_task'):
-            cleanup_hour = (scheduler_config.get('hour', 4) + 1) % 24 
-            scheduler.add_job(id='cleanup_task', func=cleanup_expired_links, trigger='cron', hour=cleanup_hour, minute=scheduler_config.get('minute', 0))
-            print(f"Zamanlanmış veritabanı temizlik görevi kuruldu: Her gün saat {cleanup_hour:02d}:{scheduler_config.get('minute', 0):02d}")
+    if not scheduler_config.get('enabled'):
+        return
+    from flask_apscheduler import APScheduler
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    app.config['SCHEDULER_JOBSTORES'] = {'default': SQLAlchemyJobStore(engine=db.engine, tablename='apscheduler_jobs')}
+    # Kapalıyken kaçırılan tetiklemeler misfire_grace süresi içindeyse açılışta bir kez (birleştirilerek) çalıştırılır.
+    app.config['SCHEDULER_JOB_DEFAULTS'] = {'coalesce': True, 'max_instances': 1, 'misfire_grace_time': scheduler_config['misfire_grace']}
+    scheduler = APScheduler()
+    scheduler.init_app(app)
+    scheduler.start(paused=True)
+    hour, minute = scheduler_config.get('hour', 4), scheduler_config.get('minute', 0)
+    ensure_job('scheduled_bot_task', hour, minute)
+    print(f"Zamanlanmış link üretme görevi kuruldu: Her gün saat {hour:02d}:{minute:02d}")
+    cleanup_hour = (hour + 1) % 24
+    ensure_job('cleanup_task', cleanup_hour, minute)
+    print(f"Zamanlanmış veritabanı temizlik görevi kuruldu: Her gün saat {cleanup_hour:02d}:{minute:02d}")
+    scheduler_lease = LeaderLease(app, db, SchedulerLease, 'scheduler', NODE_ID, socketio, ttl=scheduler_config['lease_ttl'], on_elected=scheduler.resume, on_demoted=scheduler.pause)
+    atexit.register(scheduler_lease.release)
+    socketio.start_background_task(scheduler_lease.run)
+
+def ensure_job(job_id, hour, minute):
+    """
+    Görevi ortak depoya ekler. Görev zaten varsa yalnızca saati değiştiğinde yeniden planlanır;
+    aksi halde kayıtlı next_run_time korunur ve kapalıyken kaçırılan çalıştırma kaybolmaz.
+    """
+    from apscheduler.jobstores.base import ConflictingIdError
+    from apscheduler.triggers.cron import CronTrigger
+    trigger = CronTrigger(hour=hour, minute=minute)
+    job = scheduler.get_job(job_id)
+    if job is None:
+        try:
+            scheduler.add_job(id=job_id, func=run_scheduled_job, args=[job_id], trigger=trigger)
+        except ConflictingIdError:
+            pass  # Başka bir düğüm aynı anda ekledi.
+    elif str(job.trigger) != str(trigger):
+        scheduler.scheduler.reschedule_job(job_id, trigger=trigger)
+
+if __name__ == '__main__':
+    socketio.run(create_app(), host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,81 @@
+# benchmarks/browser_profile.py (Yalın ve tam tarayıcı profillerinin sayfa yükleme süresi ve bellek karşılaştırması)
+#
+# Kullanım:
+#   python benchmarks/browser_profile.py                      # iki profili de yerel WHMCS taklidinde ölçer
+#   python benchmarks/browser_profile.py --profile lean --runs 5 --json
+#   python benchmarks/browser_profile.py --real-site          # goldclubhosting.xyz sayfalarını yükler
+#
+# Varsayılan olarak fake_whmcs bu süreçte başlatılır; gerçek siteye yalnızca --real-site ile gidilir.
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gold_club_bot import DEFAULT_BASE_URL, apply_request_blocklist, build_browser_profile, build_chrome_options, resolve_driver_path
+from e2e import RssSampler
+from fake_whmcs import FakeWhmcs
+
+
+def default_urls(base_url):
+    return [base_url, f"{base_url}index.php?rp=/login", f"{base_url}index.php?rp=/store/free-trial", f"{base_url}cart.php"]
+
+
+def measure(profile, urls, runs):
+    driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=build_chrome_options(profile=profile))
+    sampler = RssSampler(driver.service.process.pid)
+    sampler.start()
+    loads = {url: [] for url in urls}
+    try:
+        apply_request_blocklist(driver, profile)
+        for _ in range(runs):
+            # Her turda soğuk önbellekle ölçülür; canlı çalıştırmalarda da havuz önbelleği temizler.
+            driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            for url in urls:
+                started = time.perf_counter()
+                driver.get(url)
+                loads[url].append(time.perf_counter() - started)
+    finally:
+        sampler.stop()
+        driver.quit()
+    medians = {url: round(statistics.median(seconds), 3) for url, seconds in loads.items()}
+    return {'page_load_seconds': medians, 'total_seconds': round(sum(medians.values()), 3), 'peak_rss_mb': round(sampler.peak / (1024 * 1024), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yalın tarayıcı profilini mevcut profille karşılaştırır.")
+    parser.add_argument('--profile', choices=('lean', 'default', 'both'), default='both')
+    parser.add_argument('--runs', type=int, default=3, help="Her sayfanın kaç kez yükleneceği (medyan raporlanır)")
+    parser.add_argument('--url', action='append', dest='urls', help="Ölçülecek sayfa (birden fazla verilebilir)")
+    parser.add_argument('--json', action='store_true', help="Sonucu JSON olarak yazdır")
+    parser.add_argument('--real-site', action='store_true', help=f"Yerel taklit yerine gerçek siteyi ({DEFAULT_BASE_URL}) yükle")
+    args = parser.parse_args()
+
+    site = None if args.real_site else FakeWhmcs().start()
+    urls = args.urls or default_urls(DEFAULT_BASE_URL if site is None else site.base_url)
+    names = ('default', 'lean') if args.profile == 'both' else (args.profile,)
+    try:
+        results = {name: measure(build_browser_profile(lean=name == 'lean'), urls, args.runs) for name in names}
+    finally:
+        if site is not None:
+            site.stop()
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f"[{name}] toplam yükleme: {result['total_seconds']:.2f} sn · en yüksek RSS: {result['peak_rss_mb']:.0f} MB")
+        for url, seconds in result['page_load_seconds'].items():
+            print(f"    {seconds:6.2f} sn  {url}")
+    if len(results) == 2:
+        default, lean = results['default'], results['lean']
+        print(f"Yalın profil: süre {lean['total_seconds'] / default['total_seconds']:.0%}, bellek {lean['peak_rss_mb'] / default['peak_rss_mb']:.0%} (tam profile göre)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,450 @@
+# benchmarks/e2e.py (Uçtan uca kıyaslama: bot çalıştırma süresi ve belleği, Socket.IO verimi, geçmiş ve temizlik maliyeti)
+#
+# Kullanım:
+#   python benchmarks/e2e.py                                         # tüm ölçümler, JSON stdout'a
+#   python benchmarks/e2e.py bot --engine http --runs 20 --latency 0.05 --failure-rate 0.1
+#   python benchmarks/e2e.py socketio --clients 20 --rounds 5
+#   python benchmarks/e2e.py history --rows 10000,100000,1000000 --output sonuclar.json
+#   python benchmarks/e2e.py prober --links 500 --dead-ratio 0.2 --latency 0.05
+#   python benchmarks/e2e.py playlist --channels 100000
+#
+# Gerçek siteye bağlanılmaz: bot, alt süreç olarak başlatılan fake_whmcs sunucusuna yönlendirilir.
+# Her ölçüm grubu ayrı bir Python sürecinde çalışır; uygulamayı kullanan gruplar gunicorn'daki gibi
+# eventlet ile yamalanır. Sonuçlar zaman içinde karşılaştırılabilsin diye JSON olarak yazılır.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_whmcs.py')
+SUITES = ('bot', 'socketio', 'history', 'prober', 'playlist')
+BENCH_EMAIL = 'bench@example.com'
+BENCH_PASSWORD = 'bench'
+# Alt süreç uygulama loglarını da stdout'a yazdığı için sonuç satırı bu önekle ayırt edilir.
+RESULT_PREFIX = 'BENCH_RESULT '
+
+
+class RssSampler(threading.Thread):
+    """Bu süreç ve alt süreçlerinin (Selenium motorunda chromedriver ve Chrome) toplam RSS değerinin en yükseğini tutar."""
+
+    def __init__(self, pid, interval=0.02):
+        super().__init__(daemon=True)
+        self.root = psutil.Process(pid)
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            total = 0
+            try:
+                for proc in [self.root] + self.root.children(recursive=True):
+                    try:
+                        total += proc.memory_info().rss
+                    except psutil.Error:
+                        pass
+            except psutil.Error:
+                break  # Kök süreç (ör. chromedriver) kapandı.
+            self.peak = max(self.peak, total)
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+def summarize(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        'median': round(statistics.median(ordered), 4),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        'min': round(ordered[0], 4),
+        'max': round(ordered[-1], 4),
+    }
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+# --- Bot: run_full_process süresi ve en yüksek bellek ---
+def bench_bot(args):
+    import tracemalloc
+    from gold_club_bot import GoldClubBot, build_browser_profile
+    from http_engine import GoldClubHttpBot
+
+    options = {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD, 'base_url': os.environ['GCB_BASE_URL'], 'run_timeout': args.timeout}
+    if args.engine == 'http':
+        make_bot = lambda: GoldClubHttpBot(**options)
+    else:
+        make_bot = lambda: GoldClubBot(browser_profile=build_browser_profile(), **options)
+
+    baseline = psutil.Process().memory_info().rss
+    latencies, peaks, phases, errors = [], [], {}, []
+    for _ in range(args.runs):
+        sampler = RssSampler(os.getpid())
+        sampler.start()
+        started = time.perf_counter()
+        result = make_bot().run_full_process()
+        latencies.append(time.perf_counter() - started)
+        peaks.append(sampler.stop() / (1024 * 1024))
+        if 'error' in result:
+            errors.append(result['error'])
+        for phase, seconds in ((result.get('timings') or {}).get('phases') or {}).items():
+            phases.setdefault(phase, []).append(seconds)
+
+    # Python yığınının en yüksek değeri ayrı bir çalıştırmada ölçülür; tracemalloc süre ölçümlerini yavaşlatır.
+    tracemalloc.start()
+    make_bot().run_full_process()
+    heap_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'engine': args.engine,
+        'runs': args.runs,
+        'failures': len(errors),
+        'errors': sorted(set(errors))[:5],
+        'latency_seconds': summarize(latencies),
+        'phase_seconds': {phase: summarize(values) for phase, values in phases.items()},
+        'baseline_rss_mb': round(baseline / (1024 * 1024), 1),
+        'peak_rss_mb': summarize(peaks),
+        'python_heap_peak_mb': round(heap_peak / (1024 * 1024), 2),
+    }
+
+
+# --- Socket.IO: eşzamanlı start_process olaylarının verimi ---
+def load_app():
+    import eventlet
+    eventlet.monkey_patch()
+    import app as application
+    application.create_app()
+    return application
+
+
+def bench_socketio(args):
+    application = load_app()
+    socketio = application.socketio
+    clients = [socketio.test_client(application.app) for _ in range(args.clients)]
+    rounds = []
+    for _ in range(args.rounds):
+        for client in clients:
+            client.get_received()
+        started = time.perf_counter()
+        for client in clients:
+            client.emit('start_process', {'engine': args.engine})
+        pending = set(range(len(clients)))
+        latencies, run_ids, outcomes = [], set(), {'process_complete': 0, 'process_error': 0}
+        while pending and time.perf_counter() - started < args.timeout:
+            socketio.sleep(0.01)
+            for index in list(pending):
+                for message in clients[index].get_received():
+                    if message['name'] == 'queue_position':
+                        run_ids.add(message['args'][0]['run_id'])
+                    elif message['name'] in outcomes:
+                        outcomes[message['name']] += 1
+                        latencies.append(time.perf_counter() - started)
+                        pending.discard(index)
+        elapsed = time.perf_counter() - started
+        rounds.append({
+            'seconds': round(elapsed, 4),
+            'events': len(clients),
+            'completed': outcomes['process_complete'],
+            'errors': outcomes['process_error'],
+            'timed_out': len(pending),
+            'runs': len(run_ids),
+            'events_per_second': round((len(clients) - len(pending)) / elapsed, 2),
+            'latency_seconds': summarize(latencies),
+        })
+    for client in clients:
+        client.disconnect()
+    return {
+        'engine': args.engine,
+        'clients': args.clients,
+        'rounds': rounds,
+        'events_per_second': summarize([entry['events_per_second'] for entry in rounds]),
+        # Aynı anahtarlı istekler tek bir çalıştırmaya bağlandığı için runs genelde olay sayısından azdır.
+        'runs_per_round': summarize([entry['runs'] for entry in rounds]),
+    }
+
+
+# --- Geçmiş: /get_history ve temizlik maliyeti ---
+def seed_links(application, rows, expired_ratio, chunk=10000):
+    db, GeneratedLink = application.db, application.GeneratedLink
+    GeneratedLink.query.delete()
+    db.session.commit()
+    today = date.today()
+    now = datetime.utcnow()
+    expired_every = round(expired_ratio * 100)
+    started = time.perf_counter()
+    for offset in range(0, rows, chunk):
+        batch = []
+        for i in range(offset, min(rows, offset + chunk)):
+            created = now - timedelta(minutes=(rows - i) * 30 * 24 * 60 // rows)
+            expires_on = today - timedelta(days=1) if i % 100 < expired_every else today + timedelta(days=1)
+            batch.append({'m3u_url': f'http://127.0.0.1/get.php?username=bench{i}&password=x&type=m3u_plus', 'expiry_date': expires_on.isoformat(),
+                          'expires_on': expires_on, 'created_at': created, 'reserved': False})
+        db.session.execute(GeneratedLink.__table__.insert(), batch)
+    application.history_cache.invalidate()
+    db.session.commit()
+    return time.perf_counter() - started
+
+
+def bench_history(args):
+    application = load_app()
+    db, GeneratedLink, cache = application.db, application.GeneratedLink, application.history_cache
+    client = application.app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['logged_in'] = True
+
+    def fetch(url, expected=200, **kwargs):
+        response = client.get(url, **kwargs)
+        assert response.status_code == expected, (url, response.status_code)
+        return response
+
+    def cold(url):
+        cache.clear()
+        fetch(url)
+
+    results = []
+    for rows in args.rows:
+        with application.app.app_context():
+            seed_seconds = seed_links(application, rows, args.expired_ratio)
+            first_id, last_id = db.session.query(db.func.min(GeneratedLink.id), db.func.max(GeneratedLink.id)).one()
+        today = date.today()
+        queries = {
+            'first_page': '/get_history',
+            'deep_page': f'/get_history?before={(first_id + last_id) // 2}',
+            'active': '/get_history?status=active',
+            'expired': '/get_history?status=expired',
+            'last_week': f'/get_history?from={(today - timedelta(days=7)).isoformat()}&to={today.isoformat()}',
+        }
+        history = {}
+        for name, url in queries.items():
+            cold_seconds = timed(lambda: cold(url), args.repeat)
+            etag = fetch(url).headers['ETag']
+            history[name] = {
+                'cold_seconds': cold_seconds,
+                'cached_seconds': timed(lambda: fetch(url), args.repeat),
+                'not_modified_seconds': timed(lambda: fetch(url, 304, headers={'If-None-Match': etag}), args.repeat),
+            }
+        started = time.perf_counter()
+        application.cleanup_expired_links()
+        cleanup_seconds = time.perf_counter() - started
+        with application.app.app_context():
+            remaining = GeneratedLink.query.count()
+        results.append({
+            'rows': rows,
+            'seed_seconds': round(seed_seconds, 3),
+            'get_history': history,
+            'cleanup_seconds': round(cleanup_seconds, 4),
+            'cleanup_deleted': rows - remaining,
+        })
+    return {'expired_ratio': args.expired_ratio, 'sizes': results}
+
+
+# --- Canlılık Denetimi: tek turda yüzlerce link ---
+def bench_prober(args):
+    from link_prober import LinkProber
+    application = load_app()
+    db, GeneratedLink = application.db, application.GeneratedLink
+    prober_config = application.config['prober']
+    # Uygulamadaki periyodik tur kapalıdır (bkz. bench_env); ölçülen turu burada kurulan denetleyici yapar.
+    application.link_prober = LinkProber(concurrency=prober_config['concurrency'], per_host=prober_config['per_host'], host_rate=prober_config['host_rate'], timeout=prober_config['timeout'])
+    base_url = os.environ['GCB_BASE_URL']
+    dead_every = round(args.dead_ratio * 100)
+    expires_on = date.today() + timedelta(days=1)
+    with application.app.app_context():
+        GeneratedLink.query.delete()
+        username = lambda i: f'gone{i}' if i % 100 < dead_every else f'bench{i}'
+        db.session.execute(GeneratedLink.__table__.insert(), [
+            {'m3u_url': f'{base_url}get.php?username={username(i)}&password=bench{i}&type=m3u_plus', 'expiry_date': expires_on.isoformat(), 'expires_on': expires_on, 'reserved': False}
+            for i in range(args.links)])
+        db.session.commit()
+
+    sweeps = []
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        summary = application.probe_links()
+        elapsed = time.perf_counter() - started
+        sweeps.append({'seconds': round(elapsed, 4), 'links_per_second': round(summary['links'] / elapsed, 1), **summary})
+    with application.app.app_context():
+        latencies = [row[0] for row in db.session.query(GeneratedLink.probe_latency_ms).filter(GeneratedLink.probe_latency_ms.isnot(None))]
+    return {
+        'links': args.links,
+        'dead_ratio': args.dead_ratio,
+        'limits': {key: prober_config[key] for key in ('concurrency', 'per_host', 'host_rate', 'timeout')},
+        'sweeps': sweeps,
+        'sweep_seconds': summarize([sweep['seconds'] for sweep in sweeps]),
+        'probe_latency_ms': summarize(latencies),
+    }
+
+
+# --- Kanal Dizini: liste başına tek ayrıştırma, istek başına filtreleme, diskteki önbellekten sunum ---
+def bench_playlist(args):
+    application = load_app()
+    db, GeneratedLink = application.db, application.GeneratedLink
+    with application.app.app_context():
+        links = [GeneratedLink(m3u_url=f"{os.environ['GCB_BASE_URL']}get.php?username=bench{i}&password=bench{i}&type=m3u_plus", expiry_raw='bench', expires_on=date.today() + timedelta(days=1)) for i in range(2)]
+        db.session.add_all(links)
+        db.session.commit()
+        link_id, next_link_id = (link.id for link in links)
+    client = application.app.test_client()
+    token = application.playlist_token(link_id)
+
+    sampler = RssSampler(os.getpid())
+    baseline = psutil.Process().memory_info().rss
+    sampler.start()
+    started = time.perf_counter()
+    channels = application.channel_index.ensure(link_id)
+    index_seconds = time.perf_counter() - started
+    peak = sampler.stop()
+
+    requests_ = {'default_group': '', 'all': '&group=*', 'two_groups': '&group=SPORTS,NEWS', 'search': '&group=*&q=Kanal 12', 'tvg_id': '&group=*&tvg_id=ch7.movies'}
+    served = {}
+    gzip_headers = {'Accept-Encoding': 'gzip'}
+    for name, suffix in requests_.items():
+        url = f'/playlist/{link_id}.m3u?token={token}{suffix}'
+        started = time.perf_counter()
+        body = client.get(url).get_data()
+        cold = time.perf_counter() - started
+        packed = client.get(url, headers=gzip_headers)
+        revalidate = {**gzip_headers, 'If-None-Match': packed.headers['ETag']}
+        served[name] = {
+            'bytes': len(body),
+            'gzip_bytes': len(packed.get_data()),
+            'cold_seconds': round(cold, 4),
+            'seconds': timed(lambda: client.get(url).get_data(), args.repeat),
+            'gzip_seconds': timed(lambda: client.get(url, headers=gzip_headers).get_data(), args.repeat),
+            'not_modified_seconds': timed(lambda: client.get(url, headers=revalidate).get_data(), args.repeat),
+        }
+
+    # Aynı listeyi veren yeni link: kanallar yeniden yazılmadan önceki linkten paylaşılır.
+    started = time.perf_counter()
+    application.channel_index.ensure(next_link_id)
+    delta_seconds = time.perf_counter() - started
+    return {
+        'channels': channels,
+        'index_seconds': round(index_seconds, 3),
+        'index_peak_rss_delta_mb': round((peak - baseline) / (1024 * 1024), 1),
+        'delta_index_seconds': round(delta_seconds, 3),
+        'serve': served,
+    }
+
+
+CHILDREN = {'bot': bench_bot, 'socketio': bench_socketio, 'history': bench_history, 'prober': bench_prober, 'playlist': bench_playlist}
+
+
+# --- Yönetici Süreç ---
+@contextmanager
+def fake_server(args):
+    """fake_whmcs'i ayrı bir süreçte başlatır; sunucunun işlemcisi ölçülen süreci etkilemez."""
+    command = [sys.executable, FAKE_SERVER, '--email', BENCH_EMAIL, '--password', BENCH_PASSWORD,
+               '--latency', str(args.latency), '--failure-rate', str(args.failure_rate), '--accounts', str(args.links), '--channels', str(args.channels)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        yield server.stdout.readline().strip()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_child(suite, env):
+    command = [sys.executable, '-W', 'ignore', os.path.abspath(__file__), *sys.argv[1:], '--child', suite]
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    tail = (completed.stderr or completed.stdout).strip().splitlines()[-1:] or ['çıktı yok']
+    return {'error': f"Ölçüm süreci başarısız oldu (çıkış kodu {completed.returncode}): {tail[0]}"}
+
+
+def bench_env(workdir, base_url, args):
+    env = dict(os.environ)
+    env.update({'APP_PASSWORD': 'bench', 'GCB_EMAIL': BENCH_EMAIL, 'GCB_PASSWORD': BENCH_PASSWORD, 'GCB_BASE_URL': base_url})
+    env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # Arka plan servisleri kapatılır; yedek motor da kapalıdır ki başarısızlıklar gizlenmeden ölçülsün.
+    for key, value in (('DRIVER_POOL_ENABLED', 'false'), ('INVENTORY_TARGET', '0'), ('SCHEDULER_ENABLED', 'false'),
+                       ('NOTIF_ENABLED', 'false'), ('SESSION_REUSE_ENABLED', 'false'), ('BOT_ENGINE_FALLBACK', 'false'), ('LINK_PROBE_ENABLED', 'false'),
+                       ('SCHEDULER_TARGET_GROUP', 'TURKISH'), ('PLAYLIST_CACHE_DIR', os.path.join(workdir, 'playlist_cache'))):
+        env.setdefault(key, value)
+    return env
+
+
+def parse_rows(value):
+    return [int(size) for size in value.split(',') if size.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Botu ve uygulamayı yerel WHMCS taklidine karşı uçtan uca ölçer.")
+    parser.add_argument('suites', nargs='*', help=f"Çalıştırılacak ölçüm grupları: {', '.join(SUITES)} (varsayılan: hepsi)")
+    parser.add_argument('--engine', choices=('http', 'selenium'), default='http')
+    parser.add_argument('--runs', type=int, default=10, help="bot: run_full_process tekrar sayısı")
+    parser.add_argument('--clients', type=int, default=10, help="socketio: aynı anda start_process gönderen istemci sayısı")
+    parser.add_argument('--rounds', type=int, default=3, help="socketio, prober: tur sayısı")
+    parser.add_argument('--rows', type=parse_rows, default=[10000, 100000, 1000000], help="history: virgülle ayrılmış GeneratedLink satır sayıları")
+    parser.add_argument('--expired-ratio', type=float, default=0.5, help="history: süresi dolmuş satırların oranı")
+    parser.add_argument('--repeat', type=int, default=20, help="history, playlist: her isteğin tekrar sayısı")
+    parser.add_argument('--links', type=int, default=500, help="prober: tek turda denetlenecek link sayısı")
+    parser.add_argument('--dead-ratio', type=float, default=0.2, help="prober: ölü linklerin oranı")
+    parser.add_argument('--channels', type=int, default=50000, help="playlist: sahte M3U listesindeki kanal sayısı")
+    parser.add_argument('--latency', type=float, default=0.0, help="Sahte sunucunun her isteğe eklediği gecikme (saniye)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Sahte sunucunun 503 döndüreceği isteklerin oranı")
+    parser.add_argument('--timeout', type=int, default=120, help="Tek bir çalıştırma için üst süre (saniye)")
+    parser.add_argument('--database-url', help="Varsayılan geçici SQLite yerine kullanılacak boş bir test veritabanı (tablo içerikleri silinir!)")
+    parser.add_argument('--output', help="JSON sonucun yazılacağı dosya (varsayılan: stdout)")
+    parser.add_argument('--child', choices=SUITES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Bilinmeyen ölçüm grubu: {', '.join(sorted(unknown))}")
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(RESULT_PREFIX + json.dumps(CHILDREN[args.child](args)), flush=True)
+        # Uygulamanın arka plan görevleri sürecin kapanmasını beklemesin.
+        os._exit(0)
+
+    results = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'parameters': {key: value for key, value in vars(args).items() if key not in ('child', 'output', 'database_url')},
+        },
+    }
+    with tempfile.TemporaryDirectory() as workdir, fake_server(args) as base_url:
+        for suite in args.suites or SUITES:
+            # Her grup temiz bir veritabanıyla başlar.
+            results[suite] = run_child(suite, bench_env(tempfile.mkdtemp(dir=workdir), base_url, args))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
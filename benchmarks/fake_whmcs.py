@@ -0,0 +1,218 @@
+# benchmarks/fake_whmcs.py (goldclubhosting.xyz için yerel WHMCS taklidi)
+#
+# Kullanım:
+#   python benchmarks/fake_whmcs.py --port 8080 --latency 0.05 --failure-rate 0.1
+#
+# Botu bu sunucuya yönlendirmek için GCB_BASE_URL ortam değişkeni (veya GoldClubBot(base_url=...)) kullanılır.
+# Üretilen linkler bu sunucudaki /get.php'yi gösterir; geçerli hesaplar için M3U listesi (Range destekli),
+# bilinmeyen veya süresi dolmuş hesaplar için 401 döner.
+
+import argparse
+import random
+import re
+import secrets
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PAGE = "<!DOCTYPE html><html><head><title>{title}</title></head><body>{body}</body></html>"
+GROUPS = ('TURKISH', 'SPORTS', 'MOVIES', 'NEWS', 'KIDS')
+
+
+class FakeWhmcs:
+    """
+    Botun dayandığı kimlikleri ve akışı sunan yerel sunucu: giriş formu (CSRF token ile),
+    free-trial mağazası, sepet/ödeme, tamamlama sayfası ve m3u linkli ürün detayı.
+    `accounts` kadar hesap (benchN / benchN) baştan tanımlı gelir; her liste `channels` kanal içerir.
+    """
+
+    def __init__(self, email='bench@example.com', password='secret', latency=0.0, failure_rate=0.0, host='127.0.0.1', port=0, accounts=0, channels=200):
+        self.email = email
+        self.password = password
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.channels = channels
+        self.accounts = {f'bench{i}': f'bench{i}' for i in range(accounts)}
+        self.sessions = {}
+        self.orders = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def expire(self, username):
+        """Hesabı siler; linki artık 401 döner (erken ölen link benzetimi)."""
+        self.accounts.pop(username, None)
+
+    def playlist(self, username, password):
+        lines = ['#EXTM3U']
+        for i in range(self.channels):
+            group = GROUPS[i % len(GROUPS)]
+            lines.append(f'#EXTINF:-1 tvg-id="ch{i}.{group.lower()}" tvg-name="{group} Kanal {i}" tvg-logo="" group-title="{group}",{group} Kanal {i}')
+            lines.append(f'{self.base_url}live/{username}/{password}/{i}.ts')
+        return ('\n'.join(lines) + '\n').encode()
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _session(self):
+                cookie = SimpleCookie(self.headers.get('Cookie', ''))
+                sid = cookie['WHMCSsid'].value if 'WHMCSsid' in cookie else None
+                with site._lock:
+                    if sid not in site.sessions:
+                        sid = secrets.token_hex(8)
+                        site.sessions[sid] = {'token': secrets.token_hex(8), 'user': None, 'cart': False, 'service': None}
+                    return sid, site.sessions[sid]
+
+            def _send(self, status, body='', location=None, sid=None, content_type='text/html; charset=utf-8', headers=None):
+                self.send_response(status)
+                if location:
+                    self.send_header('Location', location)
+                if sid:
+                    self.send_header('Set-Cookie', f'WHMCSsid={sid}; Path=/; HttpOnly')
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                data = body if isinstance(body, bytes) else body.encode()
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _page(self, sid, title, body):
+                self._send(200, PAGE.format(title=title, body=body), sid=sid)
+
+            def _route(self, method):
+                if site.latency:
+                    time.sleep(site.latency)
+                if site.failure_rate and random.random() < site.failure_rate:
+                    return self._send(503, PAGE.format(title='Error', body='<h1>Service Unavailable</h1>'))
+                url = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path == '/get.php':
+                    return self._playlist(query)
+                form = {}
+                if method == 'POST':
+                    length = int(self.headers.get('Content-Length', 0))
+                    form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                sid, state = self._session()
+                path, rp, action = url.path, query.get('rp'), query.get('a')
+
+                if path == '/index.php' and rp == '/login':
+                    if method == 'POST':
+                        if form.get('token') != state['token']:
+                            return self._send(400, PAGE.format(title='Error', body='Invalid CSRF token'), sid=sid)
+                        if form.get('username') == site.email and form.get('password') == site.password:
+                            state['user'] = site.email
+                            return self._send(302, location='/clientarea.php', sid=sid)
+                        return self._page(sid, 'Login', '<div class="alert alert-danger">Login Details Incorrect</div>' + self._login_form(state))
+                    return self._page(sid, 'Login', self._login_form(state))
+                if not state['user']:
+                    return self._send(302, location='/index.php?rp=/login', sid=sid)
+                if path == '/clientarea.php':
+                    if query.get('action') == 'productdetails' and state['service']:
+                        service = state['service']
+                        return self._page(sid, 'Product Details', f'<div class="product-details"><input type="text" id="m3ulinks" value="{service["url"]}" readonly>'
+                                          f'<div class="col">Expiry Date: <strong>{service["expiry"]}</strong></div></div>')
+                    rows = ''
+                    if state['service']:
+                        rows = f'<button type="button" class="btn" onclick="window.location=\'clientarea.php?action=productdetails&id={state["service"]["id"]}\'">View Details</button>'
+                    return self._page(sid, 'Client Area', f'<h1>Client Area</h1>{rows}')
+                if path == '/index.php' and rp == '/store/free-trial':
+                    return self._page(sid, 'Free Trial', '<a id="product7-order-button" class="btn" href="/cart.php?a=add&pid=7">Order Now</a>')
+                if path == '/cart.php' and action == 'add':
+                    state['cart'] = True
+                    return self._page(sid, 'Cart', '<a id="checkout" href="/cart.php?a=checkout" class="btn">Checkout</a>')
+                if path == '/cart.php' and action == 'checkout':
+                    if method == 'POST':
+                        if not state['cart'] or form.get('token') != state['token'] or form.get('accepttos') != 'on':
+                            return self._send(400, PAGE.format(title='Error', body='Order rejected'), sid=sid)
+                        with site._lock:
+                            site.orders += 1
+                            order_id = site.orders
+                        expiry = time.strftime('%A, %B %d, %Y', time.localtime(time.time() + 86400))
+                        username, password = f'trial{order_id}', secrets.token_hex(4)
+                        site.accounts[username] = password
+                        state['service'] = {'id': order_id, 'url': f'{site.base_url}get.php?username={username}&password={password}&type=m3u_plus', 'expiry': expiry}
+                        state['cart'] = False
+                        return self._send(302, location='/cart.php?a=complete', sid=sid)
+                    return self._page(sid, 'Checkout', f'<form method="post" action="/cart.php?a=checkout"><input type="hidden" name="token" value="{state["token"]}">'
+                                      '<label><input type="checkbox" name="accepttos" id="accepttos"> I have read and agree to the Terms of Service</label>'
+                                      '<button type="submit" id="btnCompleteOrder">Complete Order</button></form>')
+                if path == '/cart.php' and action == 'complete':
+                    return self._page(sid, 'Order Confirmation', '<p>Thank you!</p><a href="/clientarea.php">Continue To Client Area</a>')
+                return self._send(404, PAGE.format(title='Not Found', body='Not Found'), sid=sid)
+
+            def _playlist(self, query):
+                username, password = query.get('username'), query.get('password')
+                if not username or site.accounts.get(username) != password:
+                    return self._send(401, b'', content_type='text/plain')
+                data = site.playlist(username, password)
+                byte_range = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+                if byte_range:
+                    start = int(byte_range.group(1))
+                    end = min(int(byte_range.group(2) or len(data) - 1), len(data) - 1)
+                    headers = {'Content-Range': f'bytes {start}-{end}/{len(data)}', 'Accept-Ranges': 'bytes'}
+                    return self._send(206, data[start:end + 1], content_type='audio/x-mpegurl', headers=headers)
+                return self._send(200, data, content_type='audio/x-mpegurl', headers={'Accept-Ranges': 'bytes'})
+
+            def _login_form(self, state):
+                return ('<form method="post" action="/index.php?rp=/login">'
+                        f'<input type="hidden" name="token" value="{state["token"]}">'
+                        '<input type="email" name="username" id="inputEmail"><input type="password" name="password" id="inputPassword">'
+                        '<button type="submit" id="login">Login</button></form>')
+
+            def do_GET(self):
+                self._route('GET')
+
+            def do_POST(self):
+                self._route('POST')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="goldclubhosting.xyz yerine kullanılacak yerel WHMCS taklidini çalıştırır.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help="0: boş bir port seçilir")
+    parser.add_argument('--email', default='bench@example.com')
+    parser.add_argument('--password', default='secret')
+    parser.add_argument('--latency', type=float, default=0.0, help="Her isteğe eklenecek gecikme (saniye)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="503 ile yanıtlanacak isteklerin oranı (0-1)")
+    parser.add_argument('--accounts', type=int, default=0, help="Baştan tanımlı hesap sayısı (benchN / benchN)")
+    parser.add_argument('--channels', type=int, default=200, help="Her M3U listesindeki kanal sayısı")
+    args = parser.parse_args()
+
+    site = FakeWhmcs(email=args.email, password=args.password, latency=args.latency, failure_rate=args.failure_rate, host=args.host, port=args.port,
+                     accounts=args.accounts, channels=args.channels)
+    # İlk satır adres olarak yazılır; kıyaslama betiği sunucuyu alt süreç olarak başlatıp bu satırı okur.
+    print(site.base_url, flush=True)
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/startup.py (Soğuk açılış: modül içe aktarma, create_app() ve ilk yanıt süreleri)
+#
+# Kullanım:
+#   python benchmarks/startup.py                 # 5 soğuk açılışın medyanı
+#   python benchmarks/startup.py --runs 10 --json
+#
+# Her ölçüm ayrı bir Python sürecinde yapılır; böylece içe aktarma önbelleği ölçümleri etkilemez.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, time
+started = time.perf_counter()
+import app as application
+imported = time.perf_counter()
+client = application.app.test_client()
+response = client.get('/healthz')
+healthz_before_start = time.perf_counter()
+application.create_app()
+created = time.perf_counter()
+first = client.get('/healthz')
+first_response = time.perf_counter()
+login = client.get('/login')
+login_page = time.perf_counter()
+assert response.status_code == first.status_code == login.status_code == 200
+heavy = [name for name in ('gold_club_bot', 'http_engine', 'driver_pool', 'selenium.webdriver.support.ui', 'webdriver_manager', 'flask_apscheduler') if name in __import__('sys').modules]
+print(json.dumps({
+    'import_seconds': imported - started,
+    'healthz_before_start_seconds': healthz_before_start - imported,
+    'create_app_seconds': created - healthz_before_start,
+    'first_response_seconds': first_response - created,
+    'first_login_page_seconds': login_page - first_response,
+    'ready_seconds': first_response - started,
+    'heavy_modules_loaded': heavy,
+}))
+"""
+
+
+def probe(env):
+    output = subprocess.run([sys.executable, '-W', 'ignore', '-c', PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uygulamanın soğuk açılış süresini ölçer.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Sonucu JSON olarak yazdır")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        # Gerçek hesap veya servis gerekmez; arka plan servisleri ölçümü etkilemeyecek şekilde kapatılır.
+        env.setdefault('APP_PASSWORD', 'bench')
+        env.setdefault('GCB_EMAIL', 'bench@example.com')
+        env.setdefault('GCB_PASSWORD', 'bench')
+        env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        env.setdefault('DRIVER_POOL_ENABLED', 'false')
+        env.setdefault('INVENTORY_TARGET', '0')
+        samples = [probe(env) for _ in range(args.runs)]
+
+    keys = [key for key in samples[0] if key.endswith('_seconds')]
+    summary = {key: round(statistics.median(sample[key] for sample in samples), 4) for key in keys}
+    summary['heavy_modules_loaded'] = samples[-1]['heavy_modules_loaded']
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{args.runs} soğuk açılışın medyanı:")
+    for key in keys:
+        print(f"    {summary[key] * 1000:8.1f} ms  {key}")
+    print(f"    açılışta yüklenen ağır modüller: {', '.join(summary['heavy_modules_loaded']) or 'yok'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# browser_watchdog.py (Chrome süreç ağaçlarının takibi, çalıştırma bütçeleri ve sahipsiz süreç temizliği)
+
+import os
+import time
+
+import psutil
+
+# Watchdog hem bot iş parçacıklarından hem kendi döngüsünden kullanıldığı için kilitler native olmalıdır.
+from executor import native_threading as threading, native_time, spawn_native
+
+# Chrome'a eklenen ve süreci başlatan işçiyi belirten argüman; sahibi ölmüş süreçler bununla tanınır.
+OWNER_FLAG = '--gcb-owner='
+
+
+class BrowserBudgetExceeded(Exception):
+    pass
+
+
+def owner_argument():
+    return f'{OWNER_FLAG}{os.getpid()}'
+
+
+def _is_browser(proc):
+    return 'chrom' in (proc.info.get('name') or '').lower()
+
+
+def _owner_of(cmdline):
+    for argument in cmdline or ():
+        if argument.startswith(OWNER_FLAG):
+            try:
+                return int(argument[len(OWNER_FLAG):])
+            except ValueError:
+                return None
+    return None
+
+
+def process_tree(root):
+    """Kök süreç ve tüm alt süreçleri; alt süreçler okunamazsa yalnızca kök."""
+    try:
+        return [root] + root.children(recursive=True)
+    except psutil.Error:
+        return [root]
+
+
+def total_rss(procs):
+    """Süreçlerin RSS toplamı (bayt); bu arada kapanan süreçler atlanır."""
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def kill_tree(root, timeout=5):
+    """Kök süreci ve tüm alt süreçlerini öldürür, ardından çıkmalarını bekler (zombi kalmaz)."""
+    procs = process_tree(root)
+    for proc in reversed(procs):
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+    psutil.wait_procs(procs, timeout=timeout)
+    return len(procs)
+
+
+class BrowserTree:
+    """Bir chromedriver süreci ve altındaki Chrome süreçleri; çalıştırma sırasında bütçesi denetlenir."""
+
+    def __init__(self, pid, pinned=False):
+        self.pid = pid
+        self.pinned = pinned
+        self.run_started = None
+        self.violation = None
+
+    def process(self):
+        return psutil.Process(self.pid)
+
+
+class BrowserWatchdog:
+    """
+    Botun başlattığı her tarayıcıyı chromedriver PID'i üzerinden izler. Bir
+    çalıştırma sırasında tarayıcı `max_run_seconds` süresini veya `max_rss_mb`
+    belleğini aşarsa süreç ağacı öldürülür; bot bu durumda bekleyen Selenium
+    çağrısından hemen döner ve ihlal mesajıyla temiz bir hata verir. Takip
+    edilmeyen (çökmüş çalıştırmalardan veya ölmüş işçilerden kalan) Chrome
+    ağaçları başlangıçta ve `reap_interval` aralıklarla temizlenir.
+    """
+
+    def __init__(self, max_run_seconds=180, max_rss_mb=700, interval=2, reap_interval=60, grace_seconds=120):
+        self.max_run_seconds = max_run_seconds
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.interval = interval
+        self.reap_interval = reap_interval
+        # Yeni açılan bir tarayıcı takibe alınmadan önce kısa bir süre sahipsiz görünebilir.
+        self.grace_seconds = grace_seconds
+        self.kills = {'rss': 0, 'time': 0, 'orphan': 0}
+        self._trees = {}
+        self._lock = threading.Lock()
+
+    # --- Takip ---
+    def track(self, driver):
+        """Havuzdaki gibi uzun ömürlü tarayıcıları bilinen ağaçlara ekler (bütçe uygulanmaz)."""
+        tree = BrowserTree(driver.service.process.pid, pinned=True)
+        with self._lock:
+            self._trees[tree.pid] = tree
+        return tree
+
+    def untrack(self, driver):
+        with self._lock:
+            self._trees.pop(getattr(driver.service.process, 'pid', None), None)
+
+    def supervise(self, driver):
+        """Bir çalıştırmanın bütçesini başlatır; tarayıcı takipte değilse takibe alır."""
+        pid = driver.service.process.pid
+        with self._lock:
+            tree = self._trees.get(pid)
+            if tree is None:
+                tree = self._trees[pid] = BrowserTree(pid)
+            tree.violation = None
+            tree.run_started = native_time.monotonic()
+        return tree
+
+    def end_run(self, tree):
+        with self._lock:
+            tree.run_started = None
+            if not tree.pinned:
+                self._trees.pop(tree.pid, None)
+
+    # --- Denetim Döngüsü ---
+    def start(self):
+        spawn_native(self._loop)
+
+    def _loop(self):
+        last_reap = None
+        while True:
+            try:
+                self.enforce_budgets()
+                if last_reap is None or native_time.monotonic() - last_reap >= self.reap_interval:
+                    last_reap = native_time.monotonic()
+                    self.reap_orphans()
+            except Exception as e:
+                print(f"Tarayıcı denetimi sırasında hata oluştu: {e}")
+            native_time.sleep(self.interval)
+
+    def enforce_budgets(self):
+        with self._lock:
+            running = [tree for tree in self._trees.values() if tree.run_started is not None]
+        for tree in running:
+            elapsed = native_time.monotonic() - tree.run_started
+            try:
+                rss = total_rss(process_tree(tree.process()))
+            except psutil.Error:
+                continue
+            if rss > self.max_rss_bytes:
+                reason, violation = 'rss', f"Tarayıcı bellek bütçesini aştı ({rss // (1024 * 1024)} MB > {self.max_rss_bytes // (1024 * 1024)} MB), çalıştırma durduruldu."
+            elif elapsed > self.max_run_seconds:
+                reason, violation = 'time', f"Tarayıcı süre bütçesini aştı ({elapsed:.0f} sn > {self.max_run_seconds} sn), çalıştırma durduruldu."
+            else:
+                continue
+            # İhlal öldürmeden önce yazılır; bot Selenium hatasını aldığında nedeni hazır bulur.
+            tree.violation = violation
+            print(f"UYARI: {violation}")
+            try:
+                kill_tree(tree.process())
+            except psutil.Error:
+                pass
+            with self._lock:
+                self._trees.pop(tree.pid, None)
+                self.kills[reason] += 1
+
+    # --- Sahipsiz Süreçler ---
+    def find_orphans(self):
+        """Takip edilmeyen ve sahibi bu işçi olmayan ya da sahibi ölmüş Chrome ağaçlarının köklerini döndürür."""
+        me = os.getpid()
+        with self._lock:
+            tracked = list(self._trees)
+        known = set()
+        for pid in tracked:
+            try:
+                known.update(proc.pid for proc in process_tree(psutil.Process(pid)))
+            except psutil.Error:
+                pass
+        now = time.time()
+        roots = {}
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline', 'create_time']):
+            if proc.pid in known or not _is_browser(proc):
+                continue
+            owner = _owner_of(proc.info.get('cmdline'))
+            young = now - (proc.info.get('create_time') or now) < self.grace_seconds
+            if owner is not None:
+                orphan = not psutil.pid_exists(owner) or (owner == me and not young)
+            else:
+                # İşaretsiz süreçlerden yalnızca bu işçinin doğrudan başlattığı takipsiz chromedriver'lar bizimdir.
+                orphan = proc.info.get('ppid') == me and not young
+            if orphan:
+                root = self._browser_root(proc)
+                roots[root.pid] = root
+        return list(roots.values())
+
+    def _browser_root(self, proc):
+        """Aynı ağaçtaki en üstteki Chrome/chromedriver sürecini bulur (chromedriver dahil öldürülsün diye)."""
+        root = proc
+        try:
+            for parent in proc.parents():
+                if 'chrom' not in parent.name().lower():
+                    break
+                root = parent
+        except psutil.Error:
+            pass
+        return root
+
+    def reap_orphans(self):
+        reaped = 0
+        for root in self.find_orphans():
+            try:
+                reaped += kill_tree(root)
+            except psutil.Error:
+                continue
+            with self._lock:
+                self.kills['orphan'] += 1
+        if reaped:
+            print(f"Sahipsiz kalmış {reaped} tarayıcı süreci sonlandırıldı.")
+        return reaped
+
+    # --- Raporlama ---
+    def snapshot(self):
+        """Takip edilen tarayıcıların süreç sayısı ve bellek kullanımı."""
+        with self._lock:
+            trees = list(self._trees.values())
+            kills = dict(self.kills)
+        browsers = []
+        for tree in trees:
+            try:
+                procs = process_tree(tree.process())
+            except psutil.Error:
+                continue
+            browsers.append({
+                'pid': tree.pid,
+                'pooled': tree.pinned,
+                'in_run': tree.run_started is not None,
+                'processes': len(procs),
+                'rss_mb': round(total_rss(procs) / (1024 * 1024), 1),
+            })
+        return {
+            'browsers': browsers,
+            'processes': sum(browser['processes'] for browser in browsers),
+            'rss_mb': round(sum(browser['rss_mb'] for browser in browsers), 1),
+            'budget': {'max_run_seconds': self.max_run_seconds, 'max_rss_mb': self.max_rss_bytes // (1024 * 1024)},
+            'kills': kills,
+        }
@@ -0,0 +1,175 @@
+# driver_pool.py (Sıcak tutulan, yeniden kullanılabilir headless Chrome havuzu)
+
+import shutil
+import tempfile
+import time
+from collections import deque
+
+import psutil
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+
+from browser_watchdog import process_tree, total_rss
+from gold_club_bot import apply_request_blocklist, build_chrome_options, resolve_driver_path
+# Havuz hem hub'dan hem bot iş parçacıklarından kullanıldığı için kilitler native olmalıdır.
+from executor import native_threading as threading, spawn_native
+
+
+class PooledDriver:
+    """Havuzdaki tek bir tarayıcı örneği ve ona ait kullanım bilgileri."""
+
+    def __init__(self, driver, user_data_dir):
+        self.driver = driver
+        self.user_data_dir = user_data_dir
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+    def processes(self):
+        """chromedriver ve altındaki tüm Chrome süreçlerini döndürür."""
+        try:
+            return process_tree(psutil.Process(self.driver.service.process.pid))
+        except (psutil.Error, AttributeError):
+            return []
+
+    def rss_bytes(self):
+        return total_rss(self.processes())
+
+
+class DriverPool:
+    """
+    Önceden başlatılmış Chrome örneklerini sıcak tutar ve her çalıştırmaya
+    çerezleri/depolaması silinmiş bir tarayıcı ödünç verir. Bir tarayıcı
+    `max_uses` kullanımdan sonra veya RSS sınırını aşınca yenisiyle değiştirilir.
+    """
+
+    def __init__(self, size=1, max_uses=20, max_rss_mb=600, wipe_origins=(), profile=None, watchdog=None):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.wipe_origins = list(wipe_origins)
+        self.profile = profile
+        self.watchdog = watchdog
+        self.driver_path = None
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._closed = False
+
+    # --- Yaşam Döngüsü ---
+    def start(self):
+        """chromedriver yolunu bir kez çözer ve havuzu önceden doldurur."""
+        try:
+            self.driver_path = resolve_driver_path()
+        except Exception as e:
+            print(f"Tarayıcı havuzu başlatılamadı, chromedriver bulunamadı: {e}")
+            return
+        print(f"Tarayıcı havuzu başlatılıyor ({self.size} örnek, chromedriver: {self.driver_path})")
+        for _ in range(self.size):
+            self._refill()
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self._destroy(pooled)
+
+    # --- Ödünç Alma / İade ---
+    def acquire(self, timeout=120):
+        if not self._slots.acquire(timeout=timeout):
+            raise WebDriverException("Tarayıcı havuzunda boş örnek bulunamadı (zaman aşımı).")
+        try:
+            with self._lock:
+                pooled = self._idle.popleft() if self._idle else None
+            if pooled is None:
+                pooled = self._create()
+            pooled.uses += 1
+            return pooled
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, pooled):
+        try:
+            recycle = self._closed or pooled.uses >= self.max_uses
+            if not recycle and pooled.rss_bytes() > self.max_rss_bytes:
+                print(f"Tarayıcı RSS sınırını aştı ({pooled.rss_bytes() // (1024 * 1024)} MB), yenileniyor.")
+                recycle = True
+            if not recycle:
+                try:
+                    self._wipe(pooled)
+                except Exception as e:
+                    print(f"Tarayıcı temizlenemedi, yenileniyor: {e}")
+                    recycle = True
+            if recycle:
+                self._destroy(pooled)
+                if not self._closed:
+                    # Yeni tarayıcı, çağıranı bekletmemek için arka planda açılır. İade bot iş parçacığından
+                    # yapıldığı için hub'a bağlı olmayan native bir iş parçacığı kullanılır.
+                    spawn_native(self._refill)
+            else:
+                with self._lock:
+                    self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    # --- Yardımcılar ---
+    def _refill(self):
+        try:
+            pooled = self._create()
+        except Exception as e:
+            print(f"Havuz için tarayıcı başlatılamadı: {e}")
+            return
+        with self._lock:
+            if self._closed or len(self._idle) >= self.size:
+                surplus = True
+            else:
+                self._idle.append(pooled)
+                surplus = False
+        if surplus:
+            self._destroy(pooled)
+
+    def _create(self):
+        if not self.driver_path:
+            self.driver_path = resolve_driver_path()
+        user_data_dir = tempfile.mkdtemp(prefix='gcb-chrome-')
+        try:
+            driver = webdriver.Chrome(service=Service(self.driver_path), options=build_chrome_options(user_data_dir, self.profile))
+        except Exception:
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+            raise
+        pooled = PooledDriver(driver, user_data_dir)
+        try:
+            apply_request_blocklist(driver, self.profile)
+        except Exception:
+            self._destroy(pooled)
+            raise
+        if self.watchdog:
+            # Boşta bekleyen havuz tarayıcıları sahipsiz sayılıp temizlenmesin diye bilinen ağaçlara eklenir.
+            self.watchdog.track(driver)
+        return pooled
+
+    def _wipe(self, pooled):
+        """Bir sonraki çalıştırmanın önceki oturumu görmemesi için tüm tarayıcı durumunu siler."""
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        for origin in self.wipe_origins:
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.get('about:blank')
+
+    def _destroy(self, pooled):
+        if self.watchdog:
+            self.watchdog.untrack(pooled.driver)
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"Tarayıcı kapatılırken hata: {e}")
+        shutil.rmtree(pooled.user_data_dir, ignore_errors=True)
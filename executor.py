@@ -0,0 +1,74 @@
+# executor.py (Bloklayan işleri eventlet hub'ından uzakta, gerçek iş parçacıklarında çalıştırma)
+
+from eventlet import patcher, tpool
+
+# Hub'ı bloklamadan iş parçacıkları arasında veri taşımak için yamalanmamış (native) modüller kullanılır.
+native_queue = patcher.original('queue')
+native_threading = patcher.original('threading')
+native_time = patcher.original('time')
+
+
+def run_blocking(func, *args, **kwargs):
+    """
+    func'ı eventlet'in native iş parçacığı havuzunda (tpool) çalıştırır ve sonucunu
+    döndürür. Çağıran greenlet beklerken hub Socket.IO heartbeat'lerine ve diğer
+    isteklere hizmet etmeye devam eder.
+    """
+    return tpool.execute(func, *args, **kwargs)
+
+
+def spawn_native(func, *args):
+    """func'ı hub'dan bağımsız, gerçek bir arka plan iş parçacığında başlatır."""
+    thread = native_threading.Thread(target=func, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+class HubEmitter:
+    """
+    Native iş parçacığında çalışan bota `socketio` yerine verilir. emit çağrıları
+    iş parçacığı güvenli bir kuyruğa yazılır; hub üzerinde çalışan pump() bunları
+    gerçek socketio nesnesiyle yayınlar.
+    """
+
+    def __init__(self, socketio, interval=0.05):
+        self.socketio = socketio
+        self.interval = interval
+        self._queue = native_queue.Queue()
+        self._closed = False
+
+    def emit(self, event, data=None, to=None, **kwargs):
+        self._queue.put((event, data, to, kwargs))
+
+    def sleep(self, seconds=0):
+        # Bot her mesajdan sonra hub'a sıra vermek için sleep(0) çağırır; native iş parçacığında buna gerek yoktur.
+        if seconds:
+            native_time.sleep(seconds)
+
+    def close(self):
+        self._closed = True
+
+    def flush(self):
+        while True:
+            try:
+                event, data, to, kwargs = self._queue.get_nowait()
+            except native_queue.Empty:
+                return
+            self.socketio.emit(event, data, to=to, **kwargs)
+
+    def pump(self):
+        while not self._closed:
+            self.flush()
+            self.socketio.sleep(self.interval)
+
+
+def run_with_relay(socketio, func, *args, **kwargs):
+    """func(emitter, *args) çağrısını tpool'da çalıştırır; emitter üzerinden gelen olaylar hub'a aktarılır."""
+    emitter = HubEmitter(socketio)
+    socketio.start_background_task(emitter.pump)
+    try:
+        return run_blocking(func, emitter, *args, **kwargs)
+    finally:
+        # Sonuç bildirilmeden önce kuyrukta kalan tüm mesajlar yayınlanır, sıra korunur.
+        emitter.close()
+        emitter.flush()
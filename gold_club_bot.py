@@ -1,101 +1,312 @@
 # gold_club_bot.py (Filtreleme Kaldırılmış, En Sade ve Hızlı Final Versiyon)
 
-import time
+import glob
+import os
+import shutil
 import traceback
-import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from functools import lru_cache
+# Selenium modül düzeyinde içe aktarılmaz: yalnızca tarayıcıya dokunan fonksiyonlar onu kendi içinde
+# yükler. Böylece bu sınıftan türeyen HTTP motoru ve uygulamanın açılışı Selenium'u hiç yüklemez.
+from retry_policy import Deadline, RetryStats, FatalStepError, build_policies, call_with_retry
+from browser_watchdog import BrowserBudgetExceeded, owner_argument
+from metrics import RunTimer
+
+DEFAULT_BASE_URL = "https://goldclubhosting.xyz/"
+
+@lru_cache(maxsize=1)
+def retryable_exceptions():
+    """Bu hatalar sayfanın geç yüklenmesinden kaynaklanır; yeniden denemek anlamlıdır."""
+    from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, ElementClickInterceptedException, ElementNotInteractableException
+    return (TimeoutException, StaleElementReferenceException, ElementClickInterceptedException, ElementNotInteractableException)
+
+@lru_cache(maxsize=1)
+def resolve_driver_path():
+    """
+    chromedriver yolunu süreç başına yalnızca bir kez, ağa çıkmadan çözer: CHROMEDRIVER_PATH,
+    PATH üzerindeki chromedriver, ardından webdriver_manager önbelleği (~/.wdm). İndirme
+    yalnızca CHROMEDRIVER_DOWNLOAD=true ise yapılır.
+    """
+    configured = os.environ.get('CHROMEDRIVER_PATH')
+    if configured:
+        if os.access(configured, os.X_OK):
+            return configured
+        print(f"UYARI: CHROMEDRIVER_PATH çalıştırılabilir değil, diğer konumlara bakılıyor: {configured}")
+    found = shutil.which('chromedriver')
+    if found:
+        return found
+    cached = [path for path in glob.glob(os.path.expanduser('~/.wdm/drivers/chromedriver/**/chromedriver'), recursive=True) if os.access(path, os.X_OK)]
+    if cached:
+        return max(cached, key=os.path.getmtime)
+    if os.environ.get('CHROMEDRIVER_DOWNLOAD', 'false').lower() != 'true':
+        raise FileNotFoundError("chromedriver bulunamadı. CHROMEDRIVER_PATH ayarlayın ya da sürücüyü imaj derlenirken kurun (indirmeye izin vermek için CHROMEDRIVER_DOWNLOAD=true).")
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+# --- Yalın Tarayıcı Profili ---
+# CDP Network.setBlockedURLs yalnızca joker karakterli URL kalıplarını kabul eder; kaynak türleri uzantıya göre eşlenir.
+RESOURCE_TYPE_PATTERNS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'stylesheet': ('css',),
+    'media': ('mp4', 'webm', 'mp3', 'ogg'),
+}
+
+# WHMCS sayfalarının yüklediği ama botun hiç bakmadığı üçüncü taraf alan adları.
+DEFAULT_BLOCK_DOMAINS = ('google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'fonts.googleapis.com', 'fonts.gstatic.com', 'gravatar.com')
+
+def build_browser_profile(lean=True, block_types=None, block_domains=None, window_size='1024,768', renderer_memory_mb=256):
+    """Tarayıcı profilini sözlük olarak döndürür; lean=False mevcut (tam) profili korur."""
+    if not lean:
+        return {'lean': False, 'window_size': '1920,1080'}
+    return {
+        'lean': True,
+        'block_types': list(RESOURCE_TYPE_PATTERNS) if block_types is None else [t for t in block_types if t in RESOURCE_TYPE_PATTERNS],
+        'block_domains': list(DEFAULT_BLOCK_DOMAINS) if block_domains is None else list(block_domains),
+        'window_size': window_size,
+        'renderer_memory_mb': renderer_memory_mb,
+    }
+
+def blocked_url_patterns(profile):
+    if not profile or not profile.get('lean'):
+        return []
+    patterns = [f'*.{ext}*' for block_type in profile.get('block_types', ()) for ext in RESOURCE_TYPE_PATTERNS[block_type]]
+    patterns += [f'*://*{domain}/*' for domain in profile.get('block_domains', ())]
+    return patterns
+
+def build_chrome_options(user_data_dir=None, profile=None):
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument(f"--window-size={(profile or {}).get('window_size', '1920,1080')}")
+    options.add_argument('--log-level=3')
+    # Sahipsiz kalan süreçlerin hangi işçiye ait olduğu watchdog tarafından bu argümandan anlaşılır.
+    options.add_argument(owner_argument())
+    if user_data_dir:
+        # Havuzdaki her tarayıcı kendi profil klasörünü kullanır, böylece birbirlerinden yalıtılırlar.
+        options.add_argument(f'--user-data-dir={user_data_dir}')
+    if profile and profile.get('lean'):
+        # DOMContentLoaded yeterli: tüm beklemeler zaten açık WebDriverWait koşullarıyla yapılıyor.
+        options.page_load_strategy = 'eager'
+        for argument in ('--disable-gpu', '--disable-extensions', '--disable-background-networking', '--disable-default-apps',
+                         '--disable-sync', '--disable-component-update', '--mute-audio', '--no-first-run', '--renderer-process-limit=1'):
+            options.add_argument(argument)
+        if profile.get('renderer_memory_mb'):
+            options.add_argument(f"--js-flags=--max-old-space-size={profile['renderer_memory_mb']}")
+        if 'image' in profile.get('block_types', ()):
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    return options
+
+def apply_request_blocklist(driver, profile):
+    """Profilin engelleme listesini açık tarayıcı oturumuna uygular; kalıplar sonraki tüm gezinmelerde geçerlidir."""
+    patterns = blocked_url_patterns(profile)
+    if patterns:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
 
 class GoldClubBot:
-    def __init__(self, email, password, socketio=None, sid=None, target_group=None):
+    engine = 'selenium'
+
+    def __init__(self, email, password, socketio=None, sid=None, target_group=None, driver_pool=None, notify_errors=True, session_store=None, run_timeout=120, retry_policies=None, log_sink=None, browser_profile=None, watchdog=None, base_url=None):
         self.email = email
         self.password = password
         self.socketio = socketio
         self.sid = sid
-        # target_group artık kullanılmıyor ama uyumluluk için parametre olarak kalabilir.
+        # Grup filtresi artık botta değil, kanal dizininde uygulanır (bkz. m3u_playlist); parametre uyumluluk için duruyor.
         self.target_group = target_group
+        # Verilirse tarayıcı her çalıştırmada sıfırdan açılmak yerine bu havuzdan ödünç alınır.
+        self.driver_pool = driver_pool
+        self._lease = None
+        # False ise hata istemciye bildirilmez (ör. ardından yedek motorla yeniden denenecekse).
+        self.notify_errors = notify_errors
+        # Verilirse önceki çalıştırmanın oturum çerezleri denenir, giriş adımı yalnızca gerekirse yapılır.
+        self.session_store = session_store
+        # Verilirse durum mesajları tek tek emit edilmek yerine çalıştırmanın log kanalına yazılır.
+        self.log_sink = log_sink
+        # Havuz kullanılmadığında açılacak tarayıcının profili (bkz. build_browser_profile).
+        self.browser_profile = browser_profile
+        # Verilirse tarayıcı çalıştırma boyunca süre ve bellek bütçesiyle denetlenir.
+        self.watchdog = watchdog
+        self._supervision = None
+        # Tüm adımlar tek bir çalıştırma süresini paylaşır; adım bazlı politikalar yeniden denemeleri belirler.
+        self.run_timeout = run_timeout
+        self.retry_policies = build_policies(retry_policies)
+        self.deadline = None
+        self.retry_stats = RetryStats()
+        self.current_step = 'setup'
+        self.timer = None
         self.driver = None
-        self.wait = None
-        self.base_url = "https://goldclubhosting.xyz/"
+        # Kıyaslama ve testlerde yerel bir WHMCS taklidine yönlendirmek için değiştirilebilir.
+        self.base_url = base_url or DEFAULT_BASE_URL
     
     def _report_status(self, message, level='info'):
         """Mesajları seviyelerine göre (info, warning, error) raporlar."""
         log_message = f"SID {self.sid or 'Scheduler'}: {message}"
         print(log_message)
-        if self.socketio and self.sid:
+        if self.log_sink:
+            self.log_sink(message, level)
+        elif self.socketio and self.sid:
             self.socketio.emit('status_update', {'message': message, 'level': level}, to=self.sid)
             self.socketio.sleep(0)
 
-    def _find_element_with_retry(self, by, value, retries=3, delay=5):
-        for i in range(retries):
-            try:
-                return self.wait.until(EC.visibility_of_element_located((by, value)))
-            except TimeoutException:
-                if i < retries - 1:
-                    self._report_status(f"-> Element '{value}' bulunamadı. {delay} sn sonra tekrar deneniyor...", level='warning')
-                    time.sleep(delay)
-                else:
-                    raise
+    # --- Yeniden Deneme Yardımcıları ---
+    def _policy(self):
+        return self.retry_policies.get(self.current_step, self.retry_policies['default'])
+
+    def _is_retryable(self, error):
+        if self._supervision and self._supervision.violation:
+            return False  # Tarayıcı watchdog tarafından öldürüldü; yeniden denemek anlamsız.
+        return isinstance(error, retryable_exceptions())
+
+    def _with_retry(self, func, description):
+        def on_retry(attempt, attempts, delay, error):
+            self._report_status(f"-> {description} başarısız ({type(error).__name__}). {delay:.1f} sn sonra tekrar deneniyor ({attempt}/{attempts - 1})...", level='warning')
+        return call_with_retry(func, self._policy(), self.deadline, self.current_step, self.retry_stats, self._is_retryable, on_retry)
+
+    def _detect_page_error(self):
+        """Beklemeye değmeyecek durumları (giriş reddi, hata sayfası) tanır; yoksa None döner."""
+        from selenium.common.exceptions import WebDriverException
+        from selenium.webdriver.common.by import By
+        try:
+            for alert in self.driver.find_elements(By.CSS_SELECTOR, ".alert-danger, .alert-error"):
+                if alert.is_displayed() and alert.text.strip():
+                    return f"Sayfa hata bildirdi: {alert.text.strip()}"
+            title = (self.driver.title or '').lower()
+            if any(marker in title for marker in ('404', '500', '502', '503', 'error', 'oops')):
+                return f"Hata sayfası açıldı: {self.driver.title}"
+        except WebDriverException:
+            return None
+        return None
+
+    def _wait_for(self, condition, timeout):
+        """condition sağlanana kadar hızlı aralıklarla bekler; sayfa hata gösterirse hemen FatalStepError fırlatır."""
+        from selenium.webdriver.support.ui import WebDriverWait
+        def check(driver):
+            result = condition(driver)
+            if result:
+                return result
+            error = self._detect_page_error()
+            if error:
+                raise FatalStepError(error)
+            return False
+        return WebDriverWait(self.driver, timeout, poll_frequency=self._policy().poll).until(check)
+
+    def _wait_for_url(self, fragment):
+        from selenium.webdriver.support import expected_conditions as EC
+        self._with_retry(lambda timeout: self._wait_for(EC.url_contains(fragment), timeout), f"'{fragment}' adresine geçiş")
+
+    def _find_element_with_retry(self, by, value):
+        from selenium.webdriver.support import expected_conditions as EC
+        return self._with_retry(lambda timeout: self._wait_for(EC.visibility_of_element_located((by, value)), timeout), f"Element '{value}' arama")
     
-    def _click_element_with_retry(self, by, value, retries=3, delay=5):
-        for i in range(retries):
-            try:
-                element = self.wait.until(EC.element_to_be_clickable((by, value)))
-                element.click()
-                return
-            except TimeoutException:
-                if i < retries - 1:
-                    self._report_status(f"-> Tıklanabilir element '{value}' bulunamadı. {delay} sn sonra tekrar deneniyor...", level='warning')
-                    time.sleep(delay)
-                else:
-                    raise
+    def _click_element_with_retry(self, by, value):
+        from selenium.webdriver.support import expected_conditions as EC
+        def click(timeout):
+            self._wait_for(EC.element_to_be_clickable((by, value)), timeout).click()
+        self._with_retry(click, f"Element '{value}' tıklama")
 
     def _setup_driver(self):
+        from selenium import webdriver
+        from selenium.common.exceptions import WebDriverException
+        from selenium.webdriver.chrome.service import Service
+        if self.driver_pool:
+            self._report_status("-> Hazır tarayıcı havuzdan alınıyor...")
+            try:
+                self._lease = self.driver_pool.acquire()
+            except WebDriverException as e:
+                self._report_status(f"[HATA] Havuzdan tarayıcı alınamadı: {e.msg}", level='error')
+                raise
+            self.driver = self._lease.driver
+            self._supervise()
+            return
         self._report_status("-> WebDriver hazırlanıyor (arka plan modu)...")
         try:
-            options = webdriver.ChromeOptions()
-            options.add_argument('--headless')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--window-size=1920,1080')
-            options.add_argument('--log-level=3')
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-            self.wait = WebDriverWait(self.driver, 20)
+            service = Service(resolve_driver_path())
+            self.driver = webdriver.Chrome(service=service, options=build_chrome_options(profile=self.browser_profile))
+            apply_request_blocklist(self.driver, self.browser_profile)
         except WebDriverException as e:
             self._report_status(f"[HATA] WebDriver başlatılamadı: {e.msg}", level='error')
             raise
+        self._supervise()
+
+    def _supervise(self):
+        if self.watchdog:
+            self._supervision = self.watchdog.supervise(self.driver)
     
     def _login(self):
+        if self._restore_session():
+            self._report_status("-> Kayıtlı oturum geçerli, giriş adımı atlandı.")
+            return
+        self._perform_login()
+        if self.session_store:
+            try:
+                self.session_store.save(self._export_cookies())
+            except Exception as e:
+                self._report_status(f"-> Oturum kaydedilemedi: {e}", level='warning')
+
+    def _restore_session(self):
+        if not self.session_store:
+            return False
+        try:
+            cookies = self.session_store.load()
+            if not cookies:
+                return False
+            self._report_status("-> Kayıtlı oturum deneniyor...")
+            self._import_cookies(cookies)
+            if self._session_is_valid():
+                return True
+            self._report_status("-> Kayıtlı oturumun süresi dolmuş, yeniden giriş yapılacak.", level='warning')
+            self.session_store.clear()
+        except Exception as e:
+            self._report_status(f"-> Kayıtlı oturum kullanılamadı: {e}", level='warning')
+        return False
+
+    def _export_cookies(self):
+        return [{'name': c['name'], 'value': c['value'], 'domain': c.get('domain'), 'path': c.get('path', '/'), 'secure': c.get('secure', False), 'expiry': c.get('expiry')} for c in self.driver.get_cookies()]
+
+    def _import_cookies(self, cookies):
+        # Selenium çerez eklemek için önce aynı alan adındaki bir sayfada olmayı gerektirir.
+        self.driver.get(self.base_url)
+        for cookie in cookies:
+            selenium_cookie = {'name': cookie['name'], 'value': cookie['value'], 'path': cookie.get('path') or '/', 'secure': bool(cookie.get('secure'))}
+            if cookie.get('expiry'):
+                selenium_cookie['expiry'] = int(cookie['expiry'])
+            self.driver.add_cookie(selenium_cookie)
+
+    def _session_is_valid(self):
+        self.driver.get(f"{self.base_url}clientarea.php")
+        current_url = self.driver.current_url
+        return "clientarea.php" in current_url and "rp=/login" not in current_url
+
+    def _perform_login(self):
+        from selenium.webdriver.common.by import By
         self._report_status("-> Giriş yapılıyor...")
         self.driver.get(f"{self.base_url}index.php?rp=/login")
         self._find_element_with_retry(By.ID, "inputEmail").send_keys(self.email)
         self._find_element_with_retry(By.ID, "inputPassword").send_keys(self.password)
         self._click_element_with_retry(By.ID, "login")
-        self.wait.until(EC.url_contains("clientarea.php"))
+        self._wait_for_url("clientarea.php")
     
     def _order_free_trial(self):
+        from selenium.webdriver.common.by import By
         self._report_status("-> Ücretsiz deneme sipariş ediliyor...")
         self.driver.get(f"{self.base_url}index.php?rp=/store/free-trial")
         self._click_element_with_retry(By.ID, "product7-order-button")
         self._click_element_with_retry(By.ID, "checkout")
         self._click_element_with_retry(By.XPATH, "//label[contains(., 'I have read and agree to the')]")
         self._click_element_with_retry(By.ID, "btnCompleteOrder")
-        self.wait.until(EC.url_contains("cart.php?a=complete"))
+        self._wait_for_url("cart.php?a=complete")
     
     def _navigate_to_product_details(self):
+        from selenium.webdriver.common.by import By
         self._report_status("-> Ürün detayları sayfasına gidiliyor...")
         self._click_element_with_retry(By.PARTIAL_LINK_TEXT, "Continue To Client Area")
-        view_details_button = self._find_element_with_retry(By.XPATH, "(//button[contains(., 'View Details')])[1]")
-        view_details_button.click()
+        self._click_element_with_retry(By.XPATH, "(//button[contains(., 'View Details')])[1]")
     
     def _extract_data(self):
+        from selenium.webdriver.common.by import By
         self._report_status("-> Temel veriler çekiliyor...")
         m3u_input = self._find_element_with_retry(By.ID, "m3ulinks")
         m3u_link = m3u_input.get_attribute("value")
@@ -109,23 +320,62 @@ class GoldClubBot:
         return {"url": m3u_link, "expiry": expiry_date}
     
     def _cleanup(self):
-        if self.driver:
-            self.driver.quit()
-            self._report_status("-> Tarayıcı kapatıldı.")
+        if self._supervision:
+            self.watchdog.end_run(self._supervision)
+        if self._lease:
+            # Tarayıcı kapatılmaz; temizlenip bir sonraki çalıştırma için havuza geri verilir.
+            self.driver_pool.release(self._lease)
+            self._lease = None
+            self.driver = None
+            self._report_status("-> Tarayıcı havuza iade edildi.")
+        elif self.driver:
+            try:
+                self.driver.quit()
+                self._report_status("-> Tarayıcı kapatıldı.")
+            except Exception as e:
+                # Kalan süreçler takipten çıktığı için watchdog'un sahipsiz süreç temizliği tarafından toplanır.
+                self._report_status(f"[UYARI] Tarayıcı düzgün kapatılamadı: {type(e).__name__}", level='warning')
     
+    def _run_step(self, step, func):
+        self.current_step = step
+        self.deadline.check(step)
+        with self.timer.span(step):
+            return func()
+
+    def _report_retry_stats(self):
+        stats = self.retry_stats.as_dict()
+        if stats:
+            summary = ", ".join(f"{step}: {entry['retries']} deneme / {entry['seconds']:.1f} sn" for step, entry in stats.items())
+            self._report_status(f"-> Yeniden deneme süreleri: {summary}", level='warning')
+        return stats
+
     def run_full_process(self):
+        self.deadline = Deadline(self.run_timeout)
+        self.timer = RunTimer()
+        result = None
         try:
-            self._setup_driver()
-            self._login()
-            self._order_free_trial()
-            self._navigate_to_product_details()
-            return self._extract_data()
+            self._run_step('setup', self._setup_driver)
+            self._run_step('login', self._login)
+            self._run_step('order', self._order_free_trial)
+            self._run_step('details', self._navigate_to_product_details)
+            result = self._run_step('extract', self._extract_data)
+            result['retry_stats'] = self._report_retry_stats()
+            return result
         except Exception as e:
+            if self._supervision and self._supervision.violation:
+                # Selenium'un bağlantı hatası yerine asıl neden (bütçe aşımı) raporlanır.
+                e = BrowserBudgetExceeded(self._supervision.violation)
             error_message = f"[KRİTİK HATA] {type(e).__name__}: {e}"
             self._report_status(error_message, level='error')
             traceback.print_exc()
-            if self.socketio and self.sid:
+            if self.socketio and self.sid and self.notify_errors:
                 self.socketio.emit('process_error', {'error': str(e)}, to=self.sid)
-            return {'error': error_message}
+            result = {'error': error_message, 'failed_step': self.current_step, 'retry_stats': self._report_retry_stats()}
+            return result
         finally:
-            self._cleanup()
+            with self.timer.span('cleanup'):
+                self._cleanup()
+            # Aşama dökümü, temizlik süresi de dahil olacak şekilde en son eklenir.
+            if result is not None:
+                result['engine'] = self.engine
+                result['timings'] = self.timer.breakdown()
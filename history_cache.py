@@ -0,0 +1,62 @@
+# history_cache.py (Geçmiş API'si için süreç içi yanıt önbelleği ve veritabanındaki sürümden ETag üretimi)
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class HistoryCache:
+    """
+    Serileştirilmiş /get_history yanıtlarını sorgu anahtarı ve geçmiş sürümüne göre
+    saklar. Sürüm veritabanındaki tek satırlık bir sayaçtır: link tablosunu değiştiren
+    her işlem, kendi transaction'ı içinde invalidate() ile sayacı artırır. Böylece diğer
+    işçilerdeki ve düğümlerdeki değişiklikler ile yeniden başlatmalar da ETag'i değiştirir;
+    doğrulama için birincil anahtarla tek satır okunur, geçmiş sorgusu çalışmaz.
+
+    Yanıtlar, sorgudan önce okunan sürümle birlikte saklanır. Sorgu sırasında sürüm
+    artarsa yanıt eski sürümün altında kalır ve yeni sürümle bir daha okunmaz.
+    """
+
+    def __init__(self, db, model, name='history', max_entries=128):
+        self.db = db
+        self.model = model
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self):
+        # Kimlik haritası (identity map) atlanır; her çağrı veritabanındaki güncel değeri okur.
+        return self.db.session.query(self.model.version).filter_by(name=self.name).scalar() or 0
+
+    def etag(self, key, version):
+        return hashlib.sha1(f"{version}:{key}".encode('utf-8')).hexdigest()[:20]
+
+    def get(self, key, version):
+        with self._lock:
+            body = self._entries.get((version, key))
+            if body is not None:
+                self._entries.move_to_end((version, key))
+            return body
+
+    def put(self, key, version, body):
+        with self._lock:
+            self._entries[(version, key)] = body
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Sürümü çağıranın transaction'ında artırır; commit çağırana aittir (değişiklikle birlikte görünür olsun diye)."""
+        self.db.session.query(self.model).filter_by(name=self.name).update({'version': self.model.version + 1}, synchronize_session=False)
+        self.clear()
+
+    def clear(self):
+        """Yalnızca bu süreçteki yanıtları bırakır (sürüm değişmez)."""
+        with self._lock:
+            self._entries.clear()
+
+    def ensure(self):
+        """Sayaç satırını yoksa oluşturur; şema kurulumunda çağrılır."""
+        if self.db.session.get(self.model, self.name) is None:
+            self.db.session.add(self.model(name=self.name, version=0))
@@ -0,0 +1,266 @@
+# http_engine.py (Tarayıcısız HTTP motoru: giriş -> ücretsiz deneme siparişi -> m3u linki)
+
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from gold_club_bot import GoldClubBot
+from retry_policy import FatalStepError
+from user_agents import BROWSER_USER_AGENT
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+# Tüm çalıştırmalar aynı bağlantı havuzunu paylaşır (keep-alive); çerezler ise her çalıştırmanın kendi Session'ında kalır.
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=['GET']))
+
+
+# --- Hafif HTML Ağacı ---
+class Node:
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or {})
+        self.children = []
+        self.parent = parent
+
+    def get(self, name, default=None):
+        value = self.attrs.get(name)
+        return default if value is None else value
+
+    def iter(self):
+        yield self
+        for child in self.children:
+            if isinstance(child, Node):
+                yield from child.iter()
+
+    def text(self):
+        parts = []
+        for child in self.children:
+            parts.append(child.text() if isinstance(child, Node) else child)
+        return ''.join(parts)
+
+    def find_all(self, predicate):
+        return [node for node in self.iter() if predicate(node)]
+
+    def find(self, predicate):
+        return next((node for node in self.iter() if predicate(node)), None)
+
+    def closest(self, tag):
+        node = self.parent
+        while node is not None and node.tag != tag:
+            node = node.parent
+        return node
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document')
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, attrs, parent=self._stack[-1])
+        self._stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._stack[-1].children.append(Node(tag, attrs, parent=self._stack[-1]))
+
+    def handle_endtag(self, tag):
+        # Kapatılmamış etiketlere tolerans: eşleşen açık etikete kadar yığını boşalt.
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                return
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+def parse_html(markup):
+    builder = _TreeBuilder()
+    builder.feed(markup)
+    builder.close()
+    return builder.root
+
+
+# --- HTTP Motoru ---
+class GoldClubHttpBot(GoldClubBot):
+    """
+    GoldClubBot ile aynı adımları (giriş, sipariş, ürün detayı, veri çekme)
+    Selenium yerine tek bir requests.Session ile yürütür. WHMCS formlarındaki
+    gizli alanlar (CSRF `token` dahil) formdan olduğu gibi toplanıp gönderilir,
+    çerezler Session üzerinde taşınır.
+    """
+
+    engine = 'http'
+
+    def __init__(self, *args, timeout=20, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeout = timeout
+        self.http = None
+        self.page = None
+        self.page_url = None
+
+    # --- Sayfa ve Form Yardımcıları ---
+    def _is_retryable(self, error):
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code >= 500
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def _request_timeout(self, timeout=None):
+        return min(self.timeout, timeout if timeout is not None else self.deadline.remaining())
+
+    def _load(self, response):
+        response.raise_for_status()
+        self.page = parse_html(response.text)
+        self.page_url = response.url
+        error = self._detect_page_error()
+        if error:
+            raise FatalStepError(error)
+
+    def _detect_page_error(self):
+        alert = self.page.find(lambda n: any(cls in n.get('class', '').split() for cls in ('alert-danger', 'alert-error')) and n.text().strip())
+        return f"Sayfa hata bildirdi: {alert.text().strip()}" if alert is not None else None
+
+    def _get(self, url):
+        # GET istekleri güvenle yeniden denenebilir; formlar (POST) ise tek sefer gönderilir.
+        url = urljoin(self.page_url or self.base_url, url)
+        self._with_retry(lambda timeout: self._load(self.http.get(url, timeout=self._request_timeout(timeout))), f"'{url}' yükleme")
+
+    def _by_id(self, element_id):
+        node = self.page.find(lambda n: n.get('id') == element_id)
+        if node is None:
+            raise Exception(f"Element '{element_id}' sayfada bulunamadı ({self.page_url}).")
+        return node
+
+    def _by_text(self, tag, text):
+        node = self.page.find(lambda n: n.tag == tag and text in n.text())
+        if node is None:
+            raise Exception(f"'{text}' içeren <{tag}> sayfada bulunamadı ({self.page_url}).")
+        return node
+
+    def _form_fields(self, form):
+        fields = []
+        for node in form.iter():
+            name = node.get('name')
+            if not name or 'disabled' in node.attrs:
+                continue
+            if node.tag == 'input':
+                input_type = node.get('type', 'text').lower()
+                if input_type in ('submit', 'button', 'image', 'reset', 'file'):
+                    continue
+                if input_type in ('checkbox', 'radio') and 'checked' not in node.attrs:
+                    continue
+                fields.append((name, node.get('value', 'on' if input_type in ('checkbox', 'radio') else '')))
+            elif node.tag == 'textarea':
+                fields.append((name, node.text()))
+            elif node.tag == 'select':
+                options = node.find_all(lambda n: n.tag == 'option')
+                selected = next((o for o in options if 'selected' in o.attrs), options[0] if options else None)
+                if selected is not None:
+                    fields.append((name, selected.get('value', selected.text().strip())))
+        return fields
+
+    def _submit(self, form, overrides=None, submitter=None):
+        data = [(name, value) for name, value in self._form_fields(form) if name not in (overrides or {})]
+        data.extend((overrides or {}).items())
+        if submitter is not None and submitter.get('name'):
+            data.append((submitter.get('name'), submitter.get('value', '')))
+        action = urljoin(self.page_url, form.get('action') or self.page_url)
+        if form.get('method', 'get').lower() == 'post':
+            self._load(self.http.post(action, data=data, timeout=self._request_timeout()))
+        else:
+            self._load(self.http.get(action, params=data, timeout=self._request_timeout()))
+
+    def _click(self, node):
+        """Bir tıklamanın HTTP karşılığını uygular: link ise takip eder, form düğmesi ise formu gönderir."""
+        if node.tag == 'a' and node.get('href') and not node.get('href').startswith(('#', 'javascript:')):
+            return self._get(node.get('href'))
+        onclick = node.get('onclick', '')
+        location = re.search(r"location(?:\.href)?\s*=\s*['\"]([^'\"]+)['\"]", onclick)
+        if location:
+            return self._get(location.group(1))
+        form = node.closest('form')
+        if form is not None:
+            return self._submit(form, submitter=node)
+        raise Exception(f"'{node.get('id') or node.tag}' öğesinin HTTP karşılığı bulunamadı ({self.page_url}).")
+
+    # --- Bot Adımları ---
+    def _setup_driver(self):
+        self._report_status("-> HTTP oturumu hazırlanıyor...")
+        self.http = requests.Session()
+        self.http.headers['User-Agent'] = BROWSER_USER_AGENT
+        self.http.mount('http://', _adapter)
+        self.http.mount('https://', _adapter)
+
+    def _export_cookies(self):
+        return [{'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path, 'secure': c.secure, 'expiry': c.expires} for c in self.http.cookies]
+
+    def _import_cookies(self, cookies):
+        for cookie in cookies:
+            self.http.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain') or '', path=cookie.get('path') or '/', secure=bool(cookie.get('secure')), expires=cookie.get('expiry'))
+
+    def _session_is_valid(self):
+        self._get(f"{self.base_url}clientarea.php")
+        return "clientarea.php" in self.page_url and "rp=/login" not in self.page_url
+
+    def _perform_login(self):
+        self._report_status("-> Giriş yapılıyor...")
+        self._get(f"{self.base_url}index.php?rp=/login")
+        email_input = self._by_id("inputEmail")
+        password_input = self._by_id("inputPassword")
+        form = email_input.closest('form')
+        self._submit(form, {email_input.get('name'): self.email, password_input.get('name'): self.password}, submitter=self._by_id("login"))
+        if "clientarea.php" not in self.page_url:
+            raise Exception("Giriş başarısız: kullanıcı paneline yönlendirilmedi.")
+
+    def _order_free_trial(self):
+        self._report_status("-> Ücretsiz deneme sipariş ediliyor...")
+        self._get(f"{self.base_url}index.php?rp=/store/free-trial")
+        self._click(self._by_id("product7-order-button"))
+        self._click(self._by_id("checkout"))
+        complete_button = self._by_id("btnCompleteOrder")
+        form = complete_button.closest('form')
+        # Sözleşme onay kutusu işaretlenmiş gibi forma eklenir.
+        label = self._by_text('label', 'I have read and agree to the')
+        checkbox = label.find(lambda n: n.tag == 'input') or (self.page.find(lambda n: n.get('id') == label.get('for')) if label.get('for') else None)
+        overrides = {checkbox.get('name'): checkbox.get('value', 'on')} if checkbox is not None and checkbox.get('name') else {}
+        self._submit(form, overrides, submitter=complete_button)
+        if "cart.php?a=complete" not in self.page_url:
+            raise Exception("Sipariş tamamlanamadı: onay sayfasına ulaşılamadı.")
+
+    def _navigate_to_product_details(self):
+        self._report_status("-> Ürün detayları sayfasına gidiliyor...")
+        self._click(self._by_text('a', "Continue To Client Area"))
+        self._click(self._by_text('button', "View Details"))
+
+    def _extract_data(self):
+        self._report_status("-> Temel veriler çekiliyor...")
+        m3u_link = self._by_id("m3ulinks").get('value', '').strip()
+        expiry_date = ''
+        for div in self.page.find_all(lambda n: n.tag == 'div'):
+            strong = next((c for c in div.children if isinstance(c, Node) and c.tag == 'strong'), None)
+            if strong is not None and 'Expiry Date:' in div.text():
+                expiry_date = strong.text().strip()
+                break
+
+        if not (m3u_link and expiry_date):
+            raise Exception("M3U linki veya son kullanma tarihi alınamadı.")
+
+        self._report_status("-> M3U Linki başarıyla alındı.")
+        return {"url": m3u_link, "expiry": expiry_date}
+
+    def _cleanup(self):
+        if self.http:
+            # Paylaşılan bağlantı havuzu kapanmasın diye adaptörler Session kapatılmadan önce ayrılır.
+            self.http.adapters.clear()
+            self.http.close()
+            self.http = None
+            self._report_status("-> HTTP oturumu kapatıldı.")
@@ -0,0 +1,98 @@
+# leader_lease.py (Birden fazla işçi/örnek arasında veritabanı tabanlı lider seçimi)
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+
+def make_node_id():
+    """Bu sürece özgü kimlik: makine adı, PID ve rastgele bir son ek."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaderLease:
+    """
+    Tek satırlık bir kira (lease) kaydı üzerinden lider seçer. Lider kirayı
+    `ttl` süresinin üçte birinde bir yeniler; lider düşerse kira süresi dolar
+    ve ilk yenileme turunda başka bir düğüm devralır. Kira alma işlemi koşullu
+    bir UPDATE olduğu için aynı anda yalnızca bir düğüm başarılı olur.
+    Liderlik kazanılınca on_elected, kaybedilince on_demoted çağrılır.
+    """
+
+    def __init__(self, app, db, model, name, node_id, socketio, ttl=60, on_elected=None, on_demoted=None):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.name = name
+        self.node_id = node_id
+        self.socketio = socketio
+        self.ttl = ttl
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+
+    def run(self):
+        while True:
+            try:
+                acquired = self.try_acquire()
+            except Exception as e:
+                print(f"Lider kirası yenilenemedi: {e}")
+                acquired = False
+            self._set_leader(acquired)
+            self.socketio.sleep(max(1, self.ttl / 3))
+
+    def try_acquire(self):
+        now = datetime.utcnow()
+        values = {'holder': self.node_id, 'expires_at': now + timedelta(seconds=self.ttl)}
+        with self.app.app_context():
+            session = self.db.session
+            updated = self.model.query.filter(
+                self.model.name == self.name,
+                or_(self.model.holder == self.node_id, self.model.expires_at < now)
+            ).update(values, synchronize_session=False)
+            if updated:
+                session.commit()
+                return True
+            if session.get(self.model, self.name) is not None:
+                session.rollback()
+                return False
+            session.add(self.model(name=self.name, **values))
+            try:
+                session.commit()
+                return True
+            except IntegrityError:
+                # Başka bir düğüm satırı aynı anda oluşturdu; kira onundur.
+                session.rollback()
+                return False
+
+    def release(self):
+        """Kapanışta kirayı hemen bırakır, böylece diğer düğüm süre dolmasını beklemeden devralır."""
+        if not self.is_leader:
+            return
+        try:
+            with self.app.app_context():
+                self.model.query.filter_by(name=self.name, holder=self.node_id).update({'expires_at': datetime.utcnow()}, synchronize_session=False)
+                self.db.session.commit()
+        except Exception as e:
+            print(f"Lider kirası bırakılamadı: {e}")
+        self._set_leader(False)
+
+    def holder(self):
+        with self.app.app_context():
+            record = self.db.session.get(self.model, self.name)
+            if record is None:
+                return None
+            return {'node': record.holder, 'expires_at': record.expires_at.isoformat(), 'active': record.expires_at > datetime.utcnow()}
+
+    def _set_leader(self, leader):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        print(f"Düğüm {self.node_id} '{self.name}' için {'lider oldu' if leader else 'liderliği bıraktı'}.")
+        callback = self.on_elected if leader else self.on_demoted
+        if callback:
+            callback()
@@ -0,0 +1,96 @@
+# link_prober.py (Kayıtlı M3U linklerinin eşzamanlı, asenkron canlılık denetimi)
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from user_agents import PLAYER_USER_AGENT
+
+PLAYLIST_MARKER = b'#EXTM3U'
+
+
+def classify(http_status, head):
+    """Yanıtın durumunu ve ilk baytlarını canlılık durumuna çevirir: alive, dead veya error."""
+    if http_status in (200, 206):
+        # Süresi dolmuş hesaplar çoğu panelde 200 ile boş gövde döndürür; geçerli liste #EXTM3U ile başlar.
+        return 'alive' if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(PLAYLIST_MARKER) else 'dead'
+    if http_status == 429 or http_status >= 500:
+        return 'error'
+    return 'dead'
+
+
+class HostThrottle:
+    """Aynı sunucuya gönderilen istekleri saniyede en fazla `rate` olacak şekilde aralıklandırır."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = defaultdict(float)
+        self._locks = defaultdict(asyncio.Lock)
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        async with self._locks[host]:
+            now = time.monotonic()
+            delay = self._next[host] - now
+            self._next[host] = max(now, self._next[host]) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class LinkProber:
+    """
+    Linklerin tamamını tek bir turda, tek bir asyncio döngüsünde denetler. Bağlantılar
+    ortak bir havuzdan (en fazla `concurrency` adet) kullanılır; aynı sunucuya en fazla
+    `per_host` istek aynı anda gider ve istekler `host_rate` ile aralıklandırılır. Her
+    linkten yalnızca ilk `probe_bytes` bayt (Range ile) okunur, listenin tamamı indirilmez.
+
+    sweep() bloklayan bir çağrıdır; eventlet hub'ını bekletmemek için tpool'da çalıştırılır.
+    """
+
+    def __init__(self, concurrency=50, per_host=10, host_rate=50.0, timeout=10, probe_bytes=2048):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_rate = host_rate
+        self.timeout = timeout
+        self.probe_bytes = probe_bytes
+
+    def sweep(self, links):
+        """links: (id, url) çiftleri. Her link için durum, gecikme ve denetim zamanını döndürür."""
+        links = list(links)
+        if not links:
+            return []
+        return asyncio.run(self._sweep(links))
+
+    async def _sweep(self, links):
+        # Kilitler ve semaforlar döngüye bağlı olduğu için her turda yeniden oluşturulur.
+        slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        throttle = HostThrottle(self.host_rate)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        headers = {'User-Agent': PLAYER_USER_AGENT, 'Range': f'bytes=0-{self.probe_bytes - 1}'}
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            return await asyncio.gather(*(self._probe(session, slots, throttle, link_id, url) for link_id, url in links))
+
+    async def _probe(self, session, slots, throttle, link_id, url):
+        host = urlsplit(url).netloc
+        http_status, latency_ms = None, None
+        async with slots[host]:
+            await throttle.wait(host)
+            started = time.monotonic()
+            try:
+                # Süre, sıra beklemesi dahil edilmeden yalnızca isteğin kendisi için ölçülür.
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                    http_status = response.status
+                    head = await response.content.read(self.probe_bytes)
+                    latency_ms = round((time.monotonic() - started) * 1000)
+                    if not response.content.at_eof():
+                        # Range desteklemeyen sunucularda listenin geri kalanı indirilmesin.
+                        response.close()
+                status = classify(http_status, head)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                status = 'error'
+        return {'id': link_id, 'probe_status': status, 'probe_http_status': http_status, 'probe_latency_ms': latency_ms, 'probe_checked_at': datetime.utcnow()}
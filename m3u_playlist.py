@@ -0,0 +1,407 @@
+# m3u_playlist.py (M3U listelerinin akış hâlinde ayrıştırılması ve grup/ad/tvg-id ile dizinlenen kanal tablosu)
+
+import hashlib
+import re
+import uuid
+from datetime import date, datetime, timedelta
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+import eventlet
+import requests
+from eventlet.event import Event
+from sqlalchemy import literal, or_, select
+
+from executor import native_queue, run_blocking, spawn_native
+from user_agents import PLAYER_USER_AGENT
+
+EXTINF_PREFIX = '#EXTINF:'
+ATTRIBUTE = re.compile(r'([\w-]+)="([^"]*)"')
+# Kanal adreslerinde hesap bilgilerinin yerine geçen yer tutucular; URL'lerde süslü parantez geçmez.
+USERNAME_SLOT = '{username}'
+PASSWORD_SLOT = '{password}'
+
+
+def parse_extinf(line):
+    """'#EXTINF:-1 tvg-id="x" group-title="y",Kanal Adı' satırından öznitelikleri ve kanal adını çıkarır."""
+    body = line[len(EXTINF_PREFIX):]
+    # Kanal adı, tırnak dışındaki ilk virgülden sonra gelir; öznitelik değerlerinde virgül olabilir.
+    quoted = False
+    split_at = -1
+    for index, char in enumerate(body):
+        if char == '"':
+            quoted = not quoted
+        elif char == ',' and not quoted:
+            split_at = index
+            break
+    attributes = dict(ATTRIBUTE.findall(body if split_at < 0 else body[:split_at]))
+    name = body[split_at + 1:].strip() if split_at >= 0 else ''
+    return attributes, name
+
+
+def iter_channels(lines):
+    """
+    Satır satır gelen M3U içeriğinden kanalları üretir; liste hiçbir zaman tamamen
+    belleğe alınmaz. Satırlar bytes veya str olabilir. #EXTGRP satırı, group-title
+    özniteliği olmayan kanallar için grubu belirler; diğer yönerge satırları atlanır.
+    """
+    pending = None
+    position = 0
+    for raw in lines:
+        line = (raw.decode('utf-8', 'replace') if isinstance(raw, bytes) else raw).strip()
+        if not line:
+            continue
+        if line.startswith(EXTINF_PREFIX):
+            attributes, name = parse_extinf(line)
+            pending = {'extinf': line, 'name': name or attributes.get('tvg-name', ''), 'group_title': attributes.get('group-title', ''), 'tvg_id': attributes.get('tvg-id', '')}
+        elif line.startswith('#EXTGRP:'):
+            if pending is not None and not pending['group_title']:
+                pending['group_title'] = line[len('#EXTGRP:'):].strip()
+        elif line.startswith('#'):
+            continue
+        elif pending is not None:
+            pending['url'] = line
+            pending['position'] = position
+            position += 1
+            yield pending
+            pending = None
+
+
+def credentials(m3u_url):
+    """get.php?username=...&password=... biçimindeki liste adresinden hesap bilgilerini çıkarır; yoksa None."""
+    query = parse_qs(urlsplit(m3u_url).query)
+    username, password = query.get('username', [''])[0], query.get('password', [''])[0]
+    return (username, password) if username and password else None
+
+
+def to_template(url, account):
+    """
+    Kanal adresindeki hesap bilgilerini yer tutucularla değiştirir. Xtream panelleri bunları
+    /live/<kullanıcı>/<şifre>/<id>.ts gibi yol parçalarında veya sorgu parametrelerinde taşır.
+    """
+    if account is None:
+        return url
+    username, password = account
+    return (url.replace(f'/{username}/{password}/', f'/{USERNAME_SLOT}/{PASSWORD_SLOT}/')
+            .replace(f'username={username}', f'username={USERNAME_SLOT}')
+            .replace(f'password={password}', f'password={PASSWORD_SLOT}'))
+
+
+def fill_template(url, account):
+    if account is None or '{' not in url:
+        return url
+    return url.replace(USERNAME_SLOT, account[0]).replace(PASSWORD_SLOT, account[1])
+
+
+def fingerprint(channel):
+    """Hesap bilgilerinden bağımsız kanal özeti; yeni linkte aynı kalan kanallar bununla tanınır."""
+    return hashlib.blake2b(f"{channel['extinf']}\n{channel['url']}".encode('utf-8'), digest_size=8).hexdigest()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ChannelIndex:
+    """
+    Her link için M3U listesini bir kez indirip kanal tablosuna yazar; filtrelenmiş
+    listeler istek başına yeniden ayrıştırılmadan bu tablodan üretilir.
+
+    İndirme ve ayrıştırma native bir iş parçacığında yapılır (büyük listelerde hub
+    bloklanmasın diye); kanallar `batch_size`'lık parçalar hâlinde sınırlı bir kuyruk
+    üzerinden hub'a aktarılır ve tek bir işlemde (transaction) yazılır. Böylece bellek
+    kullanımı liste boyutundan bağımsız kalır. Her parça kendi kısa işleminde yazılır
+    (indirme beklenirken veritabanı kilidi tutulmaz); link, son küçük işlemde kaynağı
+    atanıp dizinlendi olarak işaretlenene kadar okuyucular yarım dizini görmez.
+
+    Kanal adresleri hesap bilgileri yer tutucularla değiştirilmiş olarak saklanır ve
+    liste üretilirken linkin kendi bilgileriyle doldurulur. Yeni bir link dizinlenirken
+    kanallar aynı sunucudaki önceki linkin kanallarıyla özetleri üzerinden sırayla
+    karşılaştırılır: liste aynıysa yeni link önceki kanal satırlarını paylaşır ve hiçbir
+    satır yazılmaz; ortak başlangıç kısmı veritabanı içinde tek sorguyla kopyalanır,
+    yalnızca ilk farklı kanaldan sonrası yeniden yazılır. Kanal satırlarının sahibi
+    (PlaylistChannel.link_id) linkin channel_source_id değeridir.
+
+    Bir linki aynı anda yalnızca bir dizinleme yazar: dizinleme, linkin indexing_owner ve
+    indexing_claimed_at sütunlarına koşullu bir UPDATE ile sahiplenilir. Diğer işçi ve
+    düğümler dizin hazır olana kadar bekler (yoklar). Sahip her parçayı, sahipliğini aynı
+    işlemde yenileyerek yazar; `claim_seconds` boyunca yenilenmeyen sahiplik (ör. işçi öldü)
+    başka bir işçi tarafından devralınır. Sahipliğini kaybeden dizinleme yazmayı bırakır ve
+    hiçbir satırı silmez; satırlar yalnızca sahiplik elde tutulurken silinir.
+    """
+
+    def __init__(self, app, db, link_model, channel_model, fetch_timeout=60, batch_size=1000, queue_size=4, claim_seconds=300, poll_seconds=0.5):
+        self.app = app
+        self.db = db
+        self.link_model = link_model
+        self.channel_model = channel_model
+        self.fetch_timeout = fetch_timeout
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.claim_seconds = claim_seconds
+        self.poll_seconds = poll_seconds
+        self._building = {}
+
+    def ensure(self, link_id):
+        """Link henüz dizinlenmediyse dizinler; aynı link için eşzamanlı istekler tek dizinlemeyi bekler."""
+        with self.app.app_context():
+            link = self.db.session.get(self.link_model, link_id)
+            if link is None:
+                raise LookupError(f"Link #{link_id} bulunamadı.")
+            if link.channels_indexed_at is not None:
+                return link.channel_count
+        # Bu süreçteki istekler tek bir bekleyişte birleşir; süreçler arası tekillik veritabanındaki sahipliktir.
+        building = self._building.get(link_id)
+        if building is not None:
+            return building.wait()
+        building = self._building[link_id] = _Pending()
+        try:
+            building.result = self._build_or_wait(link_id)
+            return building.result
+        except Exception as e:
+            building.error = e
+            raise
+        finally:
+            building.done()
+            self._building.pop(link_id, None)
+
+    def _build_or_wait(self, link_id):
+        waited = False
+        while True:
+            with self.app.app_context():
+                link = self.db.session.get(self.link_model, link_id)
+                if link is None:
+                    raise LookupError(f"Link #{link_id} bulunamadı.")
+                if link.channels_indexed_at is not None:
+                    return link.channel_count
+                if waited and link.indexing_owner is None:
+                    # Beklenen dizinleme hatayla bitti ve sahipliği bıraktı; hata bu istekte tekrarlanmaz.
+                    raise RuntimeError(f"Link #{link_id} için M3U listesi başka bir işçide dizinlenemedi.")
+                owner = self._claim(link_id)
+            if owner is not None:
+                try:
+                    return self.build(link_id, owner)
+                except ClaimLost:
+                    pass  # Sahiplik süresi dolup devralındı; yeni sahibin bitirmesi beklenir.
+            # Başka bir işçi dizinliyor; hazır olmasını veya sahipliğin düşmesini bekle.
+            waited = True
+            eventlet.sleep(self.poll_seconds)
+
+    def _claim(self, link_id):
+        """Dizinlenmemiş ve sahipsiz (ya da sahipliği süresi dolmuş) linki sahiplenir; başarılıysa sahip kimliğini döndürür."""
+        owner = uuid.uuid4().hex
+        now = datetime.utcnow()
+        model = self.link_model
+        claimed = (self.db.session.query(model)
+                   .filter(model.id == link_id, model.channels_indexed_at.is_(None),
+                           or_(model.indexing_owner.is_(None), model.indexing_claimed_at < now - timedelta(seconds=self.claim_seconds)))
+                   .update({'indexing_owner': owner, 'indexing_claimed_at': now}, synchronize_session=False))
+        self.db.session.commit()
+        return owner if claimed else None
+
+    def _renew(self, link_id, owner):
+        """Sahipliği çağıranın işleminde yeniler; sahiplik kaybedildiyse ClaimLost fırlatır (işlem geri alınmalıdır)."""
+        model = self.link_model
+        renewed = (self.db.session.query(model).filter(model.id == link_id, model.indexing_owner == owner)
+                   .update({'indexing_claimed_at': datetime.utcnow()}, synchronize_session=False))
+        if not renewed:
+            raise ClaimLost(f"Link #{link_id} dizinlemesi başka bir işçiye geçti.")
+
+    def build(self, link_id, owner=None):
+        if owner is None:
+            with self.app.app_context():
+                owner = self._claim(link_id)
+            if owner is None:
+                raise ClaimLost(f"Link #{link_id} başka bir işçi tarafından dizinleniyor.")
+        with self.app.app_context():
+            link = self.db.session.get(self.link_model, link_id)
+            url = link.m3u_url
+            source = self._previous_source(link)
+            # Sahipliği devralınan, yarıda kalmış bir dizinlemenin satırları; önceki sahip artık yazamaz.
+            self._discard(link_id, owner)
+        batches = native_queue.Queue(maxsize=self.queue_size)
+        spawn_native(self._produce, url, batches)
+        started = datetime.utcnow()
+        shared = written = 0
+        with self.app.app_context():
+            session = self.db.session
+            try:
+                previous = self._fingerprints(source) if source else iter(())
+                diverged = source is None
+                for batch in self._receive(batches):
+                    self._renew(link_id, owner)
+                    if not diverged:
+                        matched = 0
+                        for channel in batch:
+                            if next(previous, None) != channel['fingerprint']:
+                                diverged = True
+                                break
+                            matched += 1
+                        shared += matched
+                        if diverged:
+                            # İlk farklı kanal: o ana kadarki ortak kısım önceki linkten kopyalanır.
+                            self._copy_prefix(source, link_id, shared)
+                        batch = batch[matched:]
+                    if batch:
+                        for channel in batch:
+                            channel['link_id'] = link_id
+                        session.execute(self.channel_model.__table__.insert(), batch)
+                        written += len(batch)
+                    # Sonraki parça beklenirken hiçbir işlem (okuma dahil) açık kalmaz; SQLite'ta açık bir
+                    # işlem diğer yazıcıları kilitler. Satırlar link kendi kaynağı olarak işaretlenene kadar
+                    # okunmaz (ensure() dizinlemeyi bekletir), bu yüzden parça parça commit güvenlidir. Parça,
+                    # sahiplik yenilemesiyle aynı işlemde yazılır: sahipliği kaybeden işçinin parçası kaydedilmez.
+                    session.commit()
+                total = shared + written
+                if not total:
+                    raise ValueError("M3U listesi boş veya geçersiz.")
+                if diverged:
+                    source_id = link_id
+                elif next(previous, None) is None:
+                    source_id = source  # Liste birebir aynı: satırlar paylaşılır.
+                else:
+                    # Yeni liste öncekinin kısaltılmış hâli.
+                    self._copy_prefix(source, link_id, shared)
+                    source_id = link_id
+                self._renew(link_id, owner)
+                session.query(self.link_model).filter_by(id=link_id).update({'channel_source_id': source_id, 'channel_count': total, 'channels_indexed_at': datetime.utcnow(),
+                                                                             'indexing_owner': None, 'indexing_claimed_at': None}, synchronize_session=False)
+                session.commit()
+            except ClaimLost:
+                session.rollback()
+                raise
+            except Exception:
+                session.rollback()
+                self._discard(link_id, owner, release=True)
+                raise
+        print(f"Link #{link_id} için {total} kanal dizinlendi ({shared} kanal önceki listeden aynen alındı, {written} kanal yazıldı; {(datetime.utcnow() - started).total_seconds():.1f} sn).")
+        return total
+
+    def _discard(self, link_id, owner, release=False):
+        """Linkin kanal satırlarını yalnızca sahiplik hâlâ `owner`'daysa siler; release=True ise sahipliği de bırakır."""
+        try:
+            self._renew(link_id, owner)
+            self.db.session.query(self.channel_model).filter_by(link_id=link_id).delete(synchronize_session=False)
+            if release:
+                self.db.session.query(self.link_model).filter_by(id=link_id).update({'indexing_owner': None, 'indexing_claimed_at': None}, synchronize_session=False)
+            self.db.session.commit()
+        except ClaimLost:
+            self.db.session.rollback()
+        except Exception as e:
+            self.db.session.rollback()
+            print(f"Link #{link_id} için yarım kalan kanal satırları silinemedi: {e}")
+
+    def _receive(self, batches):
+        while True:
+            try:
+                batch = run_blocking(batches.get, timeout=self.fetch_timeout)
+            except native_queue.Empty:
+                raise TimeoutError("M3U listesi indirilirken zaman aşımı oluştu.")
+            if batch is None:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+
+    def _previous_source(self, link):
+        """Aynı sunucudan, süresi dolmamış ve dizinlenmiş en yeni linkin kanal kaynağı."""
+        parts = urlsplit(link.m3u_url)
+        model = self.link_model
+        row = (self.db.session.query(model.channel_source_id)
+               .filter(model.id != link.id, model.channel_source_id.isnot(None),
+                       model.m3u_url.startswith(f"{parts.scheme}://{parts.netloc}/", autoescape=True),
+                       (model.expires_on.is_(None)) | (model.expires_on > date.today()))
+               .order_by(model.id.desc()).first())
+        return row.channel_source_id if row else None
+
+    def _fingerprints(self, source_id, chunk_rows=5000):
+        # Önceki listenin özetleri sırayla ve parça parça okunur; tamamı belleğe alınmaz.
+        model = self.channel_model
+        position = -1
+        while True:
+            rows = (self.db.session.query(model.position, model.fingerprint)
+                    .filter(model.link_id == source_id, model.position > position)
+                    .order_by(model.position).limit(chunk_rows).all())
+            if not rows:
+                return
+            for row in rows:
+                yield row.fingerprint
+            position = rows[-1].position
+
+    def _copy_prefix(self, source_id, link_id, count):
+        if not count:
+            return
+        table = self.channel_model.__table__
+        columns = [column.name for column in table.columns if column.name not in ('id', 'link_id')]
+        rows = select(literal(link_id), *(table.c[name] for name in columns)).where(table.c.link_id == source_id, table.c.position < count)
+        self.db.session.execute(table.insert().from_select(['link_id', *columns], rows))
+
+    def _produce(self, url, batches):
+        # Native iş parçacığında çalışır; hub'a yalnızca kuyruk üzerinden veri aktarılır.
+        account = credentials(url)
+        try:
+            with requests.get(url, stream=True, timeout=self.fetch_timeout, headers={'User-Agent': PLAYER_USER_AGENT}) as response:
+                response.raise_for_status()
+                for batch in batched(iter_channels(response.iter_lines(chunk_size=64 * 1024)), self.batch_size):
+                    for channel in batch:
+                        channel['url'] = to_template(channel['url'], account)
+                        channel['fingerprint'] = fingerprint(channel)
+                    batches.put(batch, timeout=self.fetch_timeout)
+            batches.put(None, timeout=self.fetch_timeout)
+        except native_queue.Full:
+            pass  # Tüketici vazgeçti (hata veya zaman aşımı).
+        except Exception as e:
+            try:
+                batches.put(e, timeout=self.fetch_timeout)
+            except native_queue.Full:
+                pass
+
+    def query(self, link, groups=None, tvg_ids=None, search=None):
+        model = self.channel_model
+        query = self.db.session.query(model.extinf, model.url).filter(model.link_id == (link.channel_source_id or link.id))
+        if groups:
+            query = query.filter(model.group_title.in_(groups))
+        if tvg_ids:
+            query = query.filter(model.tvg_id.in_(tvg_ids))
+        if search:
+            query = query.filter(model.name.ilike(f"%{search}%"))
+        return query.order_by(model.position)
+
+    def render(self, link, query, chunk_rows=500):
+        """Filtrelenmiş kanalları, adresleri linkin hesap bilgileriyle doldurarak parça parça M3U metni olarak üretir."""
+        account = credentials(link.m3u_url)
+        yield '#EXTM3U\n'
+        for rows in batched(query.yield_per(chunk_rows), chunk_rows):
+            yield ''.join(f"{row.extinf}\n{fill_template(row.url, account)}\n" for row in rows)
+
+    def groups(self, link):
+        model = self.channel_model
+        rows = self.db.session.query(model.group_title, self.db.func.count()).filter(model.link_id == (link.channel_source_id or link.id)).group_by(model.group_title).order_by(model.group_title)
+        return [{'group': group, 'channels': count} for group, count in rows]
+
+
+class ClaimLost(Exception):
+    """Dizinleme sahipliği başka bir işçiye geçti; bu dizinleme yazmayı bırakır."""
+
+
+class _Pending:
+    """Aynı link için süren dizinlemeyi bekleyen istekler için sonuç taşıyıcısı."""
+
+    def __init__(self):
+        self._event = Event()
+        self.result = None
+        self.error = None
+
+    def done(self):
+        self._event.send()
+
+    def wait(self):
+        self._event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
@@ -0,0 +1,103 @@
+# metrics.py (Aşama süreleri, sayaçlar ve Prometheus metin formatında dışa aktarım)
+
+import os
+import time
+from contextlib import contextmanager
+
+import psutil
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+from browser_watchdog import total_rss
+
+REGISTRY = CollectorRegistry()
+
+RUN_DURATION = Histogram('goldclub_run_duration_seconds', 'Bir bot çalıştırmasının toplam süresi', ['engine', 'outcome'],
+                         buckets=(1, 2, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300), registry=REGISTRY)
+RUNS_TOTAL = Counter('goldclub_runs_total', 'Sonuçlanan bot çalıştırmaları', ['engine', 'outcome', 'failed_step'], registry=REGISTRY)
+PHASE_DURATION = Histogram('goldclub_phase_duration_seconds', 'Bot aşamalarının süresi', ['engine', 'phase'],
+                           buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80), registry=REGISTRY)
+RETRY_SECONDS = Counter('goldclub_retry_seconds_total', 'Adımların yeniden denemeye harcadığı süre', ['engine', 'step'], registry=REGISTRY)
+RETRIES_TOTAL = Counter('goldclub_retries_total', 'Adımlardaki yeniden deneme sayısı', ['engine', 'step'], registry=REGISTRY)
+DB_COMMIT_DURATION = Histogram('goldclub_db_commit_seconds', 'Veritabanı commit süresi', ['operation'],
+                               buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5), registry=REGISTRY)
+SMTP_SEND_DURATION = Histogram('goldclub_smtp_send_seconds', 'SMTP gönderim süresi', ['outcome'],
+                               buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30), registry=REGISTRY)
+CHROME_RSS = Gauge('goldclub_chrome_rss_bytes', 'Chrome ve chromedriver süreçlerinin toplam RSS değeri', registry=REGISTRY)
+CHROME_PROCESSES = Gauge('goldclub_chrome_processes', 'Çalışan Chrome ve chromedriver süreç sayısı', registry=REGISTRY)
+LINK_LIVENESS = Gauge('goldclub_links_liveness', 'Son canlılık denetimindeki link sayıları', ['status'], registry=REGISTRY)
+LINK_PROBE_DURATION = Histogram('goldclub_link_probe_seconds', 'Bir canlılık denetimi turunun süresi',
+                                buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120), registry=REGISTRY)
+BROWSER_KILLS = Gauge('goldclub_browser_kills', 'Watchdog tarafından öldürülen tarayıcı ağaçları (işçi başladığından beri)', ['reason'], registry=REGISTRY)
+
+
+class RunTimer:
+    """
+    Tek bir çalıştırmanın aşama sürelerini toplar. Bot native iş parçacığında
+    çalıştığı için burada yalnızca ölçüm yapılır; Prometheus'a yazma işi
+    record_run() ile hub tarafında yapılır.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases = {}
+
+    @contextmanager
+    def span(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0.0) + time.monotonic() - started, 3)
+
+    def breakdown(self):
+        return {'total': round(time.monotonic() - self.started, 3), 'phases': dict(self.phases)}
+
+
+@contextmanager
+def observe(histogram, **labels):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.monotonic() - started)
+
+
+def record_run(result):
+    """Bot sonucundaki zamanlama ve yeniden deneme bilgilerini metriklere işler."""
+    engine = result.get('engine', 'unknown')
+    outcome = 'failure' if 'error' in result else 'success'
+    timings = result.get('timings') or {}
+    for phase, seconds in timings.get('phases', {}).items():
+        PHASE_DURATION.labels(engine=engine, phase=phase).observe(seconds)
+    if 'total' in timings:
+        RUN_DURATION.labels(engine=engine, outcome=outcome).observe(timings['total'])
+    for step, entry in (result.get('retry_stats') or {}).items():
+        RETRIES_TOTAL.labels(engine=engine, step=step).inc(entry['retries'])
+        RETRY_SECONDS.labels(engine=engine, step=step).inc(entry['seconds'])
+    RUNS_TOTAL.labels(engine=engine, outcome=outcome, failed_step=result.get('failed_step', '') if outcome == 'failure' else '').inc()
+
+
+def chrome_processes():
+    procs = []
+    for proc in psutil.Process(os.getpid()).children(recursive=True):
+        try:
+            if 'chrom' in proc.name().lower():
+                procs.append(proc)
+        except psutil.Error:
+            pass
+    return procs
+
+
+def _update_chrome_gauges():
+    procs = chrome_processes()
+    CHROME_PROCESSES.set(len(procs))
+    CHROME_RSS.set(total_rss(procs))
+
+
+def render_latest(watchdog=None):
+    """Prometheus metin formatındaki çıktıyı ve içerik tipini döndürür."""
+    _update_chrome_gauges()
+    if watchdog is not None:
+        for reason, count in watchdog.snapshot()['kills'].items():
+            BROWSER_KILLS.labels(reason=reason).set(count)
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,163 @@
+# notifications.py (Kalıcı e-posta kuyruğu, tek SMTP bağlantısı ve özet gönderimi)
+
+import smtplib
+import time
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from metrics import SMTP_SEND_DURATION
+
+
+class MailSender:
+    """
+    OutboundEmail tablosundaki bekleyen iletileri arka planda gönderir. Tek bir
+    SMTP bağlantısı açık tutulup yeniden kullanılır, başarısız gönderimler üstel
+    geri çekilmeyle yeniden denenir. digest_window > 0 ise bekleyen iletiler
+    pencere dolana veya digest_max sayısına ulaşılana kadar biriktirilip tek bir
+    özet e-posta olarak gönderilir.
+
+    Gönderici hub üzerinde yeşil soketlerle çalışır; kalıcı bağlantının soketi
+    iş parçacıkları arasında paylaşılamayacağı için tpool'a taşınmaz.
+
+    Birden fazla işçi aynı kuyruğu işleyebilir: iletiler göndermeden önce koşullu bir
+    UPDATE ile 'sending' durumuna alınır ve yalnızca satırı güncelleyebilen işçi
+    gönderir. Sahiplenme `claim_seconds` sonra düşer; gönderim sırasında ölen bir
+    işçinin iletileri bu süreden sonra yeniden denenir.
+    """
+
+    def __init__(self, app, db, model, smtp_config, socketio, poll_seconds=5, max_attempts=6, base_backoff=30, digest_window=0, digest_max=10, idle_timeout=300, claim_seconds=600):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.smtp_config = smtp_config
+        self.socketio = socketio
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.digest_window = digest_window
+        self.digest_max = digest_max
+        self.idle_timeout = idle_timeout
+        self.claim_seconds = claim_seconds
+        self._smtp = None
+        self._last_used = 0.0
+
+    # --- Kuyruk ---
+    def enqueue(self, subject, body):
+        """İletiyi kuyruğa yazar ve hemen döner; çağıranın uygulama bağlamında olması gerekir."""
+        self.db.session.add(self.model(subject=subject, body=body, status='pending', attempts=0, next_attempt_at=datetime.utcnow()))
+        self.db.session.commit()
+
+    def run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self._tick()
+            except Exception as e:
+                print(f"E-posta kuyruğu işlenirken hata oluştu: {e}")
+            self.socketio.sleep(self.poll_seconds)
+
+    def _tick(self):
+        now = datetime.utcnow()
+        due = self.model.query.filter(self._claimable(now)).order_by(self.model.id).limit(max(self.digest_max, 50)).all()
+        if not due:
+            self._close_if_idle()
+            return
+        if self.digest_window > 0:
+            oldest = min(item.created_at or now for item in due)
+            if len(due) < self.digest_max and oldest > now - timedelta(seconds=self.digest_window):
+                return  # Özet penceresi henüz dolmadı.
+            batch = self._claim(due[:self.digest_max], now)
+            if not batch:
+                return
+            if len(batch) == 1:
+                self._deliver(batch, batch[0].subject, batch[0].body)
+            else:
+                body = "".join(f"<h3>{item.subject}</h3>{item.body}<hr>" for item in batch)
+                self._deliver(batch, f"Özet: {len(batch)} bildirim", body)
+        else:
+            for item in self._claim(due, now):
+                self._deliver([item], item.subject, item.body)
+
+    def _claimable(self, now):
+        # Süresi dolmuş 'sending' kayıtları, gönderirken ölen bir işçiden kalmıştır.
+        return self.model.status.in_(('pending', 'sending')) & (self.model.next_attempt_at <= now)
+
+    def _claim(self, items, now):
+        """Her ileti için koşullu UPDATE; başka bir işçinin aynı anda aldığı iletiler listeden çıkar."""
+        claimed = []
+        for item in items:
+            updated = self.model.query.filter(self.model.id == item.id, self._claimable(now)).update(
+                {'status': 'sending', 'next_attempt_at': now + timedelta(seconds=self.claim_seconds)}, synchronize_session=False)
+            if updated:
+                claimed.append(item)
+        self.db.session.commit()
+        return claimed
+
+    def _deliver(self, items, subject, body):
+        started = time.monotonic()
+        try:
+            self._send(subject, body)
+        except Exception as e:
+            SMTP_SEND_DURATION.labels(outcome='failure').observe(time.monotonic() - started)
+            self._disconnect()
+            for item in items:
+                item.attempts += 1
+                item.last_error = str(e)[:500]
+                if item.attempts >= self.max_attempts:
+                    item.status = 'failed'
+                else:
+                    item.status = 'pending'
+                    item.next_attempt_at = datetime.utcnow() + timedelta(seconds=min(3600, self.base_backoff * (2 ** (item.attempts - 1))))
+            self.db.session.commit()
+            print(f"E-posta gönderilemedi ({len(items)} ileti, yeniden denenecek): {e}")
+            return
+        SMTP_SEND_DURATION.labels(outcome='success').observe(time.monotonic() - started)
+        sent_at = datetime.utcnow()
+        for item in items:
+            item.status = 'sent'
+            item.sent_at = sent_at
+        self.db.session.commit()
+        print(f"Bildirim e-postası başarıyla gönderildi: '{subject}'")
+
+    # --- SMTP Bağlantısı ---
+    def _send(self, subject, body):
+        config = self.smtp_config
+        msg = MIMEMultipart(); msg['From'] = config['sender_email']; msg['To'] = config['receiver_email']; msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html'))
+        try:
+            self._connection().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Sunucu boşta kalan bağlantıyı kapatmış olabilir; bir kez yeni bağlantıyla denenir.
+            self._disconnect()
+            self._connection().send_message(msg)
+        self._last_used = time.monotonic()
+
+    def _connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._disconnect()
+        config = self.smtp_config
+        server = smtplib.SMTP(config['smtp_server'], config['smtp_port'], timeout=30)
+        if config.get('starttls', True):
+            server.starttls()
+        if config.get('sender_password'):
+            server.login(config['sender_email'], config['sender_password'])
+        self._smtp = server
+        return server
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _close_if_idle(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self._disconnect()
@@ -0,0 +1,155 @@
+# playlist_cache.py (Üretilmiş M3U listelerinin diskte, gzip'li kopyasıyla önbelleklenmesi ve koşullu/Range destekli sunumu)
+
+import gzip
+import hashlib
+import os
+import uuid
+
+from flask import Response, request
+from werkzeug.wsgi import wrap_file
+
+from static_assets import negotiate_encoding
+
+MIMETYPE = 'audio/x-mpegurl'
+SUFFIX = '.m3u'
+GZIP_SUFFIX = '.m3u.gz'
+
+
+class CachedPlaylist:
+    """Diskteki tek bir liste: ham ve gzip'li dosya yolları ile doğrulayıcılar (ETag, Last-Modified)."""
+
+    def __init__(self, path, digest, last_modified):
+        self.path = path
+        self.gzip_path = path[:-len(SUFFIX)] + GZIP_SUFFIX
+        self.digest = digest
+        self.last_modified = last_modified
+
+
+class PlaylistCache:
+    """
+    Her link ve filtre için üretilen M3U listesini diske bir kez yazar; oynatıcıların
+    periyodik istekleri dizine veya sağlayıcıya gitmeden bu dosyalardan karşılanır.
+    Liste yazılırken aynı anda gzip'li kopyası da üretilir, böylece sıkıştırma istek
+    başına yapılmaz. Dosya adı link, filtre ve dizinlenme zamanından türetildiği için
+    link yeniden dizinlenirse eski kopya kendiliğinden geçersiz olur.
+
+    Toplam boyut `max_bytes`'ı aşarsa en uzun süredir istenmeyen listeler silinir
+    (LRU; her istekte dosyanın mtime değeri güncellenir). Eviction dizini taradığı
+    için aynı dizini paylaşan işçiler de ortak bütçeye uyar.
+    """
+
+    def __init__(self, directory, max_bytes, compress_level=6, minimum_size=1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self.minimum_size = minimum_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, link_id, indexed_at, key):
+        digest = hashlib.sha1(f"{link_id}:{indexed_at.isoformat()}:{key}".encode('utf-8')).hexdigest()[:20]
+        return CachedPlaylist(os.path.join(self.directory, f"{link_id}-{digest}{SUFFIX}"), digest, indexed_at)
+
+    def get(self, link_id, indexed_at, key):
+        entry = self._entry(link_id, indexed_at, key)
+        try:
+            os.utime(entry.path)  # LRU için son kullanım zamanı
+        except FileNotFoundError:
+            return None
+        return entry
+
+    def store(self, link_id, indexed_at, key, chunks):
+        """chunks: str parçaları. Ham ve gzip'li dosya geçici adlara yazılıp atomik olarak yerine taşınır."""
+        entry = self._entry(link_id, indexed_at, key)
+        temporary = f"{entry.path}.{uuid.uuid4().hex}.tmp"
+        temporary_gzip = f"{entry.gzip_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary, 'wb') as raw, open(temporary_gzip, 'wb') as packed_file, \
+                    gzip.GzipFile(filename='', fileobj=packed_file, mode='wb', compresslevel=self.compress_level, mtime=0) as packed:
+                for chunk in chunks:
+                    data = chunk.encode('utf-8')
+                    raw.write(data)
+                    packed.write(data)
+            # Ham dosya en son taşınır: get() onu bulduğunda gzip'li kopya da hazırdır.
+            os.replace(temporary_gzip, entry.gzip_path)
+            os.replace(temporary, entry.path)
+        finally:
+            for path in (temporary, temporary_gzip):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.evict(keep=entry.path)
+        return entry
+
+    def evict(self, keep=None):
+        """Toplam boyut bütçenin altına inene kadar en eski listeleri (ham ve gzip'li birlikte) siler."""
+        entries = {}
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith((SUFFIX, GZIP_SUFFIX)):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                base = item.path[:-len(GZIP_SUFFIX)] if item.name.endswith(GZIP_SUFFIX) else item.path[:-len(SUFFIX)]
+                size, used = entries.get(base, (0, 0.0))
+                entries[base] = (size + stat.st_size, max(used, stat.st_mtime) if item.name.endswith(SUFFIX) else used)
+                total += stat.st_size
+        removed = 0
+        for base, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and base + SUFFIX == keep:
+                continue
+            for path in (base + SUFFIX, base + GZIP_SUFFIX):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+    def discard(self, link_ids):
+        """Silinen linklerin listelerini hemen kaldırır."""
+        prefixes = tuple(f"{link_id}-" for link_id in link_ids)
+        if not prefixes:
+            return
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if item.name.startswith(prefixes):
+                    try:
+                        os.remove(item.path)
+                    except FileNotFoundError:
+                        pass
+
+    def respond(self, entry, filename):
+        """
+        Listeyi koşullu istek (If-None-Match/If-Modified-Since → 304) ve Range desteğiyle sunar.
+        Range isteklerinde bayt aralıkları ham dosyaya göre verilir; diğerlerinde istemci kabul
+        ediyorsa (ve liste çok küçük değilse) gzip'li kopya gönderilir. Dosya get() ile store()
+        arasında veya sonrasında eviction/discard ile silinmişse FileNotFoundError yükselir;
+        çağıran listeyi yeniden üretmelidir.
+        """
+        encoding = None
+        if not request.range and os.path.getsize(entry.path) >= self.minimum_size:
+            encoding = negotiate_encoding(request.accept_encodings, ('gzip',))
+        # Dosya açık tutulduğu sürece eviction ile silinse bile gönderim tamamlanır.
+        file = open(entry.gzip_path if encoding else entry.path, 'rb')
+        try:
+            size = os.fstat(file.fileno()).st_size
+            response = Response(wrap_file(request.environ, file), mimetype=MIMETYPE, direct_passthrough=True)
+            response.content_length = size
+            response.last_modified = entry.last_modified
+            response.set_etag(f"{entry.digest}-{encoding}" if encoding else entry.digest)
+            response.headers['Content-Disposition'] = f'inline; filename="{filename}"'
+            # Linke özel token içerdiği için paylaşılan önbelleklerde tutulmaz; her seferinde doğrulanır.
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Accept-Encoding')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            return response.make_conditional(request, accept_ranges=True, complete_length=size)
+        except BaseException:
+            # Yanıt oluşmadıysa (ör. karşılanamayan Range → 416) dosyayı kapatacak bir gövde de yoktur.
+            file.close()
+            raise
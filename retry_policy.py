@@ -0,0 +1,112 @@
+# retry_policy.py (Adım bazlı yeniden deneme politikası, çalıştırma süresi sınırı ve istatistikler)
+
+import random
+import time
+
+
+class FatalStepError(Exception):
+    """Yeniden denemenin anlamı olmayan hata (ör. giriş reddedildi, hata sayfası)."""
+
+
+class RunDeadlineExceeded(Exception):
+    """Çalıştırmaya ayrılan toplam süre doldu."""
+
+
+class Deadline:
+    """Bir çalıştırmanın tüm adımlarına paylaştırılan toplam süre."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, step):
+        if self.remaining() <= 0:
+            raise RunDeadlineExceeded(f"Çalıştırma süresi ({self.seconds:.0f} sn) '{step}' adımında doldu.")
+
+
+class RetryPolicy:
+    """
+    attempts: toplam deneme sayısı, timeout: tek denemede beklenecek en uzun süre,
+    poll: bekleme sırasında sayfanın kontrol aralığı, base_delay/max_delay/jitter:
+    denemeler arasındaki üstel geri çekilme.
+    """
+
+    def __init__(self, attempts=3, timeout=10.0, poll=0.25, base_delay=0.5, max_delay=4.0, jitter=0.5):
+        self.attempts = max(1, attempts)
+        self.timeout = timeout
+        self.poll = poll
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(delay * (1 - self.jitter), delay)
+
+    def with_overrides(self, **overrides):
+        values = dict(vars(self))
+        values.update({k: v for k, v in overrides.items() if k in values})
+        return RetryPolicy(**values)
+
+
+DEFAULT_POLICIES = {
+    'default': RetryPolicy(),
+    # Giriş sayfası hızlı yüklenir; giriş reddi zaten anında ölümcül sayılır.
+    'login': RetryPolicy(attempts=2, timeout=10.0),
+    'order': RetryPolicy(attempts=3, timeout=12.0),
+    'details': RetryPolicy(attempts=3, timeout=12.0),
+    'extract': RetryPolicy(attempts=2, timeout=8.0),
+}
+
+
+def build_policies(overrides=None):
+    """Varsayılan politikaları {'adım': {'attempts': 2, ...}} biçimindeki ayarlarla birleştirir."""
+    policies = dict(DEFAULT_POLICIES)
+    for step, values in (overrides or {}).items():
+        policies[step] = policies.get(step, policies['default']).with_overrides(**values)
+    return policies
+
+
+class RetryStats:
+    """Her adımın yeniden denemeye harcadığı süreyi ve deneme sayısını tutar."""
+
+    def __init__(self):
+        self.steps = {}
+
+    def record(self, step, seconds):
+        entry = self.steps.setdefault(step, {'retries': 0, 'seconds': 0.0})
+        entry['retries'] += 1
+        entry['seconds'] = round(entry['seconds'] + seconds, 3)
+
+    def as_dict(self):
+        return {step: dict(entry) for step, entry in self.steps.items()}
+
+
+def call_with_retry(func, policy, deadline, step, stats, is_retryable, on_retry=None, sleep=time.sleep):
+    """
+    func(timeout) çağrısını politikaya göre yeniden dener. Ölümcül hatalar ve
+    sınıflandırıcının yeniden denenemez saydığı hatalar hemen yükseltilir;
+    kalan süre bir sonraki denemeye yetmiyorsa RunDeadlineExceeded fırlatılır.
+    """
+    attempt = 0
+    while True:
+        deadline.check(step)
+        started = time.monotonic()
+        try:
+            return func(min(policy.timeout, deadline.remaining()))
+        except FatalStepError:
+            raise
+        except Exception as e:
+            if not is_retryable(e) or attempt + 1 >= policy.attempts:
+                raise
+            delay = policy.backoff(attempt)
+            if deadline.remaining() <= delay + policy.poll:
+                raise RunDeadlineExceeded(f"Çalıştırma süresi '{step}' adımında yeniden deneme sırasında doldu.") from e
+            if on_retry:
+                on_retry(attempt + 1, policy.attempts, delay, e)
+            sleep(delay)
+            stats.record(step, time.monotonic() - started)
+            attempt += 1
@@ -0,0 +1,83 @@
+# run_log.py (Çalıştırma başına sınırlı, tekrar oynatılabilir log kanalı ve toplu yayın)
+
+import time
+from collections import OrderedDict, deque
+
+from executor import native_threading
+
+
+class RunLog:
+    """
+    Tek bir çalıştırmanın log kanalı. Satırlar sıra numarasıyla halka tamponda
+    tutulur; yayınlanmamış satırlar ayrıca biriktirilip toplu olarak gönderilir.
+    append() bot iş parçacığından çağrıldığı için native kilit kullanılır.
+    """
+
+    def __init__(self, run_id, room, capacity=500):
+        self.run_id = run_id
+        self.room = room
+        self.entries = deque(maxlen=capacity)
+        self._next_seq = 1
+        self._pending = []
+        self._lock = native_threading.Lock()
+
+    def append(self, message, level='info'):
+        with self._lock:
+            entry = {'seq': self._next_seq, 'message': message, 'level': level, 'ts': round(time.time(), 3)}
+            self._next_seq += 1
+            self.entries.append(entry)
+            self._pending.append(entry)
+
+    def take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            return pending
+
+    def since(self, seq=0):
+        with self._lock:
+            return [entry for entry in self.entries if entry['seq'] > seq]
+
+
+class RunLogHub:
+    """
+    Aktif log kanallarını tutar ve flush_interval aralıklarla her kanalın yeni
+    satırlarını tek bir 'log_batch' olayı olarak odasına yayınlar. Biten
+    kanallardan son `retain` tanesi geç bağlanan istemciler için bellekte kalır.
+    """
+
+    def __init__(self, socketio, flush_interval=0.25, capacity=500, retain=20):
+        self.socketio = socketio
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self.retain = retain
+        self._active = {}
+        self._recent = OrderedDict()
+
+    def open(self, run_id, room):
+        log = RunLog(run_id, room, capacity=self.capacity)
+        self._active[run_id] = log
+        return log
+
+    def get(self, run_id):
+        return self._active.get(run_id) or self._recent.get(run_id)
+
+    def close(self, run_id):
+        log = self._active.pop(run_id, None)
+        if log is None:
+            return None
+        self._flush(log)
+        self._recent[run_id] = log
+        while len(self._recent) > self.retain:
+            self._recent.popitem(last=False)
+        return log
+
+    def flush_loop(self):
+        while True:
+            for log in list(self._active.values()):
+                self._flush(log)
+            self.socketio.sleep(self.flush_interval)
+
+    def _flush(self, log):
+        batch = log.take_pending()
+        if batch:
+            self.socketio.emit('log_batch', {'run_id': log.run_id, 'entries': batch}, to=log.room)
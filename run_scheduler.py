@@ -0,0 +1,111 @@
+# run_scheduler.py (Sınırlı eşzamanlılık, FIFO kuyruk ve istek birleştirme)
+
+import itertools
+import threading
+from collections import deque
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class RunJob:
+    """Kuyruktaki veya çalışan tek bir iş. Aynı anahtarla gelen istekler bu işe abone olur."""
+
+    def __init__(self, job_id, key, func):
+        self.id = job_id
+        self.key = key
+        self.func = func
+        self.room = f"run-{job_id}"
+        self.subscribers = []
+        self.result = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.result
+
+
+class RunScheduler:
+    """
+    Web (Socket.IO) ve zamanlayıcıdan gelen tüm çalıştırmaların tek giriş noktası.
+    En fazla `max_concurrent` iş aynı anda çalışır, fazlası FIFO sırada bekler.
+    Aynı anahtarla (ör. 'generate') bekleyen ya da çalışan bir iş varsa yeni istek
+    ona eklenir ve aynı sonucu alır; böylece aynı anda birden fazla Chrome açılmaz.
+    """
+
+    def __init__(self, socketio, max_concurrent=1, max_queue=10, on_complete=None, id_factory=None):
+        self.socketio = socketio
+        # Verilirse iş kimlikleri buradan alınır (ör. veritabanında kalıcı çalıştırma kaydı).
+        self.id_factory = id_factory
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.on_complete = on_complete
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._active = {}
+        self._running = 0
+
+    def submit(self, key, func, sid=None):
+        """İşi kuyruğa alır veya aynı anahtarlı mevcut işe bağlar; RunJob döndürür."""
+        with self._lock:
+            job = self._active.get(key)
+            attached = job is not None
+            if not attached:
+                if self._running >= self.max_concurrent and len(self._queue) >= self.max_queue:
+                    raise QueueFullError("Çalıştırma kuyruğu dolu, lütfen biraz sonra tekrar deneyin.")
+                job = RunJob(self.id_factory(key) if self.id_factory else next(self._ids), key, func)
+                self._active[key] = job
+                if self._running < self.max_concurrent:
+                    self._running += 1
+                    start = True
+                else:
+                    self._queue.append(job)
+                    start = False
+            if sid:
+                job.subscribers.append(sid)
+                self.socketio.server.enter_room(sid, job.room, namespace='/')
+        if not attached and start:
+            self.socketio.start_background_task(self._execute, job)
+        if sid:
+            self.socketio.emit('queue_position', {'run_id': job.id, 'position': self.position(job), 'attached': attached}, to=sid)
+        return job
+
+    def position(self, job):
+        """0: çalışıyor, n: kuyrukta n. sırada."""
+        with self._lock:
+            try:
+                return self._queue.index(job) + 1
+            except ValueError:
+                return 0
+
+    def stats(self):
+        with self._lock:
+            return {'running': self._running, 'queued': len(self._queue)}
+
+    def _execute(self, job):
+        try:
+            result = job.func(job)
+        except Exception as e:
+            result = {'error': f"[KRİTİK HATA] {type(e).__name__}: {e}"}
+        with self._lock:
+            self._active.pop(job.key, None)
+            next_job = self._queue.popleft() if self._queue else None
+            if next_job is None:
+                self._running -= 1
+            waiting = list(self._queue)
+        job.result = result
+        job.done.set()
+        if next_job is not None:
+            self.socketio.start_background_task(self._execute, next_job)
+        if self.on_complete:
+            try:
+                self.on_complete(job, result)
+            except Exception as e:
+                print(f"Çalıştırma #{job.id} sonucu iletilemedi: {e}")
+        for sid in job.subscribers:
+            self.socketio.server.leave_room(sid, job.room, namespace='/')
+        # Kuyruk ilerlediği için bekleyenlere yeni sıralarını bildir.
+        for index, queued in enumerate([next_job] + waiting if next_job else waiting):
+            self.socketio.emit('queue_position', {'run_id': queued.id, 'position': index, 'attached': False}, to=queued.room)
@@ -0,0 +1,56 @@
+# session_store.py (Kimliği doğrulanmış çerez kavanozunun şifreli olarak veritabanında saklanması)
+
+import base64
+import hashlib
+import json
+
+from cryptography.fernet import Fernet, InvalidToken
+
+
+def derive_key(secret):
+    """Herhangi bir gizli metinden Fernet için geçerli 32 baytlık anahtar üretir."""
+    return base64.urlsafe_b64encode(hashlib.sha256(secret.encode('utf-8')).digest())
+
+
+class SessionStore:
+    """
+    Bir hesabın oturum çerezlerini şifreleyip veritabanında tutar. Bot hem
+    Selenium hem HTTP motorunda aynı çerez listesi biçimini kullanır:
+    [{'name', 'value', 'domain', 'path', 'secure', 'expiry'}, ...]
+    """
+
+    def __init__(self, app, db, model, account, secret):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.account = account
+        self._fernet = Fernet(derive_key(secret))
+
+    def load(self):
+        # Bot yerel bir iş parçacığında çalışabileceği için uygulama bağlamı burada açılır.
+        with self.app.app_context():
+            record = self.model.query.filter_by(account=self.account).first()
+            if not record:
+                return None
+            try:
+                return json.loads(self._fernet.decrypt(record.cookies.encode('ascii')))
+            except (InvalidToken, ValueError):
+                print("Kayıtlı oturum çözülemedi (anahtar değişmiş olabilir), siliniyor.")
+                self.db.session.delete(record)
+                self.db.session.commit()
+                return None
+
+    def save(self, cookies):
+        token = self._fernet.encrypt(json.dumps(cookies).encode('utf-8')).decode('ascii')
+        with self.app.app_context():
+            record = self.model.query.filter_by(account=self.account).first()
+            if record:
+                record.cookies = token
+            else:
+                self.db.session.add(self.model(account=self.account, cookies=token))
+            self.db.session.commit()
+
+    def clear(self):
+        with self.app.app_context():
+            self.model.query.filter_by(account=self.account).delete()
+            self.db.session.commit()
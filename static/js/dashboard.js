@@ -0,0 +1,185 @@
+feather.replace();
+const socket = io({ transports: ['websocket'] });
+const startBtn = document.getElementById('start-btn');
+const logContainer = document.getElementById('log-container');
+const historyBody = document.getElementById('history-body');
+
+function renderHistoryRow(item) {
+    // *** SAAT DİLİMİ DÜZELTMESİ (Doğrudan +3 Saat Ekleme) ***
+    // Sunucudan gelen UTC tarihini al
+    const creationDateUTC = new Date(item.created_at);
+    // Üzerine 3 saat ekle
+    creationDateUTC.setHours(creationDateUTC.getHours() + 3);
+    // Türkiye formatında göster
+    const localCreationTime = creationDateUTC.toLocaleString('tr-TR', {
+        year: 'numeric', month: '2-digit', day: '2-digit',
+        hour: '2-digit', minute: '2-digit', second: '2-digit'
+    });
+
+    // Son kullanma tarihi için renk stilleri
+    // Not: Artık item.expiry_date "dd.mm.YYYY" formatında gelecek,
+    // bu yüzden karşılaştırma için onu tekrar Date nesnesine çevirmemiz lazım.
+    const expiryParts = item.expiry_date.split('.');
+    const expiryDate = new Date(`${expiryParts[2]}-${expiryParts[1]}-${expiryParts[0]}`);
+    const now = new Date();
+    const oneDay = 24 * 60 * 60 * 1000;
+    let rowClass = '';
+    if (expiryDate < now) { rowClass = 'expired'; }
+    else if ((expiryDate - now) < oneDay) { rowClass = 'expiring'; }
+
+    const copyButtonHTML = `<button class="btn-copy" onclick="copyLink(this, \`${item.m3u_url}\`)"><i data-feather="copy"></i></button>`;
+    // Sunucudaki kanal dizininden filtrelenmiş liste (varsayılan grup, ör. TURKISH).
+    const playlistButtonHTML = item.playlist_url ? `<button class="btn-copy" title="Filtrelenmiş liste linkini kopyala" onclick="copyLink(this, \`${location.origin}${item.playlist_url}\`)"><i data-feather="filter"></i></button>` : '';
+    const liveness = item.liveness;
+    const livenessHTML = liveness
+        ? `<span class="liveness ${liveness.status}" title="Son denetim: ${new Date(liveness.checked_at + 'Z').toLocaleString('tr-TR')}${liveness.http_status ? ' · HTTP ' + liveness.http_status : ''}">${LIVENESS_LABELS[liveness.status]}</span>`
+          + (liveness.latency_ms !== null ? `<span class="liveness-latency">${liveness.latency_ms} ms</span>` : '')
+        : '<span class="liveness">Denetlenmedi</span>';
+
+    return `<tr id="history-row-${item.id}" class="${rowClass}">
+        <td data-label="Üretim">${localCreationTime}</td>
+        <td data-label="Son Kullanma">${item.expiry_date}</td>
+        <td data-label="Durum">${livenessHTML}</td>
+        <td data-label="M3U Linki" class="m3u-cell">
+            <div class="m3u-link">${item.m3u_url}</div>
+            ${copyButtonHTML}
+            ${playlistButtonHTML}
+        </td>
+    </tr>`;
+}
+
+const LIVENESS_LABELS = { alive: 'Canlı', dead: 'Ölü', error: 'Ulaşılamadı' };
+// Sıralama: canlılar (en hızlısı önce), ulaşılamayanlar, ölüler, denetlenmemişler.
+const LIVENESS_RANK = { alive: 0, error: 1, dead: 2 };
+function livenessOrder(item) {
+    const liveness = item.liveness;
+    if (!liveness) return [3, 0];
+    return [LIVENESS_RANK[liveness.status] ?? 3, liveness.latency_ms ?? Infinity];
+}
+function compareLiveness(a, b) {
+    const [rankA, latencyA] = livenessOrder(a);
+    const [rankB, latencyB] = livenessOrder(b);
+    return rankA - rankB || latencyA - latencyB || b.id - a.id;
+}
+
+const historyFilter = document.getElementById('history-filter');
+const historyMore = document.getElementById('history-more');
+const sortLiveness = document.getElementById('sort-liveness');
+let historyCursor = null;
+let historyItems = [];
+let sortByLiveness = false;
+
+// Yüklenmiş satırlar bellekte tutulur; sıralama değişince sunucuya yeniden gidilmez.
+function renderHistory() {
+    const items = sortByLiveness ? [...historyItems].sort(compareLiveness) : historyItems;
+    historyBody.innerHTML = items.map(renderHistoryRow).join('');
+    sortLiveness.textContent = sortByLiveness ? 'Durum ▲' : 'Durum';
+    feather.replace();
+}
+
+// Tarayıcı ETag ile yeniden doğrulama yapar; geçmiş değişmediyse sunucu 304 döner.
+async function fetchHistory(append = false) {
+    try {
+        const params = new URLSearchParams({ status: historyFilter.value });
+        if (append && historyCursor) { params.set('before', historyCursor); }
+        const res = await fetch('/get_history?' + params.toString(), { cache: 'no-cache' });
+        const page = await res.json();
+        historyItems = append ? historyItems.concat(page.items) : page.items;
+        historyCursor = page.next_cursor;
+        historyMore.style.display = historyCursor ? 'block' : 'none';
+        renderHistory();
+    } catch (e) { console.error(e); }
+}
+
+historyFilter.addEventListener('change', () => fetchHistory());
+historyMore.addEventListener('click', () => fetchHistory(true));
+sortLiveness.addEventListener('click', () => { sortByLiveness = !sortByLiveness; renderHistory(); });
+
+function copyLink(button, textToCopy) {
+    navigator.clipboard.writeText(textToCopy).then(() => {
+        Toastify({ text: "Link panoya kopyalandı!", duration: 3000, gravity: "bottom", position: "right", style: { background: "var(--success-color)" } }).showToast();
+    });
+}
+
+document.getElementById('control-form').addEventListener('submit', (e) => {
+    e.preventDefault();
+    startBtn.disabled = true;
+    startBtn.innerHTML = '<i data-feather="loader" class="spinner"></i><span>İşlem Yürütülüyor...</span>';
+    feather.replace();
+    logContainer.innerHTML = '';
+    socket.emit('start_process', {});
+});
+
+// Log satırları tek bir HTML parçası olarak eklenir; mevcut log yeniden ayrıştırılmaz.
+let currentRun = null;
+let lastSeq = 0;
+const escapeHtml = (value) => String(value).replace(/&/g, "&amp;").replace(/</g, "&lt;");
+function appendLog(html) {
+    logContainer.insertAdjacentHTML('beforeend', html);
+    logContainer.scrollTop = logContainer.scrollHeight;
+}
+function watchRun(runId) {
+    if (currentRun !== runId) { currentRun = runId; lastSeq = 0; }
+}
+
+socket.on('log_batch', (data) => {
+    if (data.run_id !== currentRun) return;
+    const fresh = data.entries.filter((entry) => entry.seq > lastSeq);
+    if (!fresh.length) return;
+    lastSeq = fresh[fresh.length - 1].seq;
+    appendLog(fresh.map((entry) => `<div class="log-line ${entry.level || 'info'}">${escapeHtml(entry.message)}</div>`).join(''));
+});
+
+socket.on('run_started', (data) => {
+    // Yalnızca bu panonun başlattığı veya bağlandığı çalıştırma için gelir.
+    watchRun(data.run_id);
+});
+
+socket.on('connect', () => {
+    // Yeniden bağlanınca kaçırılan satırlar son görülen sıra numarasından itibaren istenir.
+    if (currentRun !== null) socket.emit('join_run', { run_id: currentRun, after: lastSeq });
+});
+
+socket.on('process_complete', (data) => {
+    currentRun = null;
+    startBtn.disabled = false;
+    startBtn.innerHTML = '<i data-feather="play-circle"></i><span>Yeni M3U Linki Üret</span>';
+    if (data.new_link) {
+        historyItems.unshift(data.new_link);
+        renderHistory();
+    }
+    feather.replace();
+    Toastify({ text: "Yeni link başarıyla üretildi!", duration: 4000, gravity: "bottom", position: "right", style: { background: "var(--accent-grad)" } }).showToast();
+});
+
+socket.on('queue_position', (data) => {
+    watchRun(data.run_id);
+    let message;
+    if (data.attached) { message = `Devam eden çalıştırmaya (#${data.run_id}) bağlanıldı, sonuç paylaşılacak.`; }
+    else if (data.position > 0) { message = `Çalıştırma #${data.run_id} kuyrukta, sıra: ${data.position}`; }
+    else { message = `Çalıştırma #${data.run_id} başladı.`; }
+    appendLog(`<div class="log-line info">${message}</div>`);
+});
+
+socket.on('run_timings', (data) => {
+    const phases = Object.entries(data.timings.phases || {}).map(([name, seconds]) => `${name} ${seconds.toFixed(1)} sn`).join(' · ');
+    appendLog(`<div class="log-line info">Süre dökümü: ${phases} · toplam ${data.timings.total.toFixed(1)} sn</div>`);
+});
+
+socket.on('status_update', (data) => {
+    const level = data.level || 'info';
+    appendLog(`<div class="log-line ${level}">${escapeHtml(data.message)}</div>`);
+});
+
+// Canlılık denetimi bittiğinde geçmiş yeniden yüklenir (sunucu ETag'i değiştiği için taze veri gelir).
+socket.on('liveness_updated', () => fetchHistory());
+
+socket.on('process_error', (data) => {
+    currentRun = null;
+    appendLog(`<div class="log-line error">HATA: ${escapeHtml(data.error)}</div>`);
+    startBtn.disabled = false;
+    startBtn.innerHTML = '<i data-feather="alert-triangle"></i><span>Tekrar Dene</span>';
+    feather.replace();
+});
+
+document.addEventListener('DOMContentLoaded', () => fetchHistory());
@@ -0,0 +1,122 @@
+# static_assets.py (Parmak izli, önceden sıkıştırılmış ve uzun süre önbelleklenen statik dosyalar)
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, abort, request
+
+try:
+    import brotli  # İsteğe bağlı: kuruluysa gzip yerine tercih edilir.
+except ImportError:
+    brotli = None
+
+# Bu türler metin tabanlıdır ve sıkıştırmadan fayda görür.
+COMPRESSIBLE_TYPES = ('text/html', 'text/css', 'text/plain', 'application/javascript', 'text/javascript', 'application/json', 'image/svg+xml')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+
+def compress(data, encoding, level=9):
+    """Statik dosyalar açılışta en yüksek seviyede, dinamik yanıtlar daha hızlı bir seviyede sıkıştırılır."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(11, level + 2))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate_encoding(accept_encoding, available):
+    """İstemcinin kabul ettiği ve elimizde bulunan en iyi kodlamayı seçer; yoksa None."""
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accept_encoding[encoding]:
+            return encoding
+    return None
+
+
+class Asset:
+    """Tek bir statik dosyanın bellekteki ham ve sıkıştırılmış halleri."""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        root, ext = os.path.splitext(name)
+        self.fingerprinted = f"{root}.{self.digest}{ext}"
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.encodings = {None: data}
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            self.encodings['gzip'] = compress(data, 'gzip')
+            if brotli is not None:
+                self.encodings['br'] = compress(data, 'br')
+
+
+class StaticAssets:
+    """
+    static/ altındaki dosyaları açılışta bir kez okur, içerik özetinden parmak izi
+    üretir ve gzip (varsa brotli) ile önceden sıkıştırır. Şablonlar dosyalara
+    asset_url() ile parmak izli adla bağlanır; içerik değişince ad da değiştiği
+    için bu adlar bir yıl boyunca değişmez (immutable) olarak önbelleklenir.
+    """
+
+    def __init__(self, app=None, directory='static', url_prefix='/static'):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.by_name = {}
+        self.by_fingerprint = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        root = os.path.join(app.root_path, self.directory)
+        for folder, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(folder, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    asset = Asset(name, f.read())
+                self.by_name[name] = asset
+                self.by_fingerprint[asset.fingerprinted] = asset
+        app.add_url_rule(f"{self.url_prefix}/<path:filename>", 'static', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url_for
+
+    def url_for(self, name):
+        asset = self.by_name.get(name)
+        if asset is None:
+            raise KeyError(f"Statik dosya bulunamadı: {name}")
+        return f"{self.url_prefix}/{asset.fingerprinted}"
+
+    def serve(self, filename):
+        asset = self.by_fingerprint.get(filename)
+        immutable = asset is not None
+        if asset is None:
+            # Parmak izsiz ad da çalışır ama her seferinde yeniden doğrulanır.
+            asset = self.by_name.get(filename) or abort(404)
+        encoding = negotiate_encoding(request.accept_encodings, asset.encodings)
+        response = Response(asset.encodings[encoding], mimetype=asset.mimetype)
+        response.set_etag(f"{asset.digest}-{encoding}" if encoding else asset.digest)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE if immutable else 'public, no-cache'
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response.make_conditional(request)
+
+
+def compress_response(response, minimum_size=1024):
+    """
+    Dinamik metin yanıtlarını (HTML, JSON) istemci kabul ediyorsa sıkıştırır, ETag'i
+    yoksa ekler ve koşullu isteklere 304 döner. after_request kancası olarak kullanılır.
+    """
+    if (response.direct_passthrough or response.status_code != 200 or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+        return response
+    data = response.get_data()
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings, ('br', 'gzip') if brotli is not None else ('gzip',)) if len(data) >= minimum_size else None
+    if not response.get_etag()[0]:
+        # Farklı kodlamalar farklı gövdeler olduğu için üretilen ETag'e kodlama eklenir. Rotanın
+        # kendi koyduğu ETag'e dokunulmaz: rota istemcinin geri gönderdiği değeri kendisi karşılaştırır.
+        etag = hashlib.sha1(data).hexdigest()[:20]
+        response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    response.make_conditional(request)
+    if encoding and response.status_code == 200:
+        response.set_data(compress(data, encoding, level=6))
+        response.headers['Content-Encoding'] = encoding
+    return response
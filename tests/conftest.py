@@ -0,0 +1,118 @@
+# tests/conftest.py (Ortak test düzeni: geçici veritabanı ve süreç içi SMTP sunucusu)
+
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from email import message_from_bytes, policy
+
+import pytest
+
+# app modülü veritabanı adresini içe aktarılırken okuduğu için ortam önce hazırlanır. Testler tabloları
+# silip yeniden oluşturduğundan ortamdaki DATABASE_URL her zaman geçici bir SQLite dosyasıyla değiştirilir.
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gcb-tests-'), 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SmtpSink:
+    """
+    Testler için süreç içi SMTP sunucusu: gelen iletileri bellekte toplar. `drop_on_mail`
+    sonraki n MAIL komutunda bağlantıyı yanıt vermeden kapatır; drop_connections() ise
+    açık bağlantıları (boşta kalan bağlantıyı kapatan bir sunucu gibi) koparır.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.drop_on_mail = 0
+        self._sockets = []
+        self._lock = threading.Lock()
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                sink._session(self)
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.drop_connections()
+
+    def drop_connections(self):
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def subjects(self):
+        return [message['Subject'] for message in self.messages]
+
+    def _session(self, handler):
+        with self._lock:
+            self.connections += 1
+            self._sockets.append(handler.connection)
+
+        def reply(line):
+            handler.wfile.write(f"{line}\r\n".encode('ascii'))
+
+        reply('220 sink')
+        while True:
+            line = handler.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip().upper()
+            if command.startswith('MAIL'):
+                with self._lock:
+                    drop = self.drop_on_mail > 0
+                    self.drop_on_mail -= drop
+                if drop:
+                    return
+                reply('250 OK')
+            elif command.startswith(('EHLO', 'HELO', 'RCPT', 'NOOP', 'RSET')):
+                reply('250 OK')
+            elif command == 'DATA':
+                reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in iter(handler.rfile.readline, b''):
+                    if data == b'.\r\n':
+                        break
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                with self._lock:
+                    self.messages.append(message_from_bytes(b''.join(lines), policy=policy.default))
+                reply('250 OK')
+            elif command == 'QUIT':
+                reply('221 Bye')
+                return
+            else:
+                reply('502 Command not implemented')
+
+
+@pytest.fixture
+def smtp_sink():
+    sink = SmtpSink().start()
+    yield sink
+    sink.stop()
+
+
+@pytest.fixture
+def database():
+    """Her test boş tablolarla başlar; testin gövdesi uygulama bağlamı içinde çalışır."""
+    import app as application
+    with application.app.app_context():
+        application.db.create_all()
+        yield application.db
+        application.db.session.remove()
+        application.db.drop_all()
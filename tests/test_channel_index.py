@@ -0,0 +1,126 @@
+# tests/test_channel_index.py (Kanal dizininin veritabanındaki sahiplikle tek bir işçide kurulması)
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import eventlet
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from fake_whmcs import FakeWhmcs
+from m3u_playlist import ChannelIndex, ClaimLost
+
+CHANNELS = 300
+
+
+@pytest.fixture
+def site():
+    server = FakeWhmcs(accounts=1, channels=CHANNELS).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def index(database):
+    import app as application
+    return ChannelIndex(application.app, database, application.GeneratedLink, application.PlaylistChannel, fetch_timeout=10, batch_size=100, claim_seconds=60, poll_seconds=0.05)
+
+
+@pytest.fixture
+def link_id(database, site):
+    import app as application
+    link = application.GeneratedLink(m3u_url=f"{site.base_url}get.php?username=bench0&password=bench0&type=m3u_plus", expiry_raw='test', expires_on=date.today() + timedelta(days=1))
+    database.session.add(link)
+    database.session.commit()
+    return link.id
+
+
+def claim_as(link_id, owner, claimed_at):
+    import app as application
+    application.GeneratedLink.query.filter_by(id=link_id).update({'indexing_owner': owner, 'indexing_claimed_at': claimed_at})
+    application.db.session.commit()
+
+
+def rows(link_id):
+    import app as application
+    return application.PlaylistChannel.query.filter_by(link_id=link_id).count()
+
+
+def add_rows(link_id, count):
+    import app as application
+    application.db.session.execute(application.PlaylistChannel.__table__.insert(), [
+        {'link_id': link_id, 'position': i, 'name': 'eski', 'group_title': '', 'tvg_id': '', 'extinf': '#EXTINF:-1,eski', 'url': 'http://example.com/eski.ts'} for i in range(count)])
+    application.db.session.commit()
+
+
+def test_builds_once_and_releases_claim(index, link_id, database):
+    import app as application
+    assert index.ensure(link_id) == CHANNELS
+    link = database.session.get(application.GeneratedLink, link_id)
+    database.session.refresh(link)
+    assert (link.channel_count, link.channel_source_id, link.indexing_owner) == (CHANNELS, link_id, None)
+    assert rows(link_id) == CHANNELS
+
+
+def test_waits_for_another_workers_build(index, link_id, site):
+    import app as application
+    claim_as(link_id, 'diger-isci', datetime.utcnow())
+    add_rows(link_id, 5)
+
+    def finish():
+        # Diğer işçi dizinlemeyi bitirir.
+        eventlet.sleep(0.2)
+        with application.app.app_context():
+            application.GeneratedLink.query.filter_by(id=link_id).update({'channel_count': 5, 'channel_source_id': link_id, 'channels_indexed_at': datetime.utcnow(), 'indexing_owner': None})
+            application.db.session.commit()
+
+    eventlet.spawn(finish)
+    assert index.ensure(link_id) == 5
+    # Bu işçi listeyi indirmedi ve diğerinin satırlarına dokunmadı.
+    assert rows(link_id) == 5
+
+
+def test_takes_over_stale_claim_without_duplicates(index, link_id):
+    claim_as(link_id, 'olu-isci', datetime.utcnow() - timedelta(minutes=5))
+    add_rows(link_id, 40)
+    assert index.ensure(link_id) == CHANNELS
+    assert rows(link_id) == CHANNELS
+
+
+def test_waiter_reports_failed_build(index, link_id):
+    import app as application
+    claim_as(link_id, 'diger-isci', datetime.utcnow())
+
+    def fail():
+        eventlet.sleep(0.2)
+        with application.app.app_context():
+            application.GeneratedLink.query.filter_by(id=link_id).update({'indexing_owner': None, 'indexing_claimed_at': None})
+            application.db.session.commit()
+
+    eventlet.spawn(fail)
+    with pytest.raises(RuntimeError):
+        index.ensure(link_id)
+
+
+def test_lost_claim_keeps_new_owners_rows(index, link_id, site):
+    import app as application
+    receive = index._receive
+
+    def taken_over(batches):
+        for number, batch in enumerate(receive(batches)):
+            if number == 1:
+                # Sahiplik süresi dolup başka bir işçiye geçti ve o işçi yazmaya başladı.
+                application.GeneratedLink.query.filter_by(id=link_id).update({'indexing_owner': 'yeni-sahip'})
+                application.PlaylistChannel.query.filter_by(link_id=link_id).delete()
+                application.db.session.commit()
+                add_rows(link_id, 7)
+            yield batch
+
+    index._receive = taken_over
+    with application.app.app_context():
+        owner = index._claim(link_id)
+    with pytest.raises(ClaimLost):
+        index.build(link_id, owner)
+    assert rows(link_id) == 7
+    assert application.GeneratedLink.query.filter_by(id=link_id).one().indexing_owner == 'yeni-sahip'
@@ -0,0 +1,34 @@
+# tests/test_history_args.py (/get_history parametrelerinin doğrulanması)
+
+from datetime import date
+
+import pytest
+
+from app import parse_history_args
+
+
+def test_defaults():
+    assert parse_history_args({}) == {'limit': 20, 'before': None, 'status': 'all', 'created_from': None, 'created_to': None}
+
+
+def test_parses_all_parameters():
+    args = {'limit': '50', 'before': '120', 'status': 'active', 'from': '2024-05-01', 'to': '2024-05-31'}
+    assert parse_history_args(args) == {'limit': 50, 'before': 120, 'status': 'active',
+                                        'created_from': date(2024, 5, 1), 'created_to': date(2024, 5, 31)}
+
+
+@pytest.mark.parametrize('limit, expected', [('0', 1), ('-5', 1), ('1000', 100)])
+def test_limit_is_clamped(limit, expected):
+    assert parse_history_args({'limit': limit})['limit'] == expected
+
+
+@pytest.mark.parametrize('args', [
+    {'limit': 'on'},
+    {'before': 'abc'},
+    {'from': '01.05.2024'},
+    {'to': '2024-13-01'},
+    {'status': 'reserved'},
+])
+def test_rejects_invalid_values(args):
+    with pytest.raises(ValueError):
+        parse_history_args(args)
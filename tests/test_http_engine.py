@@ -0,0 +1,47 @@
+# tests/test_http_engine.py (HTTP motorunun form alanlarını tarayıcı gibi toplaması)
+
+from http_engine import GoldClubHttpBot, parse_html
+
+FORM = """
+<form id="frmCheckout" method="post" action="cart.php?a=checkout">
+  <input type="hidden" name="token" value="csrf123">
+  <input type="text" name="firstname" value="Ada">
+  <input name="notes">
+  <input type="checkbox" name="accepttos" checked>
+  <input type="checkbox" name="marketing" value="1">
+  <input type="radio" name="paymentmethod" value="paypal">
+  <input type="radio" name="paymentmethod" value="banktransfer" checked>
+  <input type="text" name="promo" value="x" disabled>
+  <input type="submit" name="submit" value="Gönder">
+  <input type="file" name="upload">
+  <textarea name="message">Merhaba</textarea>
+  <select name="country"><option value="TR">Türkiye</option><option value="DE" selected>Almanya</option></select>
+  <select name="state"><option>İstanbul</option><option>Ankara</option></select>
+  <select name="empty"></select>
+  <button type="submit" id="btnCompleteOrder" name="complete" value="1">Tamamla</button>
+</form>
+"""
+
+
+def fields(markup):
+    form = parse_html(markup).find(lambda node: node.tag == 'form')
+    return GoldClubHttpBot('bench@example.com', 'secret')._form_fields(form)
+
+
+def test_form_fields_match_browser_submission():
+    assert fields(FORM) == [
+        ('token', 'csrf123'),
+        ('firstname', 'Ada'),
+        ('notes', ''),
+        ('accepttos', 'on'),
+        ('paymentmethod', 'banktransfer'),
+        ('message', 'Merhaba'),
+        ('country', 'DE'),
+        # value özniteliği olmayan seçenekte metni gönderilir.
+        ('state', 'İstanbul'),
+    ]
+
+
+def test_form_fields_in_nested_markup():
+    markup = '<form><div><p><input type="hidden" name="token" value="t"></p></div><input type="email" name="username" value="a@b.c"></form>'
+    assert fields(markup) == [('token', 't'), ('username', 'a@b.c')]
@@ -0,0 +1,25 @@
+# tests/test_link_prober.py (Canlılık denetimi yanıtlarının sınıflandırılması)
+
+import pytest
+
+from link_prober import classify
+
+
+@pytest.mark.parametrize('http_status, head, expected', [
+    (200, b'#EXTM3U\n#EXTINF:-1,Kanal', 'alive'),
+    (206, b'#EXTM3U', 'alive'),
+    # BOM ve baştaki boşluklar yok sayılır.
+    (200, b'\xef\xbb\xbf\r\n #EXTM3U', 'alive'),
+    # Süresi dolmuş hesaplar 200 ile boş veya farklı gövde döndürür.
+    (200, b'', 'dead'),
+    (200, b'{"user_info":{"auth":0}}', 'dead'),
+    (401, b'', 'dead'),
+    (403, b'#EXTM3U', 'dead'),
+    (404, b'', 'dead'),
+    # Geçici sunucu sorunları linki ölü saymaz.
+    (429, b'', 'error'),
+    (500, b'', 'error'),
+    (503, b'#EXTM3U', 'error'),
+])
+def test_classify(http_status, head, expected):
+    assert classify(http_status, head) == expected
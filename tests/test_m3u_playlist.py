@@ -0,0 +1,53 @@
+# tests/test_m3u_playlist.py (EXTINF ayrıştırma ve akış hâlinde kanal üretimi)
+
+from m3u_playlist import fill_template, iter_channels, parse_extinf, to_template
+
+
+def test_parse_extinf_attributes_and_name():
+    attributes, name = parse_extinf('#EXTINF:-1 tvg-id="trt1.tr" tvg-name="TRT 1" group-title="Ulusal",TRT 1 HD')
+    assert attributes == {'tvg-id': 'trt1.tr', 'tvg-name': 'TRT 1', 'group-title': 'Ulusal'}
+    assert name == 'TRT 1 HD'
+
+
+def test_parse_extinf_ignores_commas_inside_quotes():
+    attributes, name = parse_extinf('#EXTINF:-1 group-title="Spor, Canlı",beIN Sports 1, Yedek')
+    assert attributes['group-title'] == 'Spor, Canlı'
+    assert name == 'beIN Sports 1, Yedek'
+
+
+def test_parse_extinf_without_name():
+    assert parse_extinf('#EXTINF:-1 tvg-id="x"') == ({'tvg-id': 'x'}, '')
+
+
+def test_iter_channels_reads_bytes_and_directives():
+    lines = [
+        b'#EXTM3U\n',
+        b'#EXTINF:-1 tvg-id="a" group-title="Haber",Kanal A\n',
+        b'http://example.com/live/u/p/1.ts\n',
+        b'\n',
+        '#EXTINF:-1 tvg-name="Kanal B",\n',
+        '#EXTGRP:Belgesel\n',
+        '#EXTVLCOPT:http-user-agent=VLC\n',
+        'http://example.com/live/u/p/2.ts\n',
+        # Adresi olmayan son kayıt üretilmez.
+        '#EXTINF:-1,Yarım\n',
+    ]
+    channels = list(iter_channels(lines))
+    assert [(c['name'], c['group_title'], c['tvg_id'], c['position']) for c in channels] == [
+        ('Kanal A', 'Haber', 'a', 0),
+        ('Kanal B', 'Belgesel', '', 1),
+    ]
+    assert channels[1]['url'] == 'http://example.com/live/u/p/2.ts'
+
+
+def test_extgrp_does_not_override_group_title():
+    lines = ['#EXTINF:-1 group-title="Spor",Kanal', '#EXTGRP:Diğer', 'http://example.com/1.ts']
+    assert next(iter_channels(lines))['group_title'] == 'Spor'
+
+
+def test_template_round_trip():
+    account = ('kullanici', 'sifre')
+    url = 'http://example.com/live/kullanici/sifre/1.ts?username=kullanici&password=sifre'
+    template = to_template(url, account)
+    assert 'kullanici' not in template and 'sifre' not in template
+    assert fill_template(template, ('yeni', 'gizli')) == 'http://example.com/live/yeni/gizli/1.ts?username=yeni&password=gizli'
@@ -0,0 +1,98 @@
+# tests/test_notifications.py (MailSender: sahiplenme yarışı, özet ve SMTP bağlantısının yeniden kurulması)
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from notifications import MailSender
+
+
+@pytest.fixture
+def make_sender(database, smtp_sink):
+    import app as application
+
+    def make(**kwargs):
+        smtp_config = {'smtp_server': '127.0.0.1', 'smtp_port': smtp_sink.port, 'sender_email': 'bot@example.com',
+                       'sender_password': '', 'receiver_email': 'admin@example.com', 'starttls': False}
+        return MailSender(application.app, database, application.OutboundEmail, smtp_config, None, **kwargs)
+    return make
+
+
+def statuses():
+    import app as application
+    return sorted(item.status for item in application.OutboundEmail.query.all())
+
+
+def test_claim_race_sends_each_message_once(make_sender, smtp_sink):
+    first, second = make_sender(), make_sender()
+    for index in range(6):
+        first.enqueue(f"Bildirim {index}", "<p>gövde</p>")
+    claim = first._claim
+
+    def racing_claim(items, now):
+        # İkinci işçi, ilki bekleyenleri okuduktan sonra ama sahiplenmeden önce hepsini gönderir.
+        second._tick()
+        return claim(items, now)
+
+    first._claim = racing_claim
+    first._tick()
+    assert sorted(smtp_sink.subjects()) == [f"Bildirim {index}" for index in range(6)]
+    assert statuses() == ['sent'] * 6
+
+
+def test_stale_claim_is_retried(make_sender, smtp_sink, database):
+    import app as application
+    sender = make_sender()
+    sender.enqueue("Yarım kalan", "<p>gövde</p>")
+    # Gönderirken ölen bir işçinin sahiplendiği, süresi dolmuş ileti.
+    application.OutboundEmail.query.update({'status': 'sending', 'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)})
+    database.session.commit()
+    sender._tick()
+    assert smtp_sink.subjects() == ["Yarım kalan"]
+    assert statuses() == ['sent']
+
+
+def test_digest_combines_pending_messages(make_sender, smtp_sink):
+    sender = make_sender(digest_window=3600, digest_max=3)
+    for index in range(3):
+        sender.enqueue(f"Bildirim {index}", f"<p>{index}</p>")
+    sender._tick()
+    assert smtp_sink.subjects() == ["Özet: 3 bildirim"]
+    assert statuses() == ['sent'] * 3
+
+
+def test_reconnects_after_server_closes_idle_connection(make_sender, smtp_sink):
+    sender = make_sender()
+    sender.enqueue("Birinci", "<p>1</p>")
+    sender._tick()
+    smtp_sink.drop_connections()
+    sender.enqueue("İkinci", "<p>2</p>")
+    sender._tick()
+    assert smtp_sink.subjects() == ["Birinci", "İkinci"]
+    assert smtp_sink.connections == 2
+
+
+def test_reconnects_when_connection_drops_mid_send(make_sender, smtp_sink):
+    sender = make_sender()
+    sender.enqueue("Birinci", "<p>1</p>")
+    sender._tick()
+    # NOOP kontrolünü geçen bağlantı, ileti gönderilirken kopar; ileti yeni bağlantıyla bir kez gönderilir.
+    smtp_sink.drop_on_mail = 1
+    sender.enqueue("İkinci", "<p>2</p>")
+    sender._tick()
+    assert smtp_sink.subjects() == ["Birinci", "İkinci"]
+    assert smtp_sink.connections == 2
+    assert statuses() == ['sent', 'sent']
+
+
+def test_failed_send_is_rescheduled(make_sender, smtp_sink):
+    import app as application
+    sender = make_sender(base_backoff=30)
+    sender.enqueue("Ulaşılamadı", "<p>gövde</p>")
+    # Yeni bağlantıda da kopan gönderim başarısız sayılır.
+    smtp_sink.drop_on_mail = 2
+    sender._tick()
+    item = application.OutboundEmail.query.one()
+    assert smtp_sink.messages == []
+    assert (item.status, item.attempts) == ('pending', 1)
+    assert item.next_attempt_at > datetime.utcnow() + timedelta(seconds=20)
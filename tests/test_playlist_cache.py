@@ -0,0 +1,64 @@
+# tests/test_playlist_cache.py (Diskteki liste önbelleğinin koşullu ve Range destekli sunumu)
+
+import gc
+import warnings
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+from playlist_cache import PlaylistCache
+
+BODY = '#EXTM3U\n' + ''.join(f'#EXTINF:-1 group-title="SPORTS",Kanal {i}\nhttp://example.com/{i}.ts\n' for i in range(100))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PlaylistCache(str(tmp_path), max_bytes=10 ** 7)
+
+
+@pytest.fixture
+def entry(cache):
+    return cache.store(1, datetime(2024, 1, 1), 'SPORTS', [BODY])
+
+
+def respond(cache, entry, headers):
+    with Flask(__name__).test_request_context(headers=headers) as context:
+        response = cache.respond(entry, 'liste.m3u')
+        try:
+            # Sunucunun göndereceği gövde (304 yanıtında boş).
+            return response.status_code, b''.join(response.get_app_iter(context.request.environ)), response.headers
+        finally:
+            response.close()
+
+
+def test_serves_gzip_copy_and_revalidates(cache, entry):
+    status, body, headers = respond(cache, entry, {'Accept-Encoding': 'gzip'})
+    assert (status, headers['Content-Encoding']) == (200, 'gzip')
+    assert len(body) < len(BODY)
+    status, body, _ = respond(cache, entry, {'Accept-Encoding': 'gzip', 'If-None-Match': headers['ETag']})
+    assert (status, body) == (304, b'')
+
+
+def test_range_is_served_from_raw_file(cache, entry):
+    status, body, headers = respond(cache, entry, {'Accept-Encoding': 'gzip', 'Range': 'bytes=0-7'})
+    assert (status, body) == (206, b'#EXTM3U\n')
+    assert 'Content-Encoding' not in headers
+
+
+def test_unsatisfiable_range_closes_file(cache, entry):
+    gc.collect()  # Önceki testlerden kalan nesnelerin uyarıları bu teste karışmasın.
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ResourceWarning)
+        for _ in range(5):
+            with pytest.raises(RequestedRangeNotSatisfiable):
+                respond(cache, entry, {'Range': f'bytes={len(BODY) + 10}-'})
+        gc.collect()
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning) and cache.directory in str(warning.message)]
+
+
+def test_missing_file_raises(cache, entry):
+    cache.discard([1])
+    with pytest.raises(FileNotFoundError):
+        respond(cache, entry, {})
@@ -0,0 +1,79 @@
+# tests/test_retry_policy.py (Adım bazlı yeniden deneme, süre sınırı ve istatistikler)
+
+import pytest
+
+from retry_policy import Deadline, FatalStepError, RetryPolicy, RetryStats, RunDeadlineExceeded, build_policies, call_with_retry
+
+
+class Flaky:
+    """İlk `failures` çağrıda `error` fırlatır, sonra aldığı zaman aşımını döndürür."""
+
+    def __init__(self, failures, error=TimeoutError):
+        self.failures = failures
+        self.error = error
+        self.timeouts = []
+
+    def __call__(self, timeout):
+        self.timeouts.append(timeout)
+        if len(self.timeouts) <= self.failures:
+            raise self.error("geçici")
+        return timeout
+
+
+def retry(func, policy, deadline=None, stats=None, is_retryable=lambda e: True, sleeps=None):
+    return call_with_retry(func, policy, deadline or Deadline(60), 'order', stats or RetryStats(), is_retryable,
+                           sleep=(sleeps.append if sleeps is not None else lambda delay: None))
+
+
+def test_retries_until_success_and_records_stats():
+    policy = RetryPolicy(attempts=3, timeout=5.0, base_delay=0.5, max_delay=4.0, jitter=0)
+    func, stats, sleeps = Flaky(2), RetryStats(), []
+    assert retry(func, policy, stats=stats, sleeps=sleeps) == 5.0
+    assert len(func.timeouts) == 3
+    assert sleeps == [0.5, 1.0]
+    assert stats.as_dict()['order']['retries'] == 2
+
+
+def test_gives_up_after_last_attempt():
+    func = Flaky(5)
+    with pytest.raises(TimeoutError):
+        retry(func, RetryPolicy(attempts=2, jitter=0))
+    assert len(func.timeouts) == 2
+
+
+def test_non_retryable_and_fatal_errors_are_raised_immediately():
+    func = Flaky(1, error=ValueError)
+    with pytest.raises(ValueError):
+        retry(func, RetryPolicy(attempts=3), is_retryable=lambda e: not isinstance(e, ValueError))
+    func = Flaky(1, error=FatalStepError)
+    with pytest.raises(FatalStepError):
+        retry(func, RetryPolicy(attempts=3))
+    assert len(func.timeouts) == 1
+
+
+def test_timeout_is_limited_by_deadline():
+    func = Flaky(0)
+    assert retry(func, RetryPolicy(timeout=10.0), deadline=Deadline(2)) <= 2
+
+
+def test_expired_deadline():
+    deadline = Deadline(0)
+    with pytest.raises(RunDeadlineExceeded):
+        deadline.check('login')
+    with pytest.raises(RunDeadlineExceeded):
+        retry(Flaky(0), RetryPolicy(), deadline=deadline)
+
+
+def test_no_retry_when_backoff_outlasts_deadline():
+    func = Flaky(1)
+    with pytest.raises(RunDeadlineExceeded):
+        retry(func, RetryPolicy(attempts=3, base_delay=5.0, max_delay=5.0, jitter=0), deadline=Deadline(1))
+    assert len(func.timeouts) == 1
+
+
+def test_build_policies_merges_overrides():
+    policies = build_policies({'login': {'attempts': 5}, 'extract': {'timeout': 3.0, 'unknown': 1}, 'probe': {'poll': 1.0}})
+    assert (policies['login'].attempts, policies['login'].timeout) == (5, 10.0)
+    assert policies['extract'].timeout == 3.0
+    assert (policies['probe'].poll, policies['probe'].attempts) == (1.0, policies['default'].attempts)
+    assert build_policies()['login'].attempts == 2
@@ -0,0 +1,6 @@
+# user_agents.py (Dış sunuculara gönderilen User-Agent başlıkları; tüm modüller buradan kullanır)
+
+# M3U listeleri ve kanal uçları için oynatıcı gibi görünmek gerekir; bazı paneller bilinmeyen istemcileri reddediyor.
+PLAYER_USER_AGENT = 'VLC/3.0.20 LibVLC/3.0.20'
+# HTTP motoru WHMCS sitesine masaüstü Chrome olarak bağlanır (Selenium motoruyla aynı site davranışı için).
+BROWSER_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"